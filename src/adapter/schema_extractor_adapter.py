@@ -1,14 +1,225 @@
 from abc import ABC, abstractmethod
+from functools import partial
+
+# Kind of the event opening a section of the schema, see SchemaExtractorAdapter.stream_schema
+SECTION = 'section'
 
 class SchemaExtractorAdapter(ABC):
-    def __init__(self, connection):
+    def __init__(self, connection, bulk=False, progress=None, object_filter=None):
         self.connection = connection
+        self.bulk = bulk
+        self.progress = progress
+        # Include / exclude rules on the objects (utils.object_filter.ObjectFilter)
+        self.object_filter = object_filter
+        self.previous = None
+        self.manifest = None
+        # Per-object extractions collected instead of run (async and sharded modes): (schema_type, name, task)
+        self.deferred = None
+
+
+    def extract_schema(self, file_exporter=None, database=None, previous=None) -> dict:
+        """
+        Extract the schema of the database on a connection of the pool.
+        :param file_exporter: File exporter to save the SQL files
+        :param database: Name of the current database
+        :param previous: Previous snapshot (schema and manifest), only the changed objects are extracted (incremental mode)
+        :return: JSON schema with the database structure
+        """
+        return self.collect(self.stream_schema(file_exporter, database, previous))
+
+    def stream_schema(self, file_exporter=None, database=None, previous=None):
+        """
+        Extract the schema of the database one object at a time. The objects are listed first (their extractions
+        are deferred), then each one is extracted and yielded before the next one is read, so only one object
+        is held at a time.
+        :return: Generator of (kind, name, payload) events: (SECTION, schema_type, None or {'error': ...}) opens
+        a section, then (schema_type, name, entry) for each of its objects, in the order of extract_schema
+        """
+        tasks = []
+
+        with self.connection.connect() as conn:
+            self.deferred = tasks
+
+            try:
+                # Objects read with the listing (MySQL triggers) or by tasks without a section are kept in it
+                listing = self.read_schema(conn, file_exporter, database, previous)
+            finally:
+                self.deferred = None
+
+            by_type = {}
+
+            for schema_type, _, task in tasks:
+                by_type.setdefault(schema_type, []).append(task)
+
+            tasks.clear()
+
+            for task in by_type.pop(None, []):
+                result = {schema_type: {} for schema_type in listing}
+                task(conn, result)
+
+                for schema_type, entries in result.items():
+                    # Sections that could not be listed stay in error
+                    if not isinstance(listing[schema_type].get('error'), str):
+                        listing[schema_type].update(entries)
+
+            phases = self.phase_timer(database)
 
+            for schema_type, section in listing.items():
+                if isinstance(section.get('error'), str):
+                    yield SECTION, schema_type, section
+                    continue
+
+                yield SECTION, schema_type, None
+
+                for task in by_type.pop(schema_type, []):
+                    result = {schema_type: {}}
+                    phases.start(schema_type)
+                    task(conn, result)
+                    phases.stop()
+
+                    yield from self.__section_events(result)
+
+                yield from self.__section_events({schema_type: section})
+
+    @staticmethod
+    def __section_events(schema):
+        for schema_type, section in schema.items():
+            for name, entry in section.items():
+                yield schema_type, name, entry
+
+    @staticmethod
+    def events(schema):
+        """
+        Events of an extracted schema, see stream_schema.
+        """
+        for schema_type, section in schema.items():
+            if isinstance(section.get('error'), str):
+                yield SECTION, schema_type, section
+                continue
+
+            yield SECTION, schema_type, None
+
+            for name, entry in section.items():
+                yield schema_type, name, entry
+
+    @staticmethod
+    def collect(events) -> dict:
+        """
+        Build the schema of a stream of events, see stream_schema.
+        """
+        schema = {}
+
+        for kind, name, payload in events:
+            if kind == SECTION:
+                schema[name] = payload if payload is not None else {}
+            elif not isinstance(schema.setdefault(kind, {}).get('error'), str):
+                schema[kind][name] = payload
+
+        return schema
 
     @abstractmethod
-    def extract_schema(self, file_exporter=None) -> dict:
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None) -> dict:
+        pass
+
+    @abstractmethod
+    def extract_manifest(self, conn, database=None) -> dict:
         pass
 
     @abstractmethod
     def list_databases(self) -> list | None:
         pass
+
+    def extract_checksum(self, conn, database=None) -> str | None:
+        """
+        Checksum of the schema of the database, computed on the server in one query (--skip-unchanged).
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :return: Checksum, None if it cannot be computed (the database is always extracted)
+        """
+        return None
+
+    def phase_timer(self, database):
+        """
+        Timer of the extraction phases of a database, ignored unless the metrics of the run are enabled.
+        """
+        metrics = getattr(self.connection, 'metrics', None)
+
+        if metrics is None:
+            return NullPhaseTimer()
+
+        return metrics.phase_timer(self.connection.server, database)
+
+    def allows(self, name, schema=None) -> bool:
+        """
+        Check if an object is kept by the include / exclude rules.
+        """
+        return not self.object_filter or self.object_filter.allows(name, schema)
+
+    def filter_condition(self, name_column, schema_column=None, schema=None, escape=None):
+        """
+        SQL condition excluding the filtered objects from a listing query, see ObjectFilter.sql_condition.
+        :return: Condition (None if no rule can be translated) and its bind parameters
+        """
+        if not self.object_filter:
+            return None, {}
+
+        return self.object_filter.sql_condition(name_column, schema_column, schema, escape)
+
+    def submit(self, conn, schema, task, schema_type=None, name=None):
+        """
+        Run the extraction of one object, or keep it for later when the extraction is deferred (async and sharded modes).
+        :param conn: Connection to the database
+        :param schema: Schema filled by the task
+        :param task: Callable(conn, schema) extracting the object into the schema
+        :param schema_type: Section of the object, used to split the deferred extractions into shards
+        :param name: Name of the object
+        """
+        if self.progress is not None:
+            self.progress.discover()
+            task = partial(self.__counted, task)
+
+        if self.deferred is not None:
+            self.deferred.append((schema_type, name, task))
+        else:
+            task(conn, schema)
+
+    def __counted(self, task, conn, schema):
+        try:
+            task(conn, schema)
+        finally:
+            self.progress.advance()
+
+    def is_unchanged(self, schema_type, name) -> bool:
+        """
+        Check if an object has the same modification marker as in the previous snapshot (incremental mode).
+        :param schema_type: Section of the schema (tables, views, procedures, functions, triggers)
+        :param name: Name of the object
+        :return: True if the previous entry of the object can be reused
+        """
+        if not self.previous or not self.manifest:
+            return False
+
+        previous_schema = self.previous.get('schema') or {}
+        previous_manifest = self.previous.get('manifest') or {}
+
+        marker = self.manifest.get(schema_type, {}).get(name)
+        previous_entry = previous_schema.get(schema_type, {}).get(name)
+
+        if marker is None or not isinstance(previous_entry, dict) or 'error' in previous_entry:
+            return False
+
+        return marker == previous_manifest.get(schema_type, {}).get(name)
+
+    def previous_entry(self, schema_type, name):
+        """
+        Return the entry of an object in the previous snapshot.
+        """
+        return self.previous['schema'][schema_type][name]
+
+
+class NullPhaseTimer:
+    def start(self, phase):
+        pass
+
+    def stop(self):
+        pass
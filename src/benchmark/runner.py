@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from database.replay import QueryCounter, Recording, recording_engine_factory, replay_engine_factory
+from benchmark.synthetic import SyntheticMySQLServer
+from core import Core
+from database.connection import DatabaseConnection
+from database.extractor.database_extractor import DatabaseExtractor
+
+DEFAULT_PORTS = {'mysql': 3306, 'mariadb': 3306, 'mssql': 1433}
+
+
+class BenchmarkRunner:
+    """
+    Run Core.run on replayed connections (synthetic catalog or recording) and measure it.
+    """
+
+    def __init__(self, source, db_type='mysql', databases=None, latency=0.0, bulk=False, jobs=1, skip_unchanged=False):
+        """
+        :param source: Answers the queries, SyntheticMySQLServer or Recording
+        :param db_type: Database type of the source
+        :param databases: Databases to extract
+        :param latency: Simulated latency of each query, in seconds
+        :param bulk: Bulk extraction mode
+        :param jobs: Number of databases extracted concurrently
+        :param skip_unchanged: Skip the databases whose checksum did not change since the previous run in the output
+        """
+        self.source = source
+        self.db_type = db_type
+        self.databases = databases or ['bench']
+        self.latency = latency
+        self.bulk = bulk
+        self.jobs = jobs
+        self.skip_unchanged = skip_unchanged
+
+    def run(self, output=None):
+        """
+        Run the extraction and measure it.
+        :param output: Output directory, a temporary directory (removed afterwards) if not given
+        :return: Report with the wall time, the number of queries, the peak memory and the files written
+        """
+        counter = QueryCounter()
+        output_dir = output or tempfile.mkdtemp(prefix='db_trackchanges_benchmark_')
+
+        core = Core(
+            self.db_type, host='replay', port=DEFAULT_PORTS[self.db_type], user='benchmark', password='benchmark',
+            output=output_dir, databases=self.databases, bulk=self.bulk, jobs=self.jobs,
+            skip_unchanged=self.skip_unchanged
+        )
+
+        # Engines created by a previous run would not be replayed
+        DatabaseConnection.dispose_all()
+        DatabaseExtractor.enable_engine_factory(replay_engine_factory(self.source, counter, self.latency))
+
+        try:
+            tracemalloc.start()
+            start = time.perf_counter()
+
+            try:
+                core.run()
+            finally:
+                wall_time = time.perf_counter() - start
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                DatabaseExtractor.enable_engine_factory(None)
+
+            return {
+                'wall_time': round(wall_time, 3),
+                'query_count': counter.count,
+                'peak_memory': peak_memory,
+                'files_written': core.file_stats['written'],
+                'files': sum(len(files) for _, _, files in os.walk(output_dir))
+            }
+        finally:
+            if output is None:
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def record(db_type, host, port, user, password, databases, recording_file, bulk=False):
+    """
+    Run Core.run against a live server and save every query with its result set, for later replays.
+    """
+    recording = Recording()
+    output_dir = tempfile.mkdtemp(prefix='db_trackchanges_recording_')
+
+    try:
+        core = Core(db_type, host, port, user, password, output=output_dir, databases=databases, bulk=bulk)
+
+        DatabaseExtractor.enable_engine_factory(recording_engine_factory(recording))
+        core.run()
+    finally:
+        DatabaseExtractor.enable_engine_factory(None)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    recording.save(recording_file)
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare a report with a baseline report.
+    :param tolerance: Accepted relative increase of the wall time and of the peak memory
+    :return: List of the regressions
+    """
+    regressions = []
+
+    if report['query_count'] > baseline['query_count']:
+        regressions.append(f"query_count: {baseline['query_count']} -> {report['query_count']}")
+
+    for key in ['wall_time', 'peak_memory']:
+        if report[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {baseline[key]} -> {report[key]}")
+
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the schema extraction without a database server.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    synthetic = subparsers.add_parser('synthetic', help="Extract a synthetic MySQL catalog")
+    synthetic.add_argument('--tables', type=int, default=1000, help="Number of tables (default: 1000)")
+    synthetic.add_argument('--columns', type=int, default=10, help="Number of columns per table (default: 10)")
+    synthetic.add_argument('--views', type=int, default=0, help="Number of views (default: 0)")
+    synthetic.add_argument('--procedures', type=int, default=0, help="Number of procedures (default: 0)")
+    synthetic.add_argument('--functions', type=int, default=0, help="Number of functions (default: 0)")
+    synthetic.add_argument('--triggers', type=int, default=0, help="Number of triggers (default: 0)")
+
+    replay = subparsers.add_parser('replay', help="Replay a recording")
+    replay.add_argument('--recording', type=str, required=True, help="Recording file")
+    replay.add_argument('--db_type', '-t', type=str, required=True, help="Database type of the recording")
+    replay.add_argument('--databases', '-d', type=str, nargs='+', required=True, help="Databases extracted in the recording")
+
+    recorder = subparsers.add_parser('record', help="Record the queries of an extraction on a live server")
+    recorder.add_argument('--recording', type=str, required=True, help="Recording file to write")
+    recorder.add_argument('--db_type', '-t', type=str, required=True, help="Database type")
+    recorder.add_argument('--host', '-i', type=str, required=True, help="Database host")
+    recorder.add_argument('--port', type=int, required=False, help="Database port")
+    recorder.add_argument('--user', '-u', type=str, required=True, help="Database user")
+    recorder.add_argument('--password', '-p', type=str, required=True, help="Database password")
+    recorder.add_argument('--databases', '-d', type=str, nargs='+', required=True, help="Databases to extract")
+    recorder.add_argument('--bulk', '-b', action='store_true', help="Bulk extraction mode")
+
+    for subparser in (synthetic, replay):
+        subparser.add_argument('--latency', type=float, default=0.0, help="Simulated latency of each query, in milliseconds (default: 0)")
+        subparser.add_argument('--bulk', '-b', action='store_true', help="Bulk extraction mode")
+        subparser.add_argument('--jobs', '-j', type=int, default=1, help="Number of databases extracted concurrently (default: 1)")
+        subparser.add_argument('--report', type=str, required=False, help="Save the report to this JSON file")
+        subparser.add_argument('--baseline', type=str, required=False, help="Fail if the report is worse than this baseline report")
+        subparser.add_argument('--tolerance', type=float, default=0.25, help="Accepted relative increase of the wall time and of the peak memory (default: 0.25)")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    if args.command == 'record':
+        record(args.db_type, args.host, args.port or DEFAULT_PORTS[args.db_type], args.user, args.password, args.databases, args.recording, args.bulk)
+        return 0
+
+    if args.command == 'synthetic':
+        source = SyntheticMySQLServer(
+            tables=args.tables, columns=args.columns, views=args.views,
+            procedures=args.procedures, functions=args.functions, triggers=args.triggers
+        )
+        runner = BenchmarkRunner(source, 'mysql', ['bench'], args.latency / 1000, args.bulk, args.jobs)
+    else:
+        runner = BenchmarkRunner(Recording.load(args.recording), args.db_type, args.databases, args.latency / 1000, args.bulk, args.jobs)
+
+    report = runner.run()
+    print(json.dumps(report, indent=4))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Baseline report checked by the test suite, with the accepted relative increase of the import time (the machines vary)
+BASELINE = os.path.join(SRC_DIR, 'benchmark', 'startup_baseline.json')
+
+# Startup scenarios: command run with -X importtime, and the modules it must not import
+SCENARIOS = {
+    'help': {
+        'args': [os.path.join(SRC_DIR, 'main.py'), '--help'],
+        'forbidden': ['sqlalchemy', 'pyodbc', 'pymysql', 'aiomysql', 'aioodbc']
+    },
+    'mysql': {
+        'args': ['-c', "import core; from database.factory import DatabaseExtractorFactory; DatabaseExtractorFactory.create_extractor('mysql', None)"],
+        'forbidden': ['pyodbc', 'sqlalchemy.dialects.mssql', 'aiomysql', 'aioodbc']
+    },
+    'mssql': {
+        'args': ['-c', "import core; from database.factory import DatabaseExtractorFactory; DatabaseExtractorFactory.create_extractor('mssql', None)"],
+        'forbidden': ['pymysql', 'aiomysql', 'aioodbc']
+    }
+}
+
+
+def parse_importtime(output):
+    """
+    Parse the output of python -X importtime.
+    :return: Total import time in milliseconds (sum of the top-level imports) and the imported modules
+    """
+    total = 0
+    modules = []
+
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append(name.strip())
+
+        # Nested imports are indented, their time is already in the cumulative time of their parent
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+
+    return total / 1000, modules
+
+
+def measure(scenario, repeat=5):
+    """
+    Run a startup scenario several times in a fresh interpreter.
+    :return: Median import time in milliseconds, number of modules imported, forbidden modules imported
+    """
+    times = []
+    modules = []
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime'] + SCENARIOS[scenario]['args'],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True
+        )
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Startup scenario {scenario} failed: {result.stderr.strip().splitlines()[-1]}")
+
+        import_time, modules = parse_importtime(result.stderr)
+        times.append(import_time)
+
+    forbidden = [
+        module for module in modules
+        if any(module == name or module.startswith(name + '.') for name in SCENARIOS[scenario]['forbidden'])
+    ]
+
+    return {
+        'import_time': round(statistics.median(times), 1),
+        'modules': len(modules),
+        'forbidden': forbidden
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare a startup report with a baseline report.
+    :param tolerance: Accepted relative increase of the import time
+    :return: List of the regressions
+    """
+    regressions = []
+
+    for scenario, result in report.items():
+        if result['forbidden']:
+            regressions.append(f"{scenario}: imports {', '.join(result['forbidden'])}")
+
+        if scenario in baseline and result['import_time'] > baseline[scenario]['import_time'] * (1 + tolerance):
+            regressions.append(f"{scenario}: import_time {baseline[scenario]['import_time']} -> {result['import_time']}")
+
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure the import time of the CLI startup (python -X importtime).")
+    parser.add_argument('--scenarios', type=str, nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS), help="Scenarios to measure (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per scenario, the median is reported (default: 5)")
+    parser.add_argument('--report', type=str, required=False, help="Save the report to this JSON file")
+    parser.add_argument('--baseline', type=str, required=False, help="Fail if the report is worse than this baseline report")
+    parser.add_argument('--tolerance', type=float, required=False, help="Accepted relative increase of the import time (default: the tolerance of the baseline, or 0.25)")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    report = {scenario: measure(scenario, args.repeat) for scenario in args.scenarios}
+    print(json.dumps(report, indent=4))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+    baseline = {}
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get('tolerance', 0.25)
+
+    # Forbidden imports fail even without a baseline
+    regressions = compare(report, baseline, tolerance)
+
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
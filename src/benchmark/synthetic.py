@@ -0,0 +1,184 @@
+import datetime
+import re
+
+
+class SyntheticMySQLServer:
+    """
+    Synthetic MySQL catalog answering the queries of the MySQL extractor (per-object reflection), so the
+    extraction can be measured on any schema size without a server.
+    """
+
+    VERSION = '8.0.36'
+    COLUMN_TYPES = ['int', 'varchar(100)', 'datetime', 'decimal(10,2)', 'text', 'bigint', 'tinyint(1)', 'varchar(20)']
+
+    def __init__(self, database='bench', tables=100, columns=10, views=0, procedures=0, functions=0, triggers=0):
+        """
+        :param database: Name of the database
+        :param tables: Number of tables
+        :param columns: Number of columns per table (including the primary key)
+        :param views: Number of views
+        :param procedures: Number of procedures
+        :param functions: Number of functions
+        :param triggers: Number of triggers
+        """
+        self.database = database
+        self.tables = [f"table_{i:06d}" for i in range(tables)]
+        self.columns = max(columns, 1)
+        self.views = [f"view_{i:06d}" for i in range(views)]
+        self.procedures = [f"procedure_{i:06d}" for i in range(procedures)]
+        self.functions = [f"function_{i:06d}" for i in range(functions)]
+        self.triggers = [f"trigger_{i:06d}" for i in range(triggers)]
+        self.table_positions = {name: index for index, name in enumerate(self.tables)}
+        self.routine_names = {'PROCEDURE': set(self.procedures), 'FUNCTION': set(self.functions)}
+        self.view_names = set(self.views)
+        self.created = datetime.datetime(2025, 1, 1)
+
+        self.handlers = [
+            (r"^SET NAMES \w+$", lambda m, p: ([], [])),
+            (r"^SELECT VERSION\(\)$", lambda m, p: (['VERSION()'], [[self.VERSION]])),
+            (r"^SHOW VARIABLES LIKE '(\w+)'$", self.__variable),
+            (r"^SELECT DATABASE\(\)$", lambda m, p: (['DATABASE()'], [[self.database]])),
+            (r"^SELECT @@(\w+)$", self.__select_variable),
+            (r"^USE `([^`]+)`$", lambda m, p: ([], [])),
+            (r"^SHOW DATABASES$", lambda m, p: (['Database'], [[self.database]])),
+            (r"^SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'$", lambda m, p: ([f'Tables_in_{self.database}', 'Table_type'], [[name, 'BASE TABLE'] for name in self.tables])),
+            (r"^SHOW FULL TABLES WHERE Table_type = 'VIEW'$", lambda m, p: ([f'Tables_in_{self.database}', 'Table_type'], [[name, 'VIEW'] for name in self.views])),
+            (r"^SHOW CREATE TABLE `[^`]+`\.`([^`]+)`$", self.__show_create_table),
+            (r"^DESCRIBE `[^`]+`\.`([^`]+)`$", self.__describe),
+            (r"^SELECT COLUMN_NAME, EXTRA FROM INFORMATION_SCHEMA\.COLUMNS", self.__column_extras),
+            (r"^SELECT information_schema\.columns\.table_schema, information_schema\.columns\.table_name, information_schema\.columns\.column_name FROM information_schema\.columns WHERE", self.__referred_columns),
+            (r"^SHOW (PROCEDURE|FUNCTION) STATUS WHERE Db = ", self.__routine_status),
+            (r"^SHOW CREATE (PROCEDURE|FUNCTION) `([^`]+)`$", self.__show_create_routine),
+            (r"^SHOW CREATE VIEW `([^`]+)`$", self.__show_create_view),
+            (r"^SHOW TRIGGERS$", self.__show_triggers),
+            (r"^SELECT \(SELECT CONCAT\(COUNT\(\*\), ':'", self.__checksum),
+        ]
+        self.handlers = [(re.compile(pattern), handler) for pattern, handler in self.handlers]
+
+    def answer(self, statement, parameters):
+        """
+        Return the columns and the rows of a query, or None if the query is not supported.
+        """
+        statement = re.sub(r"\s+", " ", statement).strip()
+
+        for pattern, handler in self.handlers:
+            match = pattern.match(statement)
+
+            if match:
+                return handler(match, parameters)
+
+        return None
+
+    VARIABLES = {
+        'sql_mode': 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ENGINE_SUBSTITUTION',
+        'lower_case_table_names': '0',
+        'transaction_isolation': 'REPEATABLE-READ'
+    }
+
+    def __variable(self, match, parameters):
+        name = match.group(1)
+        rows = [[name, self.VARIABLES[name]]] if name in self.VARIABLES else []
+
+        return ['Variable_name', 'Value'], rows
+
+    def __select_variable(self, match, parameters):
+        name = match.group(1)
+
+        if name not in self.VARIABLES:
+            return None
+
+        return [f'@@{name}'], [[self.VARIABLES[name]]]
+
+    def __column_names(self):
+        return ['id'] + [f"column_{i:03d}" for i in range(1, self.columns)]
+
+    def __column_type(self, index):
+        return self.COLUMN_TYPES[index % len(self.COLUMN_TYPES)]
+
+    def __show_create_table(self, match, parameters):
+        name = match.group(1)
+
+        if name in self.view_names:
+            return self.__show_create_view(match, parameters)
+
+        if name not in self.table_positions:
+            return None
+
+        index = self.table_positions[name]
+        lines = ["  `id` int NOT NULL AUTO_INCREMENT"]
+
+        for column_index, column_name in enumerate(self.__column_names()[1:], start=1):
+            column_type = self.__column_type(column_index)
+            nullable = "DEFAULT NULL" if column_type != 'text' else "NULL"
+            lines.append(f"  `{column_name}` {column_type} {nullable} COMMENT 'Column {column_index}'")
+
+        lines.append("  PRIMARY KEY (`id`)")
+
+        if self.columns > 1:
+            lines.append("  KEY `ix_column_001` (`column_001`)")
+
+        if index > 0:
+            lines.append(f"  CONSTRAINT `fk_{name}` FOREIGN KEY (`id`) REFERENCES `{self.tables[index - 1]}` (`id`)")
+            lines.append(f"  CONSTRAINT `ck_{name}` CHECK ((`id` > 0))")
+
+        definition = f"CREATE TABLE `{name}` (\n" + ",\n".join(lines) + "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Synthetic table'"
+
+        return ['Table', 'Create Table'], [[name, definition]]
+
+    def __show_create_view(self, match, parameters):
+        name = match.group(1)
+
+        if name not in self.view_names:
+            return None
+
+        definition = f"CREATE ALGORITHM=UNDEFINED DEFINER=`bench`@`%` SQL SECURITY DEFINER VIEW `{name}` AS select `{self.tables[0]}`.`id` AS `id` from `{self.tables[0]}`"
+        return ['View', 'Create View', 'character_set_client', 'collation_connection'], [[name, definition, 'utf8mb4', 'utf8mb4_0900_ai_ci']]
+
+    def __describe(self, match, parameters):
+        return ['Field', 'Type', 'Null', 'Key', 'Default', 'Extra'], [['id', 'int', 'NO', '', None, '']]
+
+    def __column_extras(self, match, parameters):
+        extras = [['id', 'auto_increment']] + [[column_name, ''] for column_name in self.__column_names()[1:]]
+        return ['COLUMN_NAME', 'EXTRA'], extras
+
+    def __referred_columns(self, match, parameters):
+        # Case of the columns referenced by the foreign keys (SQLAlchemy, MySQL 8 bugs 88718 and 96365)
+        tables = [value for key, value in parameters.items() if key.startswith('table_name')]
+        return ['table_schema', 'table_name', 'column_name'], [[self.database, table, 'id'] for table in tables]
+
+    def __routine_status(self, match, parameters):
+        names = self.procedures if match.group(1) == 'PROCEDURE' else self.functions
+        columns = ['Db', 'Name', 'Type', 'Definer', 'Modified', 'Created', 'Security_type', 'Comment', 'character_set_client', 'collation_connection', 'Database Collation']
+
+        return columns, [[self.database, name, match.group(1), 'bench@%', self.created, self.created, 'DEFINER', '', 'utf8mb4', 'utf8mb4_0900_ai_ci', 'utf8mb4_0900_ai_ci'] for name in names]
+
+    def __show_create_routine(self, match, parameters):
+        object_type, name = match.group(1), match.group(2)
+
+        if name not in self.routine_names[object_type]:
+            return None
+
+        if object_type == 'PROCEDURE':
+            definition = f"CREATE DEFINER=`bench`@`%` PROCEDURE `{name}`(IN `p_id` int)\nBEGIN\n    SELECT * FROM `{self.tables[0] if self.tables else 'dual'}` WHERE `id` = p_id;\nEND"
+        else:
+            definition = f"CREATE DEFINER=`bench`@`%` FUNCTION `{name}`(`p_value` int) RETURNS int\n    DETERMINISTIC\nRETURN p_value * 2"
+
+        columns = [object_type.capitalize(), 'sql_mode', f'Create {object_type.capitalize()}', 'character_set_client', 'collation_connection', 'Database Collation']
+        return columns, [[name, '', definition, 'utf8mb4', 'utf8mb4_0900_ai_ci', 'utf8mb4_0900_ai_ci']]
+
+    def __checksum(self, match, parameters):
+        # Same catalog, same checksum: one value per catalog table, from the shape of the schema
+        aliases = re.findall(r"\) AS (\w+)", match.string)
+        shape = f"{len(self.tables)}:{self.columns}:{len(self.views)}:{len(self.procedures)}:{len(self.functions)}:{len(self.triggers)}"
+
+        return aliases, [[f"{alias}:{shape}" for alias in aliases]]
+
+    def __show_triggers(self, match, parameters):
+        columns = ['Trigger', 'Event', 'Table', 'Statement', 'Timing', 'Created', 'sql_mode', 'Definer', 'character_set_client', 'collation_connection', 'Database Collation']
+        rows = []
+
+        for index, name in enumerate(self.triggers):
+            table = self.tables[index % len(self.tables)]
+            rows.append([name, 'INSERT', table, "SET NEW.`id` = NEW.`id`", 'BEFORE', self.created, '', 'bench@%', 'utf8mb4', 'utf8mb4_0900_ai_ci', 'utf8mb4_0900_ai_ci'])
+
+        return columns, rows
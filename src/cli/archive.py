@@ -0,0 +1,85 @@
+import argparse
+import json
+import sys
+
+from export.changelog_exporter import ChangelogExporter
+from handler.archive_handler import ArchiveReader
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Read an archive written with --archive without unpacking it.")
+    parser.add_argument('--archive', '-a', type=str, required=True, help="Archive (.tar.gz or .zip)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    files = subparsers.add_parser('list', help="List the files")
+    files.add_argument('patterns', type=str, nargs='*', help="Globs or directories ({database}/procedures), every file by default")
+
+    show = subparsers.add_parser('show', help="Print a file")
+    show.add_argument('name', type=str, help="Path of the file in the archive ({database}/tables/orders.sql)")
+
+    extract = subparsers.add_parser('extract', help="Extract files")
+    extract.add_argument('destination', type=str, help="Destination directory")
+    extract.add_argument('patterns', type=str, nargs='*', help="Globs or directories, every file by default")
+
+    diff = subparsers.add_parser('diff', help="Changes from this archive to another one")
+    diff.add_argument('other', type=str, help="Newer archive")
+    diff.add_argument('--database', '-d', type=str, required=False, help="Only this database (default: every database of both archives)")
+    diff.add_argument('--files', action='store_true', help="List the files added, removed and changed instead of the schema changes")
+    diff.add_argument('--json', action='store_true', help="Print the changes as JSON instead of Markdown")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    reader = ArchiveReader(args.archive)
+
+    try:
+        if args.command == 'list':
+            for name in reader.names(args.patterns or None):
+                print(name)
+
+        elif args.command == 'show':
+            content = reader.read(args.name)
+
+            if content is None:
+                print(f"{args.name} is not in {args.archive}", file=sys.stderr)
+                return 1
+
+            print(content, end='')
+
+        elif args.command == 'extract':
+            extracted = reader.extract(args.destination, args.patterns or None)
+            print(f"{len(extracted)} files extracted to {args.destination}")
+
+        else:
+            other = ArchiveReader(args.other)
+
+            try:
+                if args.files:
+                    changes = reader.diff_files(other, [args.database] if args.database else None)
+
+                    if args.json:
+                        print(json.dumps(changes, ensure_ascii=False, indent=4))
+                    else:
+                        for kind, prefix in (('added', 'A'), ('removed', 'D'), ('changed', 'M')):
+                            for name in changes[kind]:
+                                print(f"{prefix}\t{name}")
+                else:
+                    databases = [args.database] if args.database else sorted(set(reader.databases()) | set(other.databases()))
+                    changelogs = {database: reader.diff(other, database) for database in databases}
+
+                    if args.json:
+                        print(json.dumps(changelogs, ensure_ascii=False, indent=4))
+                    else:
+                        print("\n".join(ChangelogExporter.to_markdown(database, changelog) for database, changelog in changelogs.items()), end='')
+            finally:
+                other.close()
+    finally:
+        reader.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+
+from export.changelog_exporter import ChangelogExporter
+from handler.history_store import HistoryStore
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Query the schema history recorded with --history.")
+    parser.add_argument('--store', '-s', type=str, required=True, help="SQLite history store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('runs', help="List the runs")
+
+    history = subparsers.add_parser('history', help="Versions of an object")
+    history.add_argument('name', type=str, help="Object name")
+    history.add_argument('--type', '-t', type=str, required=False, help="Schema type (tables, views, procedures, functions, triggers)")
+    history.add_argument('--database', '-d', type=str, required=False, help="Database of the object")
+    history.add_argument('--column', '-c', type=str, required=False, help="Only the versions where this column was added, changed or dropped")
+    history.add_argument('--json', action='store_true', help="Print the versions with their content as JSON")
+
+    diff = subparsers.add_parser('diff', help="Changes of a database between two runs")
+    diff.add_argument('database', type=str, help="Database")
+    diff.add_argument('from_run', type=int, help="First run")
+    diff.add_argument('to_run', type=int, help="Second run")
+    diff.add_argument('--json', action='store_true', help="Print the changelog as JSON instead of Markdown")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    store = HistoryStore(args.store)
+
+    try:
+        if args.command == 'runs':
+            for run in store.runs():
+                print(f"{run['run']}\t{run['started_at']}\t{run['host'] or ''}")
+
+        elif args.command == 'history':
+            versions = store.history(args.name, args.type, args.database, args.column)
+
+            if args.json:
+                print(json.dumps(versions, ensure_ascii=False, indent=4))
+            else:
+                for version in versions:
+                    until = f"until run {version['to_run']}" if version['to_run'] else "current"
+                    detail = ""
+
+                    if args.column:
+                        column = (version['content'].get('columns') or {}).get(args.column) if isinstance(version['content'], dict) else None
+                        detail = "\t" + (json.dumps(column, ensure_ascii=False) if column is not None else "(no column)")
+
+                    print(f"run {version['from_run']} ({version['from_date']})\t{version['database']}.{version['type']}.{version['name']}\t{until}{detail}")
+
+        else:
+            changelog = store.diff(args.database, args.from_run, args.to_run)
+
+            if args.json:
+                print(json.dumps(changelog, ensure_ascii=False, indent=4))
+            else:
+                print(ChangelogExporter.to_markdown(args.database, changelog), end='')
+    finally:
+        store.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,9 +2,7 @@ import argparse
 import os
 import json
 
-import pyodbc
 from constants.constants import SUPPORTED_SGBD, SYSTEM_TABLE_SGBD, DEFAULT_PORT
-from core import Core
 
 
 class input_listener:
@@ -14,27 +12,53 @@ class input_listener:
     def parse_arguments(self):
         parser = argparse.ArgumentParser(description="Export DB schema to JSON for git versionning.")
         parser.add_argument('--db_type', '-t', '--type', type=str, required=True, help=f"Database type (supported SGBD: {', '.join(SUPPORTED_SGBD)})")
-        parser.add_argument('--host', '-i', type=str, required=True, default="127.0.0.1", help="Database host")
+        parser.add_argument('--host', '-i', type=str, required=False, help="Database host (required unless --offline)")
         parser.add_argument('--port', type=int, required=False, help="Database port")
         parser.add_argument('--user', '-u', type=str, required=False, help="Database user")
         parser.add_argument('--password', '-p', type=str, required=False, help="Database password")
         parser.add_argument('--output', '-o', type=str, required=False, default="./", help="Output directory")
-        parser.add_argument('--restriction_list', '-r', type=str, required=False, help="Path to JSON file containing a list of restricted databases or tables to exclude.")
+        parser.add_argument('--restriction_list', '-r', type=str, required=False, help="Path to JSON file containing a list of restricted databases or tables to exclude, or include / exclude patterns (see README).")
         parser.add_argument('--exclude_system_databases', '-e', type=bool, required=False, default=True, help="Exclude system databases like 'sys' or 'master' (default: True)")
         parser.add_argument('--databases', '-d', type=str, nargs='*', required=False, help="List of databases to export. (default: all databases)")
+        parser.add_argument('--jobs', '-j', type=int, required=False, default=1, help="Number of databases extracted concurrently (default: 1)")
+        parser.add_argument('--incremental', action='store_true', required=False, help="Only extract the objects changed since the previous run (based on the catalog modification dates, and on a checksum of the columns, indexes and checks of the MySQL / MariaDB tables)")
+        parser.add_argument('--bulk', '-b', action='store_true', required=False, help="Read the catalog of each database in a few set-based queries instead of one round-trip per object")
+        parser.add_argument('--async', dest='use_async', action='store_true', required=False, help="Extract the objects of each database concurrently on an asyncio connection pool (requires aiomysql or aioodbc)")
+        parser.add_argument('--shards', type=int, default=1, required=False, help="Split the objects of each database into shards (by type and name range) extracted over N connections at once (default: 1)")
+        parser.add_argument('--writers', type=int, default=0, required=False, help="Write the SQL files in the background on N threads, overlapping the disk writes with the queries (default: 0, written by the extraction)")
+        parser.add_argument('--skip-unchanged', dest='skip_unchanged', action='store_true', required=False, help="Compute a checksum of the schema of each database on the server (one query) and skip the databases unchanged since the previous run, keeping their files")
+        parser.add_argument('--sharded', action='store_true', required=False, help="Save the schema snapshot as one JSON file per object (schema/<type>/<name>.json) instead of one {db}_schema.json")
+        parser.add_argument('--dedup', action='store_true', required=False, help="Save each distinct object once in a store shared by the databases (_objects in the output directory), each database only references them")
+        parser.add_argument('--metrics', type=str, required=False, help="Save the query latencies (by query shape) and the extraction phase timings of the run to this JSON file")
+        parser.add_argument('--prometheus', type=str, required=False, help="Save the same metrics to this file in the Prometheus text format (node_exporter textfile collector)")
+        parser.add_argument('--cache', type=str, required=False, help="Directory of the catalog cache: the raw result of every catalog query is saved to {database}.json.gz")
+        parser.add_argument('--offline', action='store_true', required=False, help="Rebuild the schema, the SQL files and the documentation from the catalog cache (--cache) without connecting to the server")
+        parser.add_argument('--archive', type=str, choices=['tar.gz', 'zip'], required=False, help="Also write the output to a single compressed archive (schemas.tar.gz or schemas.zip in the output directory), read it with python -m cli.archive")
+        parser.add_argument('--archive-per', dest='archive_per', type=str, choices=['run', 'database'], default='run', required=False, help="One archive for the run, or one {database}.tar.gz / .zip per database (default: run)")
+        parser.add_argument('--history', type=str, required=False, help="SQLite history store: the schema of each run is recorded in this file (query it with python -m cli.history)")
 
         args = parser.parse_args()
         return args
 
     def load_restriction_list(self):
+        """
+        The restriction list is either a JSON array of names to exclude, or an object of include / exclude patterns:
+        {"databases": {"include": [...], "exclude": [...]}, "objects": {"include": [...], "exclude": [...]}}
+        :return: Names to exclude and filters
+        """
         restriction_list = []
+        filters = {}
         if self.args.restriction_list and os.path.exists(self.args.restriction_list):
             try:
                 with open(self.args.restriction_list, 'r', encoding='utf-8') as f:
                     restriction_list = json.load(f)
 
-                    if not isinstance(restriction_list, list):
-                        raise ValueError("The restriction list must be a JSON array.")
+                    if isinstance(restriction_list, dict):
+                        filters = self.__load_filters(restriction_list)
+                        restriction_list = []
+
+                    elif not isinstance(restriction_list, list):
+                        raise ValueError("The restriction list must be a JSON array or object.")
 
             except FileNotFoundError:
                 raise FileNotFoundError(f"Restriction list file not found: {self.args.restriction_list}")
@@ -45,7 +69,28 @@ class input_listener:
             except ValueError as e:
                 raise ValueError(f"Error in restriction list: {e}")
 
-        return restriction_list
+        return restriction_list, filters
+
+    @staticmethod
+    def __load_filters(content):
+        unknown = set(content) - {'databases', 'objects'}
+
+        if unknown:
+            raise ValueError(f"Unknown keys: {', '.join(sorted(unknown))}. Expected 'databases' and 'objects'.")
+
+        filters = {}
+
+        for level, rules in content.items():
+            if not isinstance(rules, dict) or set(rules) - {'include', 'exclude'}:
+                raise ValueError(f"'{level}' must be an object with 'include' and/or 'exclude' lists.")
+
+            for kind, patterns in rules.items():
+                if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+                    raise ValueError(f"'{level}.{kind}' must be a list of strings.")
+
+            filters[level] = {'include': rules.get('include'), 'exclude': rules.get('exclude')}
+
+        return filters
 
     def run(self):
         db_type = self.args.db_type
@@ -55,16 +100,61 @@ class input_listener:
         password = self.args.password
         output = self.args.output
         databases = self.args.databases
-        restriction_list = self.load_restriction_list()
+        restriction_list, filters = self.load_restriction_list()
         exclude_system_databases = self.args.exclude_system_databases
+        bulk = self.args.bulk
+        jobs = self.args.jobs
+        incremental = self.args.incremental
+        use_async = self.args.use_async
+        sharded = self.args.sharded
+        shards = self.args.shards
+        writers = self.args.writers
+        metrics_file = self.args.metrics
+        prometheus_file = self.args.prometheus
+        cache = self.args.cache
+        offline = self.args.offline
+        history = self.args.history
+        archive = self.args.archive
+        archive_per = self.args.archive_per
+        dedup = self.args.dedup
+        skip_unchanged = self.args.skip_unchanged
+
+        if offline and not cache:
+            raise ValueError("--offline requires the catalog cache directory (--cache).")
+
+        if writers < 0:
+            raise ValueError("The number of writers cannot be negative.")
+
+        if shards < 1:
+            raise ValueError("The number of shards must be at least 1.")
+
+        if use_async and shards > 1:
+            raise ValueError("--async and --shards both extract the objects of a database concurrently, use one of them.")
+
+        if cache and (use_async or incremental or shards > 1):
+            raise ValueError("The catalog cache records a full sync extraction, it cannot be combined with --async, --incremental or --shards.")
+
+        if skip_unchanged and cache:
+            raise ValueError("--skip-unchanged queries the server before the extraction, it cannot be combined with the catalog cache (--cache).")
+
+        if dedup and sharded:
+            raise ValueError("--dedup and --sharded are two layouts of the schema snapshot, use one of them.")
+
+        if dedup and archive and archive_per == 'database':
+            raise ValueError("The objects of --dedup are shared by the databases, archive them per run (--archive-per run).")
+
+        if not host and not offline:
+            raise ValueError("Missing host: --host is required unless --offline.")
+
+        if offline:
+            host = host or "offline"
 
         #Check if ODBC Driver 18 for SQL Server
-        if db_type == 'mssql':
-            driver = pyodbc.drivers()
-            if "ODBC Driver 18 for SQL Server" not in driver:
-                raise ValueError("No ODBC SQL Server driver found. Please install 'ODBC Driver 18 for SQL Server'.")
+        if db_type == 'mssql' and not offline:
+            # Imported only for SQL Server, loading the ODBC driver manager is slow
+            import pyodbc
 
-        if db_type == 'mssql':
+            driver = pyodbc.drivers()
             if "ODBC Driver 18 for SQL Server" not in driver:
                 raise ValueError("No ODBC SQL Server driver found. Please install 'ODBC Driver 18 for SQL Server'.")
 
@@ -72,7 +162,7 @@ class input_listener:
 
     # Fallback logic for Windows Auth if user/pass not provided
         if not user and not password:
-            if db_type == 'mssql':
+            if db_type == 'mssql' or offline:
                 use_windows_auth = True
             else:
                 raise ValueError("Missing credentials: user and password are required for non-MSSQL databases.")
@@ -82,6 +172,9 @@ class input_listener:
         if db_type not in SUPPORTED_SGBD:
             raise ValueError(f"Unsupported database type: {db_type}. Supported types are: {', '.join(SUPPORTED_SGBD)}")
 
+        if jobs < 1:
+            raise ValueError("The number of jobs must be at least 1.")
+
         if not port:
             port = DEFAULT_PORT.get(db_type)
 
@@ -103,6 +196,9 @@ class input_listener:
             if any(item in system_tables for item in restriction_list):
                 raise ValueError(f"The restriction list contains system tables: {', '.join(system_tables)}. Please remove them.")
 
+        # Imported once the arguments are valid: --help and argument errors do not load SQLAlchemy
+        from core import Core
+
         extractor = Core(
             db_type=db_type,
             host=host,
@@ -114,7 +210,24 @@ class input_listener:
             system_tables=system_tables,
             restriction_list=restriction_list,
             exclude_system_databases=exclude_system_databases,
-            use_windows_auth=use_windows_auth
+            use_windows_auth=use_windows_auth,
+            bulk=bulk,
+            jobs=jobs,
+            incremental=incremental,
+            use_async=use_async,
+            sharded=sharded,
+            shards=shards,
+            writers=writers,
+            metrics_file=metrics_file,
+            prometheus_file=prometheus_file,
+            cache=cache,
+            filters=filters,
+            offline=offline,
+            history=history,
+            archive=archive,
+            archive_per=archive_per,
+            dedup=dedup,
+            skip_unchanged=skip_unchanged
         )
 
         extractor.run()
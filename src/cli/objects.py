@@ -0,0 +1,38 @@
+import argparse
+import json
+import os
+import sys
+
+from handler.object_store import ObjectStore, STORE_DIRECTORY
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Inspect the object store of an output written with --dedup.")
+    parser.add_argument('--output', '-o', type=str, required=True, help="Output directory of the extraction")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    drift = subparsers.add_parser('drift', help="Objects that are not the same in every database")
+    drift.add_argument('--json', action='store_true', help="Print the variants as JSON")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    drift = ObjectStore(os.path.join(args.output, STORE_DIRECTORY)).drift(args.output)
+
+    if args.json:
+        print(json.dumps(drift, ensure_ascii=False, indent=4))
+    else:
+        for schema_type, objects in drift.items():
+            for name, variants in objects.items():
+                print(f"{schema_type}.{name}\t{len(variants)} variants")
+
+                for variant, databases in variants.items():
+                    print(f"  {variant}\t{', '.join(databases)}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
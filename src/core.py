@@ -1,15 +1,29 @@
+import hashlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from database.catalog_cache import CatalogCache
 from database.extractor.database_extractor import DatabaseExtractor
+from export.changelog_exporter import ChangelogExporter
 from export.documentation_exporter import DocumentationExporter
 from export.file_exporter import FileExporter
-from handler.file_handler import FileHandler
+from export.schema_pipeline import SchemaPipeline, StaleFilesSink, ChangelogSink, DocumentationSink
+from handler.archive_handler import ArchiveWriter, ARCHIVE_FORMATS
+from handler.file_handler import FileHandler, JsonStreamWriter
+from handler.history_store import HistoryStore
+from handler.object_store import ObjectStore, DedupSchemaHandler, STORE_DIRECTORY
+from handler.sharded_schema_handler import ShardedSchemaHandler
 from utils.logger import Logger
+from utils.metrics import Metrics
+from utils.object_filter import ObjectFilter
+from utils.progress import Progress
 from utils.schema_updater import SchemaUpdater
 
 
 class Core:
-    def __init__(self, db_type, host, port, user, password, output, databases=None, system_tables=None, restriction_list=None, exclude_system_databases=True, use_windows_auth=False):
+    def __init__(self, db_type, host, port, user, password, output, databases=None, system_tables=None, restriction_list=None, exclude_system_databases=True, use_windows_auth=False, bulk=False, jobs=1, incremental=False, use_async=False, sharded=False, metrics_file=None, prometheus_file=None, cache=None, offline=False, history=None, filters=None, shards=1, writers=0, archive=None, archive_per='run', dedup=False, skip_unchanged=False):
         self.db_type = db_type
         self.host = host
         self.port = port
@@ -19,22 +33,88 @@ class Core:
         self.databases = databases
         self.restriction_list = restriction_list if restriction_list else []
         self.use_windows_auth = use_windows_auth
+        self.bulk = bulk
+        self.jobs = jobs
+        self.incremental = incremental
+        self.use_async = use_async
+        self.sharded = sharded
+        self.shards = shards
+        self.writers = writers
+        # Archive format (tar.gz, zip) of the output, one archive per run or per database
+        self.archive = archive
+        self.archive_per = archive_per
+        self.archive_writer = None
+        # Objects shared by the databases (--dedup), each database only references them
+        self.store = ObjectStore(os.path.join(output, STORE_DIRECTORY)) if dedup else None
+        # Databases whose server checksum did not change since the previous run are not extracted
+        self.skip_unchanged = skip_unchanged
+        self.skipped_databases = 0
+        self.filters = filters or {}
+        self.metrics_file = metrics_file
+        self.prometheus_file = prometheus_file
+        self.cache = cache
+        self.offline = offline
+        self.history = history
+        self.history_store = None
+        self.history_run = None
+        self.file_stats = {'written': 0, 'skipped': 0, 'removed': 0}
+        self.file_stats_lock = threading.Lock()
+        # SQL files that could not be written in the background: (database, path, error)
+        self.file_errors = []
+        self.progress = None
 
         if exclude_system_databases and system_tables:
             self.restriction_list.extend(system_tables)
 
+        self.restricted_databases = set(self.restriction_list)
+        # Include / exclude rules: {'databases': {'include': [...], 'exclude': [...]}, 'objects': {...}}
+        filters = filters or {}
+        self.database_filter = ObjectFilter(**filters.get('databases', {}))
+        self.object_filter = ObjectFilter(**filters.get('objects', {}))
+
     def run(self):
-        file_exporter = FileExporter(self.outputDir)
+        metrics = Metrics() if self.metrics_file or self.prometheus_file else None
+        DatabaseExtractor.enable_metrics(metrics)
+        DatabaseExtractor.enable_catalog_cache(CatalogCache(self.cache, self.db_type, self.bulk, self.offline) if self.cache else None)
 
-        extractor = DatabaseExtractor(
-            db_type=self.db_type,
-            host=self.host,
-            port=int(self.port),
-            user=self.user,
-            password=self.password,
-            databases=self.databases,
-            use_windows_auth=self.use_windows_auth
-        )
+        if self.history:
+            self.history_store = HistoryStore(self.history)
+            self.history_run = self.history_store.start_run(self.host)
+
+        if self.archive and self.archive_per == 'run':
+            self.archive_writer = ArchiveWriter(os.path.join(self.outputDir, f"schemas{ARCHIVE_FORMATS[self.archive]}"), self.archive)
+
+        try:
+            self.__run()
+
+            if self.archive_writer:
+                if self.store:
+                    self.archive_writer.add_directory(self.store.directory, STORE_DIRECTORY)
+
+                count = self.archive_writer.close()
+                Logger.Info(f"Archive: {self.archive_writer.path} ({count} files).")
+                self.archive_writer = None
+        finally:
+            if self.archive_writer:
+                self.archive_writer.abort()
+                self.archive_writer = None
+
+            DatabaseExtractor.dispose_connections()
+            DatabaseExtractor.enable_metrics(None)
+            DatabaseExtractor.enable_catalog_cache(None)
+
+            if self.history_store:
+                self.history_store.close()
+                self.history_store = None
+
+            if metrics:
+                self.__save_metrics(metrics)
+
+    def __run(self):
+        file_exporter = FileExporter(self.outputDir, self.writers, store=self.store)
+        self.progress = Progress()
+
+        extractor = self.__create_extractor()
 
         Logger.Info("Connecting to database server and extracting list of databases...")
 
@@ -43,11 +123,29 @@ class Core:
         if not databases:
             raise ValueError("No databases found or unable to connect to the database server.")
 
+        self.progress.set_databases(len([db_name for db_name in databases if not self.__is_excluded(db_name)]))
+
+        try:
+            if self.jobs > 1:
+                self.__run_parallel(databases)
+            else:
+                self.__run_serial(extractor, file_exporter, databases)
+        finally:
+            file_exporter.close()
+            self.progress.close()
+
+        Logger.Info(f"SQL files: {self.file_stats['written']} written, {self.file_stats['skipped']} unchanged, {self.file_stats['removed']} removed" + (f", {len(self.file_errors)} failed." if self.file_errors else "."))
+
+        if self.skipped_databases:
+            Logger.Info(f"{self.skipped_databases} databases unchanged since the previous run, skipped.")
+
+        for db_name, path, error in self.file_errors:
+            Logger.Error(f"Could not write {db_name}/{path}: {error}")
+
+    def __run_serial(self, extractor, file_exporter, databases):
         # Each database
         for db_name in databases:
-            Logger.ProgressBar(databases.index(db_name), len(databases))
-
-            if db_name in self.restriction_list:
+            if self.__is_excluded(db_name):
                 # Skip databases in the restriction list
                 continue
 
@@ -57,30 +155,266 @@ class Core:
             file_exporter.change_base_dir(db_output_dir)
             extractor.database = db_name
 
-            schema = extractor.extract_schema(file_exporter=file_exporter, database=db_name)
+            self.__process(extractor, file_exporter, db_name, db_output_dir)
 
-            if not schema:
-                continue
+    def __run_parallel(self, databases):
+        """
+        Extract the databases concurrently. Each worker has its own extractor, connection and file exporter,
+        the errors are gathered in the final report instead of stopping the run.
+        """
+        databases = [db_name for db_name in databases if not self.__is_excluded(db_name)]
+        errors = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {executor.submit(self.__extract_database, db_name): db_name for db_name in databases}
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[futures[future]] = str(e)
+
+        self.__report(databases, errors)
+
+    def __extract_database(self, db_name):
+        """
+        Extract, document and save one database with its own extractor and file exporter.
+        """
+        db_output_dir = os.path.join(self.outputDir, db_name)
+        os.makedirs(db_output_dir, exist_ok=True)
+
+        file_exporter = FileExporter(db_output_dir, self.writers, store=self.store)
+
+        try:
+            self.__process(self.__create_extractor(), file_exporter, db_name, db_output_dir)
+        finally:
+            file_exporter.close()
+
+    def __process(self, extractor, file_exporter, db_name, db_output_dir):
+        """
+        Extract a database and feed each object to the sinks as it is extracted: removal of the files of the dropped
+        objects, changelog since the previous snapshot, documentation, snapshot and history.
+        """
+        self.progress.start_database()
+
+        try:
+            checksum_path = os.path.join(db_output_dir, f"{db_name}_checksum.json")
+            checksum = self.__checksum(extractor, db_name)
+
+            if checksum is None and os.path.exists(checksum_path):
+                # Saved by a previous run, it would no longer match the files
+                os.remove(checksum_path)
+
+            if checksum and checksum == (FileHandler(checksum_path).load() or {}).get('checksum'):
+                # Same schema on the server: the files of the previous run are kept
+                with self.file_stats_lock:
+                    self.skipped_databases += 1
+
+                self.__archive_database(db_name, db_output_dir)
+                return
+
+            previous_schema = self.__snapshot_handler(db_name, db_output_dir).load()
+            sinks = self.__sinks(file_exporter, db_name, db_output_dir, previous_schema)
+
+            # The sinks are closed once the SQL files queued are written (changed files, stale files)
+            results = SchemaPipeline(sinks).run(
+                self.__extract(extractor, file_exporter, db_name, db_output_dir, previous_schema),
+                before_close=file_exporter.flush
+            )
+
+            if self.incremental and extractor.manifest:
+                FileHandler(os.path.join(db_output_dir, f"{db_name}_manifest.json")).save(extractor.manifest)
+
+            for sink, result in zip(sinks, results):
+                if isinstance(sink, DocumentationSink):
+                    self.__log_documentation(result, db_name)
+
+            if checksum:
+                FileHandler(checksum_path).save({'checksum': checksum})
 
-            self.__generate_documentation(schema, db_name, db_output_dir)
-            self.__save(schema, db_name, db_output_dir)
+            self.__archive_database(db_name, db_output_dir)
+        finally:
+            file_exporter.flush()
+            self.__collect_stats(file_exporter, db_name)
+            self.progress.finish_database()
 
+    def __checksum(self, extractor, db_name):
+        """
+        Checksum of the schema of a database on the server and of the options shaping the output (a database is
+        extracted again when they change).
+        :return: Checksum, None if the server cannot compute it or --skip-unchanged is not set
+        """
+        if not self.skip_unchanged:
+            return None
 
-    def __generate_documentation(self, schema, db_name, db_output_dir):
+        server_checksum = extractor.checksum(db_name)
+
+        if server_checksum is None:
+            return None
+
+        options = json.dumps({'bulk': self.bulk, 'sharded': self.sharded, 'dedup': self.store is not None, 'filters': self.filters}, sort_keys=True)
+
+        return hashlib.sha256(f"{server_checksum}|{options}".encode('utf-8')).hexdigest()
+
+    def __extract(self, extractor, file_exporter, db_name, db_output_dir, previous_schema=None):
+        """
+        Stream the schema of a database. In incremental mode, only the objects changed since the previous
+        snapshot are extracted.
+        """
+        if not self.incremental:
+            return extractor.stream_schema(file_exporter=file_exporter, database=db_name)
+
+        manifest_handler = FileHandler(os.path.join(db_output_dir, f"{db_name}_manifest.json"))
+        previous = {
+            'schema': previous_schema,
+            'manifest': manifest_handler.load()
+        }
+
+        return extractor.stream_schema(file_exporter=file_exporter, database=db_name, previous=previous)
+
+    def __sinks(self, file_exporter, db_name, db_output_dir, previous_schema):
+        """
+        Consumers of the extracted objects, in order: the changelog reads the previous version of an object
+        before the snapshot replaces it.
+        """
+        sinks = [StaleFilesSink(file_exporter)]
+
+        if previous_schema:
+            sinks.append(ChangelogSink(
+                previous_schema,
+                file_exporter.changed_files,
+                ChangelogExporter(
+                    os.path.join(db_output_dir, f"{db_name}_changelog.json"),
+                    os.path.join(db_output_dir, f"{db_name}_changelog.md")
+                ),
+                db_name
+            ))
+
+        documentation_sink = self.__documentation_sink(db_output_dir)
+
+        if documentation_sink:
+            sinks.append(documentation_sink)
+
+        sinks.append(self.__snapshot_writer(db_name, db_output_dir))
+
+        if self.history_store:
+            sinks.append(self.history_store.recorder(self.history_run, db_name, db_output_dir, file_exporter.read_sql))
+
+        return sinks
+
+    def __save_metrics(self, metrics):
+        """
+        Save the query and phase timings of the run as JSON and/or in the Prometheus text format.
+        """
+        if self.metrics_file:
+            metrics.save_json(self.metrics_file)
+
+        if self.prometheus_file:
+            metrics.save_prometheus(self.prometheus_file)
+
+        report = metrics.report()
+        query_count = sum(server['query_count'] for server in report['servers'].values())
+        query_time = sum(server['total'] for server in report['servers'].values())
+        Logger.Info(f"Queries: {query_count} in {query_time:.2f}s, run: {report['duration']:.2f}s.")
+
+    def __is_excluded(self, db_name):
+        return db_name in self.restricted_databases or not self.database_filter.allows(db_name)
+
+    def __collect_stats(self, file_exporter, db_name):
+        """
+        Add the file counters and write errors of an exporter to the run totals, then reset them (the serial run
+        reuses its exporter).
+        """
+        with self.file_stats_lock:
+            for key in self.file_stats:
+                self.file_stats[key] += file_exporter.stats[key]
+
+            self.file_errors.extend((db_name, path, error) for path, error in file_exporter.errors)
+
+        file_exporter.reset_stats()
+
+    def __create_extractor(self):
+        return DatabaseExtractor(
+            db_type=self.db_type,
+            host=self.host,
+            port=int(self.port),
+            user=self.user,
+            password=self.password,
+            databases=self.databases,
+            use_windows_auth=self.use_windows_auth,
+            bulk=self.bulk,
+            pool_size=max(self.jobs * self.shards, 5),
+            use_async=self.use_async,
+            progress=self.progress,
+            object_filter=self.object_filter,
+            shards=self.shards
+        )
+
+    def __report(self, databases, errors):
+        Logger.Info(f"{len(databases) - len(errors)}/{len(databases)} databases extracted.")
+
+        for db_name, error in errors.items():
+            Logger.Error(f"Could not extract {db_name}: {error}")
+
+    def __documentation_sink(self, db_output_dir):
         try:
-            doc_manager = DocumentationExporter(os.path.join(db_output_dir, f"Documentation.json"))
+            return DocumentationSink(DocumentationExporter(os.path.join(db_output_dir, f"Documentation.json")))
 
         except ValueError:
             # Invalid JSON file, let the user fix it, we continue with the extraction
+            return None
+
+    def __log_documentation(self, report, db_name):
+        added = sum(len(changes['added']) for changes in report.values())
+        removed = sum(len(changes['removed']) for changes in report.values())
+        columns_added = sum(len(columns) for changes in report.values() for columns in changes['columns_added'].values())
+        columns_removed = sum(len(columns) for changes in report.values() for columns in changes['columns_removed'].values())
+
+        if added or removed or columns_added or columns_removed:
+            Logger.Info(f"Documentation of {db_name}: {added} objects added, {removed} removed, {columns_added} columns added, {columns_removed} removed.")
+
+    def __snapshot_writer(self, db_name, db_output_dir):
+        """
+        Writer of the new snapshot, the objects are saved as they are extracted.
+        """
+        if self.sharded:
+            return ShardedSchemaHandler(os.path.join(db_output_dir, "schema")).writer()
+
+        if self.store:
+            return self.__snapshot_handler(db_name, db_output_dir).writer()
+
+        return JsonStreamWriter(os.path.join(db_output_dir, f"{db_name}_schema.json"))
+
+    def __archive_database(self, db_name, db_output_dir):
+        """
+        Add the output of a database to the archive of the run, or write its own archive.
+        """
+        if not self.archive:
+            return
+
+        if self.archive_per == 'run':
+            self.archive_writer.add_directory(db_output_dir, db_name)
             return
 
-        doc_manager.update_or_remove(schema, 'tables')
-        doc_manager.update_or_remove(schema, 'views')
-        doc_manager.update_or_remove(schema, 'procedures')
-        doc_manager.update_or_remove(schema, 'functions')
-        doc_manager.update_or_remove(schema, 'triggers')
-        doc_manager.save_documentation()
+        writer = ArchiveWriter(os.path.join(self.outputDir, f"{db_name}{ARCHIVE_FORMATS[self.archive]}"), self.archive)
+
+        try:
+            writer.add_directory(db_output_dir, db_name)
+        except BaseException:
+            writer.abort()
+            raise
+
+        writer.close()
+
+    def __snapshot_handler(self, db_name, db_output_dir):
+        """
+        Handler of the schema snapshot: one {db}_schema.json file, one file per object in sharded mode, or the
+        references to the object store in dedup mode.
+        """
+        if self.sharded:
+            return ShardedSchemaHandler(os.path.join(db_output_dir, "schema"))
+
+        if self.store:
+            return DedupSchemaHandler(os.path.join(db_output_dir, f"{db_name}_schema.refs.json"), self.store, db_name)
 
-    def __save(self, schema, db_name, db_output_dir):
-        serializer = FileHandler(os.path.join(db_output_dir, f"{db_name}_schema.json"))
-        serializer.save(schema)
+        return FileHandler(os.path.join(db_output_dir, f"{db_name}_schema.json"))
@@ -0,0 +1,104 @@
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+
+from database.replay import QueryCounter, Recording, RecordingConnection, replay_engine_factory
+
+CACHE_SUFFIX = '.json.gz'
+
+
+class CatalogCache:
+    """
+    Raw result sets of the catalog queries of each database, saved in {directory}/{database}.json.gz.
+    Online, every query of the extraction is recorded and the cache of a database is saved once it is extracted.
+    Offline, the extraction replays the cache of each database instead of connecting to the server.
+    """
+
+    def __init__(self, directory, db_type, bulk=False, offline=False):
+        """
+        :param directory: Directory of the cache files
+        :param db_type: Database type, checked against the cache files offline
+        :param bulk: Bulk extraction mode, checked against the cache files offline (the queries differ)
+        :param offline: Replay the cache instead of connecting to the server
+        """
+        self.directory = directory
+        self.db_type = db_type
+        self.bulk = bulk
+        self.offline = offline
+        # Queries issued before a database is selected (dialect initialization), saved in every cache file
+        self.server = Recording()
+        self.recordings = {}
+        self.lock = threading.Lock()
+
+    def create_engine(self, url, database=None, **kwargs):
+        """
+        Offline, create an engine replaying the cache of the database. Online, create an engine recording
+        the queries of its connections, see bind().
+        """
+        if self.offline:
+            recording = self.load(database)
+            return replay_engine_factory(recording, QueryCounter())(url, **kwargs)
+
+        engine = create_engine(url, **kwargs)
+
+        @event.listens_for(engine, 'do_connect')
+        def connect(dialect, connection_record, cargs, cparams):
+            return RecordingConnection(dialect.connect(*cargs, **cparams), self.server)
+
+        return engine
+
+    def bind(self, conn, database):
+        """
+        Record the next queries of a connection in the cache of a database (online).
+        """
+        if not self.offline:
+            conn.connection.dbapi_connection.recording = self.__recording(database) if database else self.server
+
+    def save(self, database):
+        """
+        Save the queries recorded for a database, with the queries issued before a database was selected.
+        """
+        with self.lock:
+            recording = self.recordings.pop(database, Recording())
+
+        with self.server.lock:
+            queries = {key: list(results) for key, results in self.server.queries.items()}
+
+        for key, results in recording.queries.items():
+            queries.setdefault(key, []).extend(results)
+
+        os.makedirs(self.directory, exist_ok=True)
+        Recording(queries).save(self.file_path(database), database=database, db_type=self.db_type, bulk=self.bulk)
+
+    def load(self, database):
+        file_path = self.file_path(database)
+
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"No catalog cache for {database}: {file_path}")
+
+        content = Recording.load_file(file_path)
+
+        if content.get('db_type') != self.db_type:
+            raise ValueError(f"The catalog cache of {database} was recorded on {content.get('db_type')}, not {self.db_type}.")
+
+        if content.get('bulk') != self.bulk:
+            raise ValueError(f"The catalog cache of {database} was recorded {'with' if content.get('bulk') else 'without'} --bulk, use the same mode offline.")
+
+        return Recording(content['queries'])
+
+    def databases(self):
+        """
+        :return: Databases with a cache file, in alphabetical order
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        return sorted(name[:-len(CACHE_SUFFIX)] for name in os.listdir(self.directory) if name.endswith(CACHE_SUFFIX))
+
+    def file_path(self, database):
+        return os.path.join(self.directory, database.replace('/', '_').replace('\\', '_') + CACHE_SUFFIX)
+
+    def __recording(self, database):
+        with self.lock:
+            return self.recordings.setdefault(database, Recording())
@@ -1,12 +1,22 @@
+import threading
 import urllib
+from contextlib import contextmanager, asynccontextmanager
 
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
-# noinspection PyUnresolvedReferences
-import pyodbc
 
 class DatabaseConnection:
-    def __init__(self, db_type, host, port, user=None, password=None, database=None, use_windows_auth=False):
+    # One engine (and connection pool) per server, shared by every connection of the run
+    engines = {}
+    engines_lock = threading.Lock()
+    # Metrics of the run (utils.metrics.Metrics), the queries of the engines created while it is set are timed
+    metrics = None
+    # Catalog cache of the run (database.catalog_cache.CatalogCache): queries recorded, or replayed offline
+    catalog_cache = None
+    # Replacement of sqlalchemy.create_engine (benchmark replays and recordings), None for a live server
+    engine_factory = None
+
+    def __init__(self, db_type, host, port, user=None, password=None, database=None, use_windows_auth=False, pool_size=5):
         self.db_type = db_type
         self.host = host
         self.port = port
@@ -14,18 +24,71 @@ class DatabaseConnection:
         self.password = password
         self.database = database
         self.use_windows_auth = use_windows_auth
+        self.pool_size = pool_size
         self.engine = None
 
 
     def create_engine(self, database_name=None) -> Engine:
-        database_name = database_name or self.database
+        """
+        Return the engine of the server, created on first use and reused afterwards.
+        :param database_name: Database selected (with USE) by the connections opened with connect()
+        :return: Engine of the server
+        """
+        self.database = database_name or self.database
+        url = self.__server_url()
+        cache = DatabaseConnection.catalog_cache
+        # Offline, each database is replayed by its own engine
+        key = f"{url}#{self.database}" if cache is not None and cache.offline else url
+
+        with DatabaseConnection.engines_lock:
+            if key not in DatabaseConnection.engines:
+                if cache is not None:
+                    DatabaseConnection.engines[key] = cache.create_engine(url, self.database, pool_size=self.pool_size, max_overflow=0)
+                else:
+                    factory = DatabaseConnection.engine_factory or create_engine
+                    DatabaseConnection.engines[key] = factory(url, pool_size=self.pool_size, max_overflow=0)
+
+                if DatabaseConnection.metrics is not None:
+                    DatabaseConnection.metrics.attach(DatabaseConnection.engines[key], self.server)
+
+            self.engine = DatabaseConnection.engines[key]
+
+        return self.engine
+
+    @property
+    def server(self):
+        """
+        Label of the server in the metrics.
+        """
+        return f"{self.host}:{self.port}"
+
+    def create_async_engine(self, pool_size) -> 'AsyncEngine':
+        """
+        Create an asyncio engine for the server (aiomysql or aioodbc driver).
+        Async connections are bound to their event loop: the engine is not shared, dispose it after the extraction.
+        :param pool_size: Number of connections of the pool
+        :return: Async engine of the server
+        """
+        # Imported for --async only, sqlalchemy.ext.asyncio loads the ORM
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        engine = create_async_engine(self.__server_url(asynchronous=True), pool_size=pool_size, max_overflow=0)
+
+        if DatabaseConnection.metrics is not None:
+            DatabaseConnection.metrics.attach(engine.sync_engine, self.server)
 
+        return engine
+
+    def __server_url(self, asynchronous=False):
+        """
+        Build the URL of the server, without database: it is selected with USE on each connection.
+        """
         if self.db_type in ('mysql', 'mariadb'):
-            url = f"mysql+pymysql://{self.user}:{self.password}@{self.host}:{self.port}/{database_name or ''}"
+            driver = "aiomysql" if asynchronous else "pymysql"
+            return f"mysql+{driver}://{self.user}:{self.password}@{self.host}:{self.port}/"
 
         elif self.db_type == 'mssql':
-            databaseSetting = f"Database={database_name};" if database_name else ""
-            base_conn_str = f"Driver=ODBC Driver 18 for SQL Server;Server={self.host},{self.port};{databaseSetting}"
+            base_conn_str = f"Driver=ODBC Driver 18 for SQL Server;Server={self.host},{self.port};"
             auth_part = ""
 
             if not self.use_windows_auth:
@@ -37,10 +100,50 @@ class DatabaseConnection:
                 base_conn_str + auth_part + "TrustServerCertificate=yes;"
             )
 
-            url = "mssql+pyodbc:///?odbc_connect=%s" % params
+            driver = "aioodbc" if asynchronous else "pyodbc"
+            return f"mssql+{driver}:///?odbc_connect={params}"
 
         else:
             raise ValueError(f"Unsupported db_type: {self.db_type}")
 
-        self.engine = create_engine(url)
-        return self.engine
+    @contextmanager
+    def connect(self):
+        """
+        Check out a connection from the pool of the server and select the current database on it.
+        """
+        with self.engine.connect() as conn:
+            if DatabaseConnection.catalog_cache is not None:
+                DatabaseConnection.catalog_cache.bind(conn, self.database)
+
+            if self.database:
+                conn.exec_driver_sql(f"USE {self.__quote_identifier(self.database)}")
+
+            yield conn
+
+    @asynccontextmanager
+    async def connect_async(self, engine):
+        """
+        Check out a connection from an async engine and select the current database on it.
+        """
+        async with engine.connect() as conn:
+            if self.database:
+                await conn.exec_driver_sql(f"USE {self.__quote_identifier(self.database)}")
+
+            yield conn
+
+    def __quote_identifier(self, name):
+        if self.db_type == 'mssql':
+            return "[" + name.replace("]", "]]") + "]"
+
+        return "`" + name.replace("`", "``") + "`"
+
+    @staticmethod
+    def dispose_all():
+        """
+        Close every pooled connection and forget the engines.
+        """
+        with DatabaseConnection.engines_lock:
+            for engine in DatabaseConnection.engines.values():
+                engine.dispose()
+
+            DatabaseConnection.engines.clear()
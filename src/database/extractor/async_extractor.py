@@ -0,0 +1,76 @@
+import asyncio
+
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
+
+
+class AsyncSchemaExtractor:
+    """
+    Run a schema extractor on an asyncio engine. The objects are listed on one connection, then extracted
+    concurrently on a small pool of connections. The per-object extraction is the one of the wrapped extractor,
+    so the schema and the SQL files are the same as with the sync extraction.
+    """
+
+    def __init__(self, extractor, concurrency=4):
+        self.extractor = extractor
+        self.connection = extractor.connection
+        self.concurrency = concurrency
+
+    @property
+    def manifest(self):
+        return self.extractor.manifest
+
+    def list_databases(self):
+        return self.extractor.list_databases()
+
+    def stream_schema(self, file_exporter=None, database=None, previous=None):
+        """
+        Events of the extracted schema, see SchemaExtractorAdapter.stream_schema. The objects are extracted
+        concurrently, so the schema is extracted as a whole before the events are yielded.
+        """
+        yield from SchemaExtractorAdapter.events(self.extract_schema(file_exporter, database, previous))
+
+    def extract_schema(self, file_exporter=None, database=None, previous=None) -> dict:
+        """
+        Extract the schema of the database, see SchemaExtractorAdapter.extract_schema.
+        """
+        return asyncio.run(self.__extract_schema(file_exporter, database, previous))
+
+    async def __extract_schema(self, file_exporter, database, previous):
+        engine = self.connection.create_async_engine(self.concurrency)
+
+        try:
+            # List the objects, the per-object extractions are collected instead of run
+            tasks = []
+            self.extractor.deferred = tasks
+
+            try:
+                async with self.connection.connect_async(engine) as conn:
+                    schema = await conn.run_sync(self.extractor.read_schema, file_exporter, database, previous)
+            finally:
+                self.extractor.deferred = None
+
+            # Each object is extracted in its own schema, merged afterwards
+            results = [{schema_type: {} for schema_type in schema} for _ in tasks]
+            pending = iter(range(len(tasks)))
+
+            async def worker():
+                async with self.connection.connect_async(engine) as worker_conn:
+                    for index in pending:
+                        await worker_conn.run_sync(tasks[index][2], results[index])
+
+            # The phases of read_schema only list the objects, their concurrent extraction is timed as a whole
+            phases = self.extractor.phase_timer(database)
+            phases.start('objects')
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(tasks)))))
+            phases.stop()
+        finally:
+            await engine.dispose()
+
+        # Merged in the listing order, so the keys are in the same order as with the sync extraction
+        for result in results:
+            for schema_type, entries in result.items():
+                # Sections that could not be listed stay in error
+                if not isinstance(schema[schema_type].get('error'), str):
+                    schema[schema_type].update(entries)
+
+        return schema
@@ -1,26 +1,88 @@
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
 from database.connection import DatabaseConnection
 from database.factory import DatabaseExtractorFactory
 
 class DatabaseExtractor:
-    def __init__(self, db_type, host, port, user=None, password=None, databases=None, use_windows_auth=False):
+    def __init__(self, db_type, host, port, user=None, password=None, databases=None, use_windows_auth=False, bulk=False, pool_size=5, use_async=False, progress=None, object_filter=None, shards=1):
         self.connection = DatabaseConnection(
-            db_type, host, port, user, password, None, use_windows_auth
+            db_type, host, port, user, password, None, use_windows_auth, pool_size
         )
         self.database = None
         self.db_type = db_type
         self.databases = databases
+        self.bulk = bulk
+        self.use_async = use_async
+        self.progress = progress
+        self.object_filter = object_filter
+        self.shards = shards
+        self.manifest = None
 
     def list_databases(self):
         if self.databases:
             return self.databases
 
+        cache = DatabaseConnection.catalog_cache
+
+        if cache is not None and cache.offline:
+            return cache.databases()
+
         self.connection.create_engine()
         extractor = DatabaseExtractorFactory.create_extractor(self.db_type, self.connection)
 
         return extractor.list_databases()
 
-    def extract_schema(self, database=None, file_exporter=None) -> dict:
+    def checksum(self, database):
+        """
+        Checksum of the schema of a database computed on the server, see SchemaExtractorAdapter.extract_checksum.
+        """
         self.connection.create_engine(database or None)
         extractor = DatabaseExtractorFactory.create_extractor(self.db_type, self.connection)
 
-        return extractor.extract_schema(file_exporter, database)
+        with self.connection.connect() as conn:
+            return extractor.extract_checksum(conn, database)
+
+    def extract_schema(self, database=None, file_exporter=None, previous=None) -> dict:
+        return SchemaExtractorAdapter.collect(self.stream_schema(database, file_exporter, previous))
+
+    def stream_schema(self, database=None, file_exporter=None, previous=None):
+        """
+        Extract the schema of a database as a stream of events, see SchemaExtractorAdapter.stream_schema.
+        """
+        self.connection.create_engine(database or None)
+        extractor = DatabaseExtractorFactory.create_extractor(self.db_type, self.connection, bulk=self.bulk, use_async=self.use_async, progress=self.progress, object_filter=self.object_filter, shards=self.shards)
+
+        yield from extractor.stream_schema(file_exporter, database, previous)
+        self.manifest = extractor.manifest
+
+        cache = DatabaseConnection.catalog_cache
+
+        if cache is not None and not cache.offline:
+            cache.save(database)
+
+    @staticmethod
+    def dispose_connections():
+        """
+        Close the connections of every server, at the end of the run.
+        """
+        DatabaseConnection.dispose_all()
+
+    @staticmethod
+    def enable_metrics(metrics):
+        """
+        Time the queries of the engines created from now on, None to stop.
+        """
+        DatabaseConnection.metrics = metrics
+
+    @staticmethod
+    def enable_catalog_cache(cache):
+        """
+        Record the queries of the run in a catalog cache, or replay it offline. None to stop.
+        """
+        DatabaseConnection.catalog_cache = cache
+
+    @staticmethod
+    def enable_engine_factory(factory):
+        """
+        Create the engines of the servers with this replacement of sqlalchemy.create_engine, None to stop.
+        """
+        DatabaseConnection.engine_factory = factory
@@ -1,152 +1,314 @@
+import hashlib
 import re
+from functools import partial
 
-from sqlalchemy import text, inspect
-from src.adapter.schema_extractor_adapter import SchemaExtractorAdapter
+from sqlalchemy import text, inspect, types
+from sqlalchemy.dialects.mssql.base import MSString, MSChar, MSNVarchar, MSNChar, MSText, MSNText, MSBinary, MSVarBinary
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
 from sqlalchemy.exc import DBAPIError
+from utils.logger import Logger
 
 
 class MSSQLSchemaExtractor(SchemaExtractorAdapter):
 
-    def extract_schema(self, file_exporter=None, database=None) -> dict:
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None) -> dict:
         """
         Extract the schema of the database including tables, views, procedures, functions, and triggers.
+        :param conn: Connection to the database
         :param file_exporter: File exporter to save the SQL files
         :param database: Name of the current database
+        :param previous: Previous snapshot (schema and manifest), only the changed objects are extracted (incremental mode)
         :return: JSON schema with the database structure
         """
         schema = {'tables': {}, 'views': {}, 'procedures': {}, 'functions': {}, 'triggers': {}}
+        self.previous = previous
+        self.manifest = None
+        catalog = None
+        definitions = None
+        phases = self.phase_timer(database)
+        phases.start('catalog')
+
+        if previous is not None:
+            try:
+                self.manifest = self.extract_manifest(conn, database)
+            except DBAPIError as e:
+                # Fallback to a full extraction
+                Logger.Warning(f"Could not read the modification markers of {database}, extracting every object: {str(e)}")
+
+        if self.bulk:
+            try:
+                catalog = self.__extract_catalog(conn)
+            except DBAPIError as e:
+                # Fallback to the per-object reflection
+                Logger.Warning(f"Could not read the catalog of {database} in bulk, falling back to per-object reflection: {str(e)}")
 
-        with self.connection.engine.connect() as conn:
-            # -------------------------------------------------------------
-            # TABLES
-            # -------------------------------------------------------------
-
-            tables = conn.execute(text("""
-                SELECT TABLE_NAME 
-                FROM INFORMATION_SCHEMA.TABLES 
-                WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_CATALOG = :db
-            """), {"db": database}).fetchall()
-
-            for table in tables:
-                try:
-                    schema['tables'][table[0]] = self.__extract_table_details(conn, table[0])
-
-                    create_table_script = self.__generate_create_table_script(
-                        conn,
-                        table[0],
-                        schema['tables'][table[0]]['columns'],
-                        schema['tables'][table[0]]['primary_key'],
-                        schema['tables'][table[0]]['foreign_keys'],
-                        schema['tables'][table[0]]['checks']
-                    )
-
-                    if file_exporter:
-                        file_exporter.save_sql('tables', table[0], create_table_script)
-                except DBAPIError:
-                    schema['tables'][table[0]] = {'error': 'Insufficient privileges to access table'}
-                except:
+            try:
+                definitions = self.__extract_module_definitions(conn)
+            except DBAPIError as e:
+                # Fallback to OBJECT_DEFINITION per object
+                Logger.Warning(f"Could not read the module definitions of {database} in bulk, falling back to per-object reads: {str(e)}")
+
+        # -------------------------------------------------------------
+        # TABLES
+        # -------------------------------------------------------------
+        phases.start('tables')
+
+        condition, parameters = self.filter_condition("TABLE_NAME", "TABLE_SCHEMA", escape='\\')
+        tables = conn.execute(text(self.__where("""
+            SELECT TABLE_NAME, TABLE_SCHEMA
+            FROM INFORMATION_SCHEMA.TABLES 
+            WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_CATALOG = :db
+        """, condition)), {"db": database, **parameters}).fetchall()
+
+        for table in tables:
+            if not self.allows(table[0], table[1]):
+                continue
+
+            self.submit(conn, schema, partial(self.__read_table, name=table[0], file_exporter=file_exporter, catalog=catalog), schema_type='tables', name=table[0])
+
+
+        # -------------------------------------------------------------
+        # VIEWS
+        # -------------------------------------------------------------
+        phases.start('views')
+
+        try:
+            condition, parameters = self.filter_condition("TABLE_NAME", "TABLE_SCHEMA", escape='\\')
+            views = conn.execute(text(self.__where("""
+                SELECT TABLE_NAME, TABLE_SCHEMA
+                FROM INFORMATION_SCHEMA.VIEWS 
+                WHERE TABLE_CATALOG = :db
+            """, condition)), {"db": database, **parameters}).fetchall()
+
+            for view in views:
+                if not self.allows(view[0], view[1]):
                     continue
 
+                self.submit(conn, schema, partial(self.__read_view, name=view[0], file_exporter=file_exporter, catalog=catalog, definitions=definitions), schema_type='views', name=view[0])
 
-            # -------------------------------------------------------------
-            # VIEWS
-            # -------------------------------------------------------------
+        except DBAPIError:
+            schema['views'] = {'error': 'Insufficient privileges to access views'}
 
-            try:
-                views = conn.execute(text("""
-                    SELECT TABLE_NAME 
-                    FROM INFORMATION_SCHEMA.VIEWS 
-                    WHERE TABLE_CATALOG = :db
-                """), {"db": database}).fetchall()
 
-                for view in views:
-                    name = view[0]
-                    try:
-                        schema['views'][name] = self.__extract_view_details(conn, name)
+        # -------------------------------------------------------------
+        # PROCEDURES
+        # -------------------------------------------------------------
+        phases.start('procedures')
 
-                        if file_exporter:
-                            ddl = self.__extract_ddl_details(conn, file_exporter, "VIEW", name)
-                            schema["views"][name].update(ddl)
-                    except DBAPIError:
-                        schema['views'][name] = {'error': 'Insufficient privileges to access view'}
-                    except:
-                        continue
+        try:
+            condition, parameters = self.filter_condition("SPECIFIC_NAME", "SPECIFIC_SCHEMA", escape='\\')
+            procedures = conn.execute(text(self.__where("""
+                SELECT SPECIFIC_NAME, SPECIFIC_SCHEMA
+                FROM INFORMATION_SCHEMA.ROUTINES 
+                WHERE ROUTINE_TYPE = 'PROCEDURE' AND ROUTINE_CATALOG = :db
+            """, condition)), {"db": database, **parameters}).fetchall()
 
-            except DBAPIError:
-                schema['views'] = {'error': 'Insufficient privileges to access views'}
+            for proc in procedures:
+                if not self.allows(proc[0], proc[1]):
+                    continue
 
+                self.submit(conn, schema, partial(self.__read_module, schema_type='procedures', object_type="PROCEDURE", name=proc[0], file_exporter=file_exporter, definitions=definitions), schema_type='procedures', name=proc[0])
 
-            # -------------------------------------------------------------
-            # PROCEDURES
-            # -------------------------------------------------------------
+        except DBAPIError:
+            schema["procedures"] = {'error': 'Insufficient privileges to list procedures'}
 
-            try:
-                procedures = conn.execute(text("""
-                    SELECT SPECIFIC_NAME 
-                    FROM INFORMATION_SCHEMA.ROUTINES 
-                    WHERE ROUTINE_TYPE = 'PROCEDURE' AND ROUTINE_CATALOG = :db
-                """), {"db": database}).fetchall()
-
-                for proc in procedures:
-                    name = proc[0]
-                    try:
-                        schema["procedures"][name] = self.__extract_ddl_details(conn, file_exporter, "PROCEDURE", name)
-                    except DBAPIError:
-                        schema["procedures"][name] = {'error': 'Insufficient privileges'}
-                    except:
-                        continue
-
-            except DBAPIError:
-                schema["procedures"] = {'error': 'Insufficient privileges to list procedures'}
-
-            # -------------------------------------------------------------
-            # FUNCTIONS
-            # -------------------------------------------------------------
+        # -------------------------------------------------------------
+        # FUNCTIONS
+        # -------------------------------------------------------------
+        phases.start('functions')
 
-            try:
-                functions = conn.execute(text("""
-                    SELECT SPECIFIC_NAME 
-                    FROM INFORMATION_SCHEMA.ROUTINES 
-                    WHERE ROUTINE_TYPE = 'FUNCTION' AND ROUTINE_CATALOG = :db
-                """), {"db": database}).fetchall()
-
-                for func in functions:
-                    name = func[0]
-                    try:
-                        schema["functions"][name] = self.__extract_ddl_details(conn, file_exporter, "FUNCTION", name)
-                    except DBAPIError:
-                        schema["functions"][name] = {'error': 'Insufficient privileges'}
-                    except:
-                        continue
-
-            except DBAPIError:
-                schema["functions"] = {'error': 'Insufficient privileges to list functions'}
-
-            # -------------------------------------------------------------
-            # TRIGGERS
-            # -------------------------------------------------------------
+        try:
+            condition, parameters = self.filter_condition("SPECIFIC_NAME", "SPECIFIC_SCHEMA", escape='\\')
+            functions = conn.execute(text(self.__where("""
+                SELECT SPECIFIC_NAME, SPECIFIC_SCHEMA
+                FROM INFORMATION_SCHEMA.ROUTINES 
+                WHERE ROUTINE_TYPE = 'FUNCTION' AND ROUTINE_CATALOG = :db
+            """, condition)), {"db": database, **parameters}).fetchall()
 
-            try:
-                triggers = conn.execute(text("""
-                    SELECT name, parent_id, type_desc 
-                    FROM sys.triggers 
-                    WHERE parent_id != 0
-                """)).fetchall()
-
-                for trigger in triggers:
-                    name = trigger[0]
-                    try:
-                        schema["triggers"][name] = self.__extract_ddl_details(conn, file_exporter, "TRIGGER", name)
-                    except DBAPIError:
-                        schema["triggers"][name] = {'error': 'Insufficient privileges'}
-                    except:
-                        continue
-
-            except DBAPIError:
-                schema["triggers"] = {'error': 'Insufficient privileges to list triggers'}
+            for func in functions:
+                if not self.allows(func[0], func[1]):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_module, schema_type='functions', object_type="FUNCTION", name=func[0], file_exporter=file_exporter, definitions=definitions), schema_type='functions', name=func[0])
+
+        except DBAPIError:
+            schema["functions"] = {'error': 'Insufficient privileges to list functions'}
+
+        # -------------------------------------------------------------
+        # TRIGGERS
+        # -------------------------------------------------------------
+        phases.start('triggers')
+
+        try:
+            condition, parameters = self.filter_condition("name", "OBJECT_SCHEMA_NAME(object_id)", escape='\\')
+            triggers = conn.execute(text(self.__where("""
+                SELECT name, OBJECT_SCHEMA_NAME(object_id) AS schema_name, parent_id, type_desc
+                FROM sys.triggers 
+                WHERE parent_id != 0
+            """, condition)), parameters).fetchall()
+
+            for trigger in triggers:
+                if not self.allows(trigger[0], trigger[1]):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_module, schema_type='triggers', object_type="TRIGGER", name=trigger[0], file_exporter=file_exporter, definitions=definitions), schema_type='triggers', name=trigger[0])
 
+        except DBAPIError:
+            schema["triggers"] = {'error': 'Insufficient privileges to list triggers'}
+
+        phases.stop()
         return schema
 
+    @staticmethod
+    def __where(query, condition):
+        """
+        Add the condition of the include / exclude rules to a listing query.
+        """
+        return f"{query.rstrip()} AND {condition}" if condition else query
+
+    def __read_table(self, conn, schema, name, file_exporter, catalog):
+        """
+        Extract one table into the schema and save its CREATE TABLE script.
+        """
+        if self.is_unchanged('tables', name):
+            schema['tables'][name] = self.previous_entry('tables', name)
+            return
+
+        try:
+            indexes = None
+
+            if catalog and name in catalog['tables']:
+                schema['tables'][name] = catalog['tables'][name]
+                indexes = catalog['script_indexes'].get(name, [])
+            else:
+                schema['tables'][name] = self.__extract_table_details(conn, name)
+
+            create_table_script = self.__generate_create_table_script(
+                conn,
+                name,
+                schema['tables'][name]['columns'],
+                schema['tables'][name]['primary_key'],
+                schema['tables'][name]['foreign_keys'],
+                schema['tables'][name]['checks'],
+                indexes
+            )
+
+            if file_exporter:
+                file_exporter.save_sql('tables', name, create_table_script)
+        except DBAPIError:
+            schema['tables'][name] = {'error': 'Insufficient privileges to access table'}
+        except Exception as e:
+            # Kept in the schema: the object is not taken for dropped (its SQL file and documentation are kept)
+            schema['tables'][name] = {'error': f'Could not read table: {str(e)}'}
+
+    def __read_view(self, conn, schema, name, file_exporter, catalog, definitions):
+        """
+        Extract one view into the schema and save its definition.
+        """
+        if self.is_unchanged('views', name):
+            schema['views'][name] = self.previous_entry('views', name)
+            return
+
+        try:
+            if catalog and name in catalog['views']:
+                schema['views'][name] = catalog['views'][name]
+            else:
+                schema['views'][name] = self.__extract_view_details(conn, name)
+
+            if file_exporter:
+                ddl = self.__extract_ddl_details(conn, file_exporter, "VIEW", name, definitions)
+                schema["views"][name].update(ddl)
+        except DBAPIError:
+            schema['views'][name] = {'error': 'Insufficient privileges to access view'}
+        except Exception as e:
+            schema['views'][name] = {'error': f'Could not read view: {str(e)}'}
+
+    def __read_module(self, conn, schema, schema_type, object_type, name, file_exporter, definitions):
+        """
+        Extract one procedure, function or trigger into the schema and save its definition.
+        """
+        if self.is_unchanged(schema_type, name):
+            schema[schema_type][name] = self.previous_entry(schema_type, name)
+            return
+
+        try:
+            schema[schema_type][name] = self.__extract_ddl_details(conn, file_exporter, object_type, name, definitions)
+        except DBAPIError:
+            schema[schema_type][name] = {'error': 'Insufficient privileges'}
+        except Exception as e:
+            schema[schema_type][name] = {'error': f'Could not read {object_type.lower()}: {str(e)}'}
+
+    def extract_manifest(self, conn, database=None):
+        """
+        Extract the modification markers of every object (incremental mode).
+        The marker of an object also covers its children (constraints, triggers...).
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :return: Markers indexed by schema type and object name
+        """
+        schema_types = {
+            'U': 'tables',
+            'V': 'views',
+            'P': 'procedures',
+            'FN': 'functions',
+            'IF': 'functions',
+            'TF': 'functions',
+            'TR': 'triggers'
+        }
+        manifest = {schema_type: {} for schema_type in set(schema_types.values())}
+
+        objects = conn.execute(text("""
+            SELECT 
+                o.name,
+                o.type,
+                o.modify_date,
+                (SELECT MAX(c.modify_date) FROM sys.objects c WHERE c.parent_object_id = o.object_id) AS children_modify_date
+            FROM 
+                sys.objects o
+            WHERE 
+                o.type IN ('U', 'V', 'P', 'FN', 'IF', 'TF', 'TR')
+        """)).mappings().fetchall()
+
+        for row in objects:
+            schema_type = schema_types[row['type'].strip()]
+            marker = f"{row['modify_date']}|{row['children_modify_date']}"
+
+            # Same name in several schemas: any change in one of them invalidates the entry
+            if row['name'] in manifest[schema_type]:
+                marker = "|".join(sorted([manifest[schema_type][row['name']], marker]))
+
+            manifest[schema_type][row['name']] = marker
+
+        return manifest
+
+    def extract_checksum(self, conn, database=None):
+        """
+        Checksum of the schema of the database: CHECKSUM_AGG of the objects (with their modification date),
+        columns, indexes, module definitions and extended properties (comments), in one query.
+        :return: Checksum, None if the catalog cannot be read
+        """
+        try:
+            row = conn.execute(text("""
+                SELECT
+                    (SELECT COUNT_BIG(*) FROM sys.objects WHERE is_ms_shipped = 0) AS objects,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(o.object_id, o.name, o.schema_id, o.parent_object_id, o.type, o.modify_date))
+                        FROM sys.objects o WHERE o.is_ms_shipped = 0) AS objects_checksum,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(c.object_id, c.column_id, c.name, c.system_type_id, c.user_type_id, c.max_length, c.precision, c.scale, c.is_nullable, c.is_identity, c.is_computed, c.collation_name, c.default_object_id))
+                        FROM sys.columns c INNER JOIN sys.objects o ON o.object_id = c.object_id WHERE o.is_ms_shipped = 0) AS columns_checksum,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(i.object_id, i.index_id, i.name, i.type, i.is_unique, i.is_primary_key, i.filter_definition))
+                        FROM sys.indexes i INNER JOIN sys.objects o ON o.object_id = i.object_id WHERE o.is_ms_shipped = 0) AS indexes_checksum,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(ic.object_id, ic.index_id, ic.index_column_id, ic.column_id, ic.key_ordinal, ic.is_descending_key, ic.is_included_column))
+                        FROM sys.index_columns ic INNER JOIN sys.objects o ON o.object_id = ic.object_id WHERE o.is_ms_shipped = 0) AS index_columns_checksum,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(m.object_id, m.definition))
+                        FROM sys.sql_modules m INNER JOIN sys.objects o ON o.object_id = m.object_id WHERE o.is_ms_shipped = 0) AS modules_checksum,
+                    (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(ep.class, ep.major_id, ep.minor_id, ep.name, CAST(ep.value AS NVARCHAR(4000))))
+                        FROM sys.extended_properties ep) AS properties_checksum
+            """)).fetchone()
+        except DBAPIError:
+            return None
+
+        return hashlib.sha256("|".join(str(value) for value in row).encode('utf-8')).hexdigest()
+
     def __extract_table_details(self, conn, table_name):
         """
         Extract the details of a table including columns, primary keys, indexes, foreign keys, and checks.
@@ -236,15 +398,313 @@ class MSSQLSchemaExtractor(SchemaExtractorAdapter):
 
         return schema
 
-    def __extract_ddl_details(self, conn, file_exporter, object_type, object_name):
+    def __extract_catalog(self, conn):
+        """
+        Extract the details of every table and view of the default schema in a few set-based queries (bulk mode).
+        The rows are grouped by object_id, the result is the same as __extract_table_details,
+        __extract_view_details and __get_table_indexes_mssql.
+        :param conn: Connection to the database
+        :return: JSON schema with the table details, the view details and the indexes of the CREATE scripts, indexed by object name
+        """
+        catalog = {'tables': {}, 'views': {}, 'script_indexes': {}}
+        names = {}
+
+        # Columns (same values as INFORMATION_SCHEMA.COLUMNS used by the Inspector)
+        condition, parameters = self.__catalog_filter("o.name", "SCHEMA_NAME(o.schema_id)")
+        columns = conn.execute(text(f"""
+            SELECT
+                o.object_id,
+                o.name AS object_name,
+                o.type AS object_type,
+                c.name AS column_name,
+                COALESCE(bt.name, ut.name) AS data_type,
+                c.is_nullable,
+                COLUMNPROPERTY(c.object_id, c.name, 'charmaxlen') AS character_maximum_length,
+                c.precision,
+                c.scale,
+                c.collation_name,
+                dc.definition AS column_default,
+                CAST(ep.value AS NVARCHAR(MAX)) AS comment
+            FROM 
+                sys.objects o
+            INNER JOIN 
+                sys.columns c ON c.object_id = o.object_id
+            INNER JOIN 
+                sys.types ut ON ut.user_type_id = c.user_type_id
+            LEFT JOIN 
+                sys.types bt ON bt.user_type_id = c.system_type_id
+            LEFT JOIN 
+                sys.default_constraints dc ON dc.object_id = c.default_object_id
+            LEFT JOIN 
+                sys.extended_properties ep ON ep.class = 1 AND ep.major_id = c.object_id AND ep.minor_id = c.column_id AND ep.name = 'MS_Description'
+            WHERE 
+                o.type IN ('U', 'V')
+                AND o.schema_id = SCHEMA_ID(){condition}
+            ORDER BY 
+                o.object_id, c.column_id
+        """), parameters).mappings().fetchall()
+
+        for row in columns:
+            object_id = row['object_id']
+
+            if object_id not in names:
+                names[object_id] = row['object_name']
+
+                if row['object_type'].strip() == 'V':
+                    catalog['views'][row['object_name']] = {'comment': '', 'columns': {}}
+                else:
+                    catalog['tables'][row['object_name']] = {
+                        'comment': '',
+                        'columns': {},
+                        'primary_key': [],
+                        'indexes': [],
+                        'foreign_keys': [],
+                        'checks': [],
+                    }
+
+            column_type = str(self.__column_type(conn.dialect, row))
+
+            if row['object_name'] in catalog['views']:
+                catalog['views'][row['object_name']]['columns'][row['column_name']] = {
+                    'type': column_type
+                }
+                continue
+
+            default_value = row['column_default']
+
+            catalog['tables'][row['object_name']]['columns'][row['column_name']] = {
+                'type': column_type,
+                'nullable': bool(row['is_nullable']),
+                'default': "NULL" if default_value and default_value == "(NULL)" else default_value,
+                'comment': row['comment'],
+                'is_virtual': False  # MSSQL does not have virtual columns
+            }
+
+        # Primary keys and indexes
+        condition, parameters = self.__catalog_filter("o.name", "SCHEMA_NAME(o.schema_id)")
+        indexes = conn.execute(text(f"""
+            SELECT 
+                i.object_id,
+                i.name AS index_name,
+                i.type AS index_type,
+                i.is_unique,
+                i.is_primary_key,
+                ic.index_column_id,
+                ic.is_included_column,
+                c.name AS column_name
+            FROM 
+                sys.objects o
+            INNER JOIN 
+                sys.indexes i ON i.object_id = o.object_id
+            INNER JOIN 
+                sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+            INNER JOIN 
+                sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+            WHERE 
+                o.type = 'U'
+                AND o.schema_id = SCHEMA_ID()
+                AND i.type <> 0{condition} -- exclude heaps
+            ORDER BY 
+                i.object_id, i.name, ic.key_ordinal
+        """), parameters).mappings().fetchall()
+
+        table_indexes = {}
+        for row in indexes:
+            table_name = names.get(row['object_id'])
+            if table_name not in catalog['tables']:
+                continue
+
+            if row['is_primary_key']:
+                catalog['tables'][table_name]['primary_key'].append(row['column_name'])
+                continue
+
+            # Same columns as the CREATE INDEX of __get_table_indexes_mssql
+            script_indexes = catalog['script_indexes'].setdefault(table_name, {})
+            if row['index_name'] not in script_indexes:
+                script_indexes[row['index_name']] = {
+                    "name": row['index_name'],
+                    "columns": [],
+                    "is_unique": row['is_unique']
+                }
+
+            script_indexes[row['index_name']]["columns"].append(row['column_name'])
+
+            # Same columns as the Inspector: clustered columnstore indexes list none,
+            # nonclustered columnstore indexes list all, others list their key columns
+            index = table_indexes.setdefault(table_name, {}).setdefault(row['index_name'], {
+                'name': row['index_name'],
+                'columns': []
+            })
+
+            if row['index_type'] == 5:
+                continue
+
+            if row['index_type'] == 6 or not row['is_included_column']:
+                index['columns'].append((row['index_column_id'], row['column_name']))
+
+        for table_name, table_index in table_indexes.items():
+            for index in table_index.values():
+                catalog['tables'][table_name]['indexes'].append({
+                    'name': index['name'],
+                    'columns': [column_name for _, column_name in sorted(index['columns'])]
+                })
+
+        for table_name, script_indexes in catalog['script_indexes'].items():
+            catalog['script_indexes'][table_name] = list(script_indexes.values())
+
+        # Foreign keys
+        condition, parameters = self.__catalog_filter("OBJECT_NAME(fk.parent_object_id)", "OBJECT_SCHEMA_NAME(fk.parent_object_id)")
+        foreign_keys = conn.execute(text(f"""
+            SELECT 
+                fk.parent_object_id AS object_id,
+                fk.name AS constraint_name,
+                pc.name AS column_name,
+                rt.name AS referred_table,
+                rc.name AS referred_column
+            FROM 
+                sys.foreign_keys fk
+            INNER JOIN 
+                sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+            INNER JOIN 
+                sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+            INNER JOIN 
+                sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+            INNER JOIN 
+                sys.objects rt ON rt.object_id = fkc.referenced_object_id
+            WHERE 
+                fk.schema_id = SCHEMA_ID(){condition}
+            ORDER BY 
+                fk.parent_object_id, fk.name, fkc.constraint_column_id
+        """), parameters).mappings().fetchall()
+
+        table_foreign_keys = {}
+        for row in foreign_keys:
+            table_name = names.get(row['object_id'])
+            if table_name not in catalog['tables']:
+                continue
+
+            fks = table_foreign_keys.setdefault(table_name, {})
+            if row['constraint_name'] not in fks:
+                fks[row['constraint_name']] = {
+                    'name': row['constraint_name'],
+                    'columns': [],
+                    'referred_table': row['referred_table'],
+                    'referred_columns': []
+                }
+                catalog['tables'][table_name]['foreign_keys'].append(fks[row['constraint_name']])
+
+            fks[row['constraint_name']]['columns'].append(row['column_name'])
+            fks[row['constraint_name']]['referred_columns'].append(row['referred_column'])
+
+        # Checks
+        condition, parameters = self.__catalog_filter("OBJECT_NAME(cc.parent_object_id)", "OBJECT_SCHEMA_NAME(cc.parent_object_id)")
+        checks = conn.execute(text(f"""
+            SELECT cc.parent_object_id AS object_id, cc.name AS constraint_name, cc.definition
+            FROM sys.check_constraints cc
+            WHERE cc.schema_id = SCHEMA_ID(){condition}
+            ORDER BY cc.parent_object_id, cc.object_id
+        """), parameters).mappings().fetchall()
+
+        for row in checks:
+            table_name = names.get(row['object_id'])
+            if table_name not in catalog['tables']:
+                continue
+
+            catalog['tables'][table_name]['checks'].append({
+                'name': row['constraint_name'],
+                'sqltext': row['definition']
+            })
+
+        return catalog
+
+    def __catalog_filter(self, name_column, schema_column):
+        """
+        Condition of the include / exclude rules for a catalog query of the bulk mode, so that the excluded
+        objects are not read either.
+        :return: Condition to append to the WHERE clause ("" if no rule can be translated) and the bind parameters
+        """
+        condition, parameters = self.filter_condition(name_column, schema_column, escape='\\')
+        return f" AND {condition}" if condition else "", parameters
+
+    def __column_type(self, dialect, row):
+        """
+        Build the SQLAlchemy type of a column the same way the MSSQL dialect reflects it.
+        """
+        column_type = dialect.ischema_names.get(row['data_type'], None)
+
+        if column_type is None:
+            return types.NULLTYPE
+
+        kwargs = {}
+        if column_type in (MSString, MSChar, MSNVarchar, MSNChar, MSText, MSNText, MSBinary, MSVarBinary, types.LargeBinary):
+            length = row['character_maximum_length']
+            kwargs['length'] = None if length == -1 else length
+
+            if row['collation_name']:
+                kwargs['collation'] = row['collation_name']
+
+        if issubclass(column_type, types.Numeric):
+            kwargs['precision'] = row['precision']
+
+            if not issubclass(column_type, types.Float):
+                kwargs['scale'] = row['scale']
+
+        return column_type(**kwargs)
+
+    def __extract_module_definitions(self, conn):
+        """
+        Extract the definition of every view, procedure, function and trigger in one query (bulk mode).
+        When the same name exists in several schemas, the default schema wins, as with OBJECT_ID.
+        :param conn: Connection to the database
+        :return: Definitions indexed by object type (VIEW, PROCEDURE, FUNCTION, TRIGGER) and object name
+        """
+        object_types = {
+            'V': 'VIEW',
+            'P': 'PROCEDURE',
+            'FN': 'FUNCTION',
+            'IF': 'FUNCTION',
+            'TF': 'FUNCTION',
+            'TR': 'TRIGGER'
+        }
+        definitions = {object_type: {} for object_type in set(object_types.values())}
+
+        condition, parameters = self.__catalog_filter("o.name", "s.name")
+        modules = conn.execute(text(f"""
+            SELECT 
+                o.name,
+                o.type,
+                m.definition
+            FROM 
+                sys.sql_modules m
+            INNER JOIN 
+                sys.objects o ON o.object_id = m.object_id
+            INNER JOIN 
+                sys.schemas s ON s.schema_id = o.schema_id
+            WHERE 
+                o.type IN ('V', 'P', 'FN', 'IF', 'TF', 'TR'){condition}
+            ORDER BY 
+                CASE WHEN s.schema_id = SCHEMA_ID() THEN 0 ELSE 1 END, s.name
+        """), parameters).mappings().fetchall()
+
+        for row in modules:
+            object_type = object_types[row['type'].strip()]
+            definitions[object_type].setdefault(row['name'], row['definition'])
+
+        return definitions
+
+    def __extract_ddl_details(self, conn, file_exporter, object_type, object_name, definitions=None):
         """
         Extract the DDL of a view, procedure, function or trigger.
+        The definition is read from the database when the bulk definitions are not given.
         """
         schema = {}
 
-        ddl = conn.execute(text(f"""
-            SELECT OBJECT_DEFINITION (OBJECT_ID(:name)) AS object_definition
-        """), {"name": object_name}).scalar()
+        if definitions is not None:
+            ddl = definitions[object_type].get(object_name)
+        else:
+            ddl = conn.execute(text(f"""
+                SELECT OBJECT_DEFINITION (OBJECT_ID(:name)) AS object_definition
+            """), {"name": object_name}).scalar()
 
         if ddl:
             ddl = ddl.replace("\r", "")
@@ -260,9 +720,10 @@ class MSSQLSchemaExtractor(SchemaExtractorAdapter):
         return schema
 
 
-    def __generate_create_table_script(self, conn, table_name, columns, primary_key, foreign_keys, checks):
+    def __generate_create_table_script(self, conn, table_name, columns, primary_key, foreign_keys, checks, indexes=None):
         """
         Generate the CREATE TABLE script for MSSQL.
+        The indexes are read from the database when they are not given (bulk mode gives them).
         """
         script = f"CREATE OR ALTER TABLE [{table_name}] (\n"
 
@@ -293,7 +754,10 @@ class MSSQLSchemaExtractor(SchemaExtractorAdapter):
         script += "\n);\n"
 
         # Ajouter les CREATE INDEX
-        for index in self.__get_table_indexes_mssql(conn, table_name):
+        if indexes is None:
+            indexes = self.__get_table_indexes_mssql(conn, table_name)
+
+        for index in indexes:
             cols = ', '.join(index['columns'])
             script += f"\nCREATE INDEX [{index['name']}] ON [{table_name}] ({cols});"
 
@@ -349,7 +813,7 @@ class MSSQLSchemaExtractor(SchemaExtractorAdapter):
         List only the databases the current user has access to.
         :return: List of accessible database names
         """
-        with self.connection.engine.connect() as conn:
+        with self.connection.connect() as conn:
             databases = conn.execute(text("""
                 SELECT name 
                 FROM sys.databases 
@@ -357,6 +821,6 @@ class MSSQLSchemaExtractor(SchemaExtractorAdapter):
             """)).fetchall()
             return [db[0] for db in databases]
 
-        with self.connection.engine.connect() as conn:
+        with self.connection.connect() as conn:
             databases = conn.execute(text("SELECT name FROM sys.databases")).fetchall()
             return [db[0] for db in databases]
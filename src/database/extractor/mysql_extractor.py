@@ -1,144 +1,340 @@
+import hashlib
+import re
 import sys
+from functools import partial
 
 from sqlalchemy import text, inspect
 from adapter.schema_extractor_adapter import SchemaExtractorAdapter
 from sqlalchemy.exc import DBAPIError
+from utils.logger import Logger
 
 
 class MySQLSchemaExtractor(SchemaExtractorAdapter):
 
-    def extract_schema(self, file_exporter=None, database=None) -> dict:
+    # Catalog rows covered by the checksum: table, column of the database name, columns of a row
+    CHECKSUM_SOURCES = [
+        ('TABLES', 'TABLE_SCHEMA', "TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_COLLATION, TABLE_COMMENT"),
+        ('COLUMNS', 'TABLE_SCHEMA', "TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, EXTRA, COLUMN_COMMENT, COLLATION_NAME, GENERATION_EXPRESSION"),
+        ('STATISTICS', 'TABLE_SCHEMA', "TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME, NON_UNIQUE, INDEX_TYPE, SUB_PART"),
+        ('KEY_COLUMN_USAGE', 'TABLE_SCHEMA', "CONSTRAINT_NAME, TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, REFERENCED_TABLE_SCHEMA, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME"),
+        ('REFERENTIAL_CONSTRAINTS', 'CONSTRAINT_SCHEMA', "CONSTRAINT_NAME, UPDATE_RULE, DELETE_RULE"),
+        ('CHECK_CONSTRAINTS', 'CONSTRAINT_SCHEMA', "CONSTRAINT_NAME, CHECK_CLAUSE"),
+        ('VIEWS', 'TABLE_SCHEMA', "TABLE_NAME, VIEW_DEFINITION, DEFINER, SECURITY_TYPE, CHECK_OPTION"),
+        ('ROUTINES', 'ROUTINE_SCHEMA', "ROUTINE_NAME, ROUTINE_TYPE, CREATED, LAST_ALTERED, DEFINER, SECURITY_TYPE, ROUTINE_DEFINITION"),
+        ('TRIGGERS', 'TRIGGER_SCHEMA', "TRIGGER_NAME, EVENT_MANIPULATION, EVENT_OBJECT_TABLE, ACTION_TIMING, ACTION_STATEMENT, DEFINER"),
+    ]
+    # Catalog tables covered by the checksum of each table in the manifest (incremental mode)
+    TABLE_CHECKSUM_SOURCES = ['TABLES', 'COLUMNS', 'STATISTICS', 'KEY_COLUMN_USAGE']
+    # Check constraints of each table: CHECK_CONSTRAINTS has no table name on MySQL, it is read from TABLE_CONSTRAINTS
+    # (MariaDB names the checks per table, a check is then counted in every table with a check of the same name)
+    TABLE_CHECKS_CHECKSUM = (
+        "SELECT tc.TABLE_NAME, MD5(CONCAT_WS('|', 'CHECK_CONSTRAINTS', cc.CONSTRAINT_NAME, cc.CHECK_CLAUSE)) AS ROW_HASH"
+        " FROM information_schema.CHECK_CONSTRAINTS cc"
+        " JOIN information_schema.TABLE_CONSTRAINTS tc ON tc.CONSTRAINT_SCHEMA = cc.CONSTRAINT_SCHEMA AND tc.CONSTRAINT_NAME = cc.CONSTRAINT_NAME"
+        " WHERE cc.CONSTRAINT_SCHEMA = :db AND tc.CONSTRAINT_TYPE = 'CHECK'"
+    )
+    # String literals, comments and quoted identifiers (with the dot of a qualifier) of a view definition
+    VIEW_TOKENS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|/\*.*?\*/|(?:--\s|#)[^\n]*|`(?:[^`]|``)*`\.?", re.S)
+
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None) -> dict:
         """
         Extract the schema of the database including tables, procedures, functions, and triggers.
+        :param conn: Connection to the database
         :param file_exporter: File exporter to save the SQL files
         :param database: Name of the current database
+        :param previous: Previous snapshot (schema and manifest), only the changed objects are extracted (incremental mode)
         :return: JSON schema with the database structure
         """
         schema = {'tables': {}, 'views': {}, 'procedures': {}, 'functions': {}, 'triggers': {}}
-
-        with self.connection.engine.connect() as conn:
-
-            # -------------------------------------------------------------
-            # TABLES
-            # -------------------------------------------------------------
+        self.previous = previous
+        self.manifest = None
+        catalog = None
+        definitions = None
+        phases = self.phase_timer(database)
+        phases.start('catalog')
+
+        if previous is not None:
             try:
-                tables = conn.execute(text("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")).fetchall()
-
-                for table in tables:
-                    try:
-                        schema['tables'][table[0]] = self.__extract_table_details(conn, table[0], database)
-
-                        create_table_script = self.__generate_create_table_script(
-                            table[0],
-                            schema['tables'][table[0]]['columns'],
-                            schema['tables'][table[0]]['primary_key'],
-                            schema['tables'][table[0]]['foreign_keys'],
-                            schema['tables'][table[0]]['checks']
-                        )
-
-                        if file_exporter:
-                            file_exporter.save_sql('tables', table[0], create_table_script)
-                    except DBAPIError:
-                        schema['tables'][table[0]] = {'error': 'Insufficient privileges to read table.'}
-                    except:
-                        continue
-
-            except Exception as e:
-                schema['tables'] = {'error': f'Could not read tables: {str(e)}'}
-
-
-            # -------------------------------------------------------------
-            # VIEWS
-            # -------------------------------------------------------------
+                self.manifest = self.extract_manifest(conn, database)
+            except DBAPIError as e:
+                # Fallback to a full extraction
+                Logger.Warning(f"Could not read the modification markers of {database}, extracting every object: {str(e)}")
+
+        if self.bulk:
             try:
-                views = conn.execute(text("SHOW FULL TABLES WHERE Table_type = 'VIEW'")).fetchall()
-                for view in views:
-                    name = view[0]
-                    try:
-                        schema["views"][name] = self.__extract_view_details(conn, name)
-                        if file_exporter:
-                            ddl = self.__extract_ddl_details(conn, file_exporter, "View", name)
-                            schema["views"][name].update(ddl)
-                    except DBAPIError:
-                        schema["views"][name] = {'error': 'Insufficient privileges to read view.'}
-                    except:
-                        continue
-            except Exception as e:
-                schema['views'] = {'error': f'Could not read views: {str(e)}'}
-
-
-            # -------------------------------------------------------------
-            # PROCEDURES
-            # -------------------------------------------------------------
+                catalog = self.__extract_catalog(conn, database)
+            except DBAPIError as e:
+                # Fallback to the per-object reflection
+                Logger.Warning(f"Could not read the catalog of {database} in bulk, falling back to per-object reflection: {str(e)}")
+
             try:
-                procedures = conn.execute(text("SHOW PROCEDURE STATUS WHERE Db = :db"), {"db": database}).mappings()
+                definitions = self.__extract_ddl_definitions(conn, database)
+            except DBAPIError as e:
+                # Fallback to SHOW CREATE per object
+                Logger.Warning(f"Could not read the routine and view definitions of {database} in bulk, falling back to SHOW CREATE: {str(e)}")
+
+        # -------------------------------------------------------------
+        # TABLES
+        # -------------------------------------------------------------
+        phases.start('tables')
+        try:
+            condition, parameters = self.filter_condition(self.__quote_identifier(f"Tables_in_{database}"), schema=database)
+            tables = conn.execute(text(self.__where("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'", condition)), parameters).fetchall()
+
+            for table in tables:
+                if not self.allows(table[0], database):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_table, name=table[0], database=database, file_exporter=file_exporter, catalog=catalog), schema_type='tables', name=table[0])
+
+        except Exception as e:
+            schema['tables'] = {'error': f'Could not read tables: {str(e)}'}
+
+
+        # -------------------------------------------------------------
+        # VIEWS
+        # -------------------------------------------------------------
+        phases.start('views')
+        try:
+            condition, parameters = self.filter_condition(self.__quote_identifier(f"Tables_in_{database}"), schema=database)
+            views = conn.execute(text(self.__where("SHOW FULL TABLES WHERE Table_type = 'VIEW'", condition)), parameters).fetchall()
+            for view in views:
+                if not self.allows(view[0], database):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_view, name=view[0], database=database, file_exporter=file_exporter, catalog=catalog, definitions=definitions), schema_type='views', name=view[0])
+        except Exception as e:
+            schema['views'] = {'error': f'Could not read views: {str(e)}'}
+
+
+        # -------------------------------------------------------------
+        # PROCEDURES
+        # -------------------------------------------------------------
+        phases.start('procedures')
+        try:
+            condition, parameters = self.filter_condition("Name", schema=database)
+            procedures = conn.execute(text(self.__where("SHOW PROCEDURE STATUS WHERE Db = :db", condition)), {"db": database, **parameters}).mappings()
+
+            for proc in procedures:
+                if not self.allows(proc['Name'], database):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_routine, schema_type='procedures', object_type="Procedure", name=proc['Name'], file_exporter=file_exporter, definitions=definitions), schema_type='procedures', name=proc['Name'])
+
+        except Exception:
+            schema["procedures"] = {'error': 'Insufficient privileges to read procedures.'}
+
+
+        # -------------------------------------------------------------
+        # FUNCTIONS
+        # -------------------------------------------------------------
+        phases.start('functions')
+        try:
+            condition, parameters = self.filter_condition("Name", schema=database)
+            functions = conn.execute(text(self.__where("SHOW FUNCTION STATUS WHERE Db = :db", condition)), {"db": database, **parameters}).mappings()
+
+            for func in functions:
+                if not self.allows(func['Name'], database):
+                    continue
+
+                self.submit(conn, schema, partial(self.__read_routine, schema_type='functions', object_type="Function", name=func['Name'], file_exporter=file_exporter, definitions=definitions), schema_type='functions', name=func['Name'])
+
+        except Exception:
+            schema["functions"] = {'error': 'Insufficient privileges to read functions.'}
+
+
+        # -------------------------------------------------------------
+        # TRIGGERS
+        # -------------------------------------------------------------
+        phases.start('triggers')
+        try:
+            condition, parameters = self.filter_condition("`Trigger`", schema=database)
+            triggers = conn.execute(text(f"SHOW TRIGGERS WHERE {condition}" if condition else "SHOW TRIGGERS"), parameters).mappings()
+            for trigger in triggers:
+                name = trigger['Trigger']
+
+                if not self.allows(name, database):
+                    continue
+
+                try:
+                    sql_content = trigger['Statement']
+
+                    schema['triggers'][name] = {
+                        'table': trigger['Table'],
+                        'timing': trigger['Timing'],
+                        'event': trigger['Event']
+                    }
+
+                    if file_exporter:
+                        sql_path = file_exporter.save_sql('triggers', name, sql_content)
+                        schema['triggers'][name]['definition_file'] = sql_path
+                    else:
+                        schema['triggers'][name]['definition'] = str(sql_content)
+                except DBAPIError:
+                    schema['triggers'][name] = {'error': 'Insufficient privileges to read trigger.'}
+                except Exception as e:
+                    schema['triggers'][name] = {'error': f'Could not read trigger: {str(e)}'}
+
+        except Exception:
+            schema["triggers"] = {'error': 'Insufficient privileges to read triggers.'}
+
+        phases.stop()
+        return schema
 
-                for proc in procedures:
-                    name = proc['Name']
+    @staticmethod
+    def __where(query, condition):
+        """
+        Add the condition of the include / exclude rules to a listing query.
+        """
+        return f"{query} AND {condition}" if condition else query
 
-                    try:
-                        proc_data = self.__extract_ddl_details(conn, file_exporter, "Procedure", name)
-                        schema["procedures"][name] = proc_data.get(name)
-                    except DBAPIError:
-                        schema["procedures"][name] = {'error': 'Insufficient privileges to read procedure.'}
-                    except:
-                        continue
+    def __read_table(self, conn, schema, name, database, file_exporter, catalog):
+        """
+        Extract one table into the schema and save its CREATE TABLE script.
+        """
+        if self.is_unchanged('tables', name):
+            schema['tables'][name] = self.previous_entry('tables', name)
+            return
 
-            except Exception:
-                schema["procedures"] = {'error': 'Insufficient privileges to read procedures.'}
+        try:
+            if catalog and name in catalog['tables']:
+                schema['tables'][name] = catalog['tables'][name]
+            else:
+                schema['tables'][name] = self.__extract_table_details(conn, name, database)
 
+            create_table_script = self.__generate_create_table_script(
+                name,
+                schema['tables'][name]['columns'],
+                schema['tables'][name]['primary_key'],
+                schema['tables'][name]['foreign_keys'],
+                schema['tables'][name]['checks']
+            )
 
-            # -------------------------------------------------------------
-            # FUNCTIONS
-            # -------------------------------------------------------------
-            try:
-                functions = conn.execute(text("SHOW FUNCTION STATUS WHERE Db = :db"), {"db": database}).mappings()
+            if file_exporter:
+                file_exporter.save_sql('tables', name, create_table_script)
+        except DBAPIError:
+            schema['tables'][name] = {'error': 'Insufficient privileges to read table.'}
+        except Exception as e:
+            # Kept in the schema: the object is not taken for dropped (its SQL file and documentation are kept)
+            schema['tables'][name] = {'error': f'Could not read table: {str(e)}'}
+
+    def __read_view(self, conn, schema, name, database, file_exporter, catalog, definitions):
+        """
+        Extract one view into the schema and save its definition.
+        """
+        try:
+            if catalog and name in catalog['views']:
+                schema["views"][name] = catalog['views'][name]
+            else:
+                schema["views"][name] = self.__extract_view_details(conn, name, database)
+            if file_exporter:
+                ddl = self.__extract_ddl_details(conn, file_exporter, "View", name, definitions)
+                schema["views"][name].update(ddl)
+        except DBAPIError:
+            schema["views"][name] = {'error': 'Insufficient privileges to read view.'}
+        except Exception as e:
+            schema["views"][name] = {'error': f'Could not read view: {str(e)}'}
+
+    def __read_routine(self, conn, schema, schema_type, object_type, name, file_exporter, definitions):
+        """
+        Extract one procedure or function into the schema and save its definition.
+        """
+        if self.is_unchanged(schema_type, name):
+            schema[schema_type][name] = self.previous_entry(schema_type, name)
+            return
 
-                for func in functions:
-                    name = func['Name']
-                    try:
-                        func_data = self.__extract_ddl_details(conn, file_exporter, "Function", name)
-                        schema["functions"][name] = func_data.get(name)
-                    except DBAPIError:
-                        schema["functions"][name] = {'error': 'Insufficient privileges to read function.'}
-                    except:
-                        continue
+        try:
+            routine_data = self.__extract_ddl_details(conn, file_exporter, object_type, name, definitions)
+            schema[schema_type][name] = routine_data.get(name)
+        except DBAPIError:
+            schema[schema_type][name] = {'error': f'Insufficient privileges to read {object_type.lower()}.'}
+        except Exception as e:
+            schema[schema_type][name] = {'error': f'Could not read {object_type.lower()}: {str(e)}'}
 
-            except Exception:
-                schema["functions"] = {'error': 'Insufficient privileges to read functions.'}
 
+    def extract_manifest(self, conn, database=None):
+        """
+        Extract the modification markers of the tables, procedures and functions (incremental mode).
+        Views and triggers have no reliable marker, they are always extracted.
+        The marker of a table also has a checksum of its catalog rows (columns, indexes, keys, checks): an INSTANT or
+        INPLACE ALTER TABLE (MySQL 8) can leave CREATE_TIME unchanged, and UPDATE_TIME only follows the data.
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :return: Markers indexed by schema type and object name
+        """
+        manifest = {'tables': {}, 'procedures': {}, 'functions': {}}
 
-            # -------------------------------------------------------------
-            # TRIGGERS
-            # -------------------------------------------------------------
-            try:
-                triggers = conn.execute(text("SHOW TRIGGERS")).mappings()
-                for trigger in triggers:
-                    name = trigger['Trigger']
-                    try:
-                        sql_content = trigger['Statement']
-
-                        schema['triggers'][name] = {
-                            'table': trigger['Table'],
-                            'timing': trigger['Timing'],
-                            'event': trigger['Event']
-                        }
-
-                        if file_exporter:
-                            sql_path = file_exporter.save_sql('triggers', name, sql_content)
-                            schema['triggers'][name]['definition_file'] = sql_path
-                        else:
-                            schema['triggers'][name]['definition'] = str(sql_content)
-                    except DBAPIError:
-                        schema['triggers'][name] = {'error': 'Insufficient privileges to read trigger.'}
-                    except:
-                        continue
-
-            except Exception:
-                schema["triggers"] = {'error': 'Insufficient privileges to read triggers.'}
+        tables = conn.execute(text("""
+            SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = :db AND TABLE_TYPE = 'BASE TABLE'
+        """), {"db": database}).mappings().fetchall()
 
-        return schema
+        checksums = self.__table_checksums(conn, database)
+
+        for row in tables:
+            if row['CREATE_TIME'] is not None:
+                manifest['tables'][row['TABLE_NAME']] = f"{row['CREATE_TIME']}|{row['UPDATE_TIME']}|{checksums.get(row['TABLE_NAME'])}"
+
+        routines = conn.execute(text("""
+            SELECT ROUTINE_NAME, ROUTINE_TYPE, LAST_ALTERED
+            FROM information_schema.ROUTINES
+            WHERE ROUTINE_SCHEMA = :db
+        """), {"db": database}).mappings().fetchall()
+
+        for row in routines:
+            if row['LAST_ALTERED'] is not None:
+                manifest[f"{row['ROUTINE_TYPE'].lower()}s"][row['ROUTINE_NAME']] = str(row['LAST_ALTERED'])
+
+        return manifest
+
+    def __table_checksums(self, conn, database):
+        """
+        Checksum of the catalog rows of each table: number of rows and XOR of the MD5 of each row, in one query.
+        The checks are left out before MySQL 8.0.16 (no CHECK_CONSTRAINTS, the checks are not enforced either).
+        :return: Checksums indexed by table name
+        """
+        sources = [
+            f"SELECT TABLE_NAME, MD5(CONCAT_WS('|', '{table}', {columns})) AS ROW_HASH"
+            f" FROM information_schema.{table} WHERE {schema_column} = :db"
+            for table, schema_column, columns in self.CHECKSUM_SOURCES if table in self.TABLE_CHECKSUM_SOURCES
+        ]
+
+        try:
+            return self.__aggregate_checksums(conn, database, sources + [self.TABLE_CHECKS_CHECKSUM])
+        except DBAPIError:
+            return self.__aggregate_checksums(conn, database, sources)
+
+    @staticmethod
+    def __aggregate_checksums(conn, database, sources):
+        rows = " UNION ALL ".join(sources)
+
+        result = conn.execute(text(f"""
+            SELECT TABLE_NAME, CONCAT(COUNT(*), ':', BIT_XOR(CAST(CONV(SUBSTRING(ROW_HASH, 1, 16), 16, 10) AS UNSIGNED))) AS TABLE_CHECKSUM
+            FROM ({rows}) catalog_rows
+            GROUP BY TABLE_NAME
+        """), {"db": database}).fetchall()
+
+        return {row[0]: row[1] for row in result}
+
+    def extract_checksum(self, conn, database=None):
+        """
+        Checksum of the schema of the database: number of rows and XOR of the MD5 of each row of the catalog
+        tables (columns, indexes, constraints, definitions...), in one query.
+        :return: Checksum, None if the catalog cannot be read (CHECK_CONSTRAINTS requires MySQL 8.0.16 or MariaDB 10.2)
+        """
+        aggregates = ", ".join(
+            f"(SELECT CONCAT(COUNT(*), ':', COALESCE(BIT_XOR(CAST(CONV(SUBSTRING(MD5(CONCAT_WS('|', {columns})), 1, 16), 16, 10) AS UNSIGNED)), 0))"
+            f" FROM information_schema.{table} WHERE {schema_column} = :db) AS {table.lower()}_checksum"
+            for table, schema_column, columns in self.CHECKSUM_SOURCES
+        )
+
+        try:
+            row = conn.execute(text(f"SELECT {aggregates}"), {"db": database}).fetchone()
+        except DBAPIError:
+            return None
 
+        return hashlib.sha256("|".join(str(value) for value in row).encode('utf-8')).hexdigest()
 
     def __extract_table_details(self, conn, table_name, database=None):
         """
@@ -149,11 +345,12 @@ class MySQLSchemaExtractor(SchemaExtractorAdapter):
         """
         inspector = inspect(conn)
 
-        columns = inspector.get_columns(table_name)
-        pk_constraint = inspector.get_pk_constraint(table_name)
-        indexes = inspector.get_indexes(table_name)
-        foreign_keys = inspector.get_foreign_keys(table_name)
-        checks = inspector.get_check_constraints(table_name)
+        # The database is given explicitly: the engine is shared by every database of the server
+        columns = inspector.get_columns(table_name, schema=database)
+        pk_constraint = inspector.get_pk_constraint(table_name, schema=database)
+        indexes = inspector.get_indexes(table_name, schema=database)
+        foreign_keys = inspector.get_foreign_keys(table_name, schema=database)
+        checks = inspector.get_check_constraints(table_name, schema=database)
 
         schema = {
             'comment': '',
@@ -204,15 +401,16 @@ class MySQLSchemaExtractor(SchemaExtractorAdapter):
 
         return schema
 
-    def __extract_view_details(self, conn, table_name):
+    def __extract_view_details(self, conn, table_name, database=None):
         """
         Extract the details of a view including columns, primary keys, indexes, foreign keys, and checks.
         :param conn: Connection to the database
         :param table_name: Name of the table
+        :param database: Name of the current database
         :return: JSON schema with the table details
         """
         inspector = inspect(conn)
-        columns = inspector.get_columns(table_name)
+        columns = inspector.get_columns(table_name, schema=database)
 
         schema = {
             'comment': '',
@@ -226,18 +424,385 @@ class MySQLSchemaExtractor(SchemaExtractorAdapter):
 
         return schema
 
-    def __extract_ddl_details(self, conn, file_exporter, object_type, object_name):
+    def __extract_catalog(self, conn, database):
+        """
+        Extract the details of every table and view of the database in a few set-based queries (bulk mode).
+        The column types are parsed by the SQLAlchemy MySQL dialect, as the Inspector does, so the result
+        is the same as __extract_table_details and __extract_view_details.
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :return: JSON schema with the table details and the view details, indexed by object name
+        """
+        dialect = conn.dialect
+        catalog = {'tables': {}, 'views': {}}
+
+        # Columns (types, nullability, defaults, comments, virtual flag)
+        condition, parameters = self.__catalog_filter("c.TABLE_NAME", database)
+        columns = conn.execute(text(f"""
+            SELECT c.TABLE_NAME, t.TABLE_TYPE, t.TABLE_COLLATION, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE,
+                   c.COLUMN_DEFAULT, c.EXTRA, c.COLUMN_COMMENT, c.CHARACTER_SET_NAME, c.COLLATION_NAME,
+                   cs.DEFAULT_COLLATE_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            INNER JOIN INFORMATION_SCHEMA.TABLES t ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+            LEFT JOIN INFORMATION_SCHEMA.CHARACTER_SETS cs ON cs.CHARACTER_SET_NAME = c.CHARACTER_SET_NAME
+            WHERE c.TABLE_SCHEMA = :db{condition}
+            ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+        """), parameters).mappings().fetchall()
+
+        rows_by_table = {}
+        for row in columns:
+            rows_by_table.setdefault(row['TABLE_NAME'], []).append(row)
+
+        for table_name, rows in rows_by_table.items():
+            is_view = rows[0]['TABLE_TYPE'] == 'VIEW'
+            parsed_columns = self.__parse_column_types(conn, database, table_name, rows, is_view)
+
+            if is_view:
+                catalog['views'][table_name] = {
+                    'comment': '',
+                    'columns': {column['name']: {'type': str(column['type'])} for column in parsed_columns},
+                }
+                continue
+
+            catalog['tables'][table_name] = {
+                'comment': '',
+                'columns': {},
+                'primary_key': [],
+                'indexes': [],
+                'foreign_keys': [],
+                'checks': []
+            }
+
+            for row, column in zip(rows, parsed_columns):
+                catalog['tables'][table_name]['columns'][column['name']] = {
+                    'type': str(column['type']),
+                    'nullable': row['IS_NULLABLE'] != 'NO',
+                    'default': self.__column_default(dialect, row),
+                    'comment': row['COLUMN_COMMENT'] or None,
+                    'is_virtual': 'VIRTUAL' in row['EXTRA'].upper()
+                }
+
+        # Primary keys and indexes
+        condition, parameters = self.__catalog_filter("TABLE_NAME", database)
+        statistics = conn.execute(text(f"""
+            SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = :db{condition}
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """), parameters).mappings().fetchall()
+
+        indexes_by_table = {}
+        for row in statistics:
+            if row['TABLE_NAME'] not in catalog['tables']:
+                continue
+
+            if row['INDEX_NAME'] == 'PRIMARY':
+                catalog['tables'][row['TABLE_NAME']]['primary_key'].append(row['COLUMN_NAME'])
+                continue
+
+            indexes = indexes_by_table.setdefault(row['TABLE_NAME'], {})
+            if row['INDEX_NAME'] not in indexes:
+                indexes[row['INDEX_NAME']] = {'name': row['INDEX_NAME'], 'columns': []}
+
+            indexes[row['INDEX_NAME']]['columns'].append(row['COLUMN_NAME'])
+
+        for table_name, indexes in indexes_by_table.items():
+            # Same order as the Inspector
+            catalog['tables'][table_name]['indexes'] = sorted(indexes.values(), key=lambda index: index['name'])
+
+        # Foreign keys
+        condition, parameters = self.__catalog_filter("k.TABLE_NAME", database)
+        foreign_keys = conn.execute(text(f"""
+            SELECT k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, rc.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+            INNER JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+                ON rc.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA
+                AND rc.TABLE_NAME = k.TABLE_NAME
+                AND rc.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+            WHERE k.TABLE_SCHEMA = :db{condition}
+            ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+        """), parameters).mappings().fetchall()
+
+        foreign_keys_by_table = {}
+        for row in foreign_keys:
+            if row['TABLE_NAME'] not in catalog['tables']:
+                continue
+
+            fks = foreign_keys_by_table.setdefault(row['TABLE_NAME'], {})
+            if row['CONSTRAINT_NAME'] not in fks:
+                fks[row['CONSTRAINT_NAME']] = {
+                    'name': row['CONSTRAINT_NAME'],
+                    'columns': [],
+                    'referred_table': row['REFERENCED_TABLE_NAME'],
+                    'referred_columns': []
+                }
+
+            fks[row['CONSTRAINT_NAME']]['columns'].append(row['COLUMN_NAME'])
+            fks[row['CONSTRAINT_NAME']]['referred_columns'].append(row['REFERENCED_COLUMN_NAME'])
+
+        for table_name, fks in foreign_keys_by_table.items():
+            # SHOW CREATE TABLE lists the foreign keys by name
+            catalog['tables'][table_name]['foreign_keys'] = sorted(fks.values(), key=lambda fk: fk['name'])
+
+        # Checks (MariaDB names them per table, MySQL per schema)
+        if dialect.is_mariadb:
+            condition, parameters = self.__catalog_filter("TABLE_NAME", database)
+            checks_query = text(f"""
+                SELECT *
+                FROM INFORMATION_SCHEMA.CHECK_CONSTRAINTS
+                WHERE CONSTRAINT_SCHEMA = :db{condition}
+            """)
+        else:
+            condition, parameters = self.__catalog_filter("tc.TABLE_NAME", database)
+            checks_query = text(f"""
+                SELECT tc.TABLE_NAME, cc.CONSTRAINT_NAME, cc.CHECK_CLAUSE
+                FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+                INNER JOIN INFORMATION_SCHEMA.CHECK_CONSTRAINTS cc
+                    ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+                WHERE tc.TABLE_SCHEMA = :db AND tc.CONSTRAINT_TYPE = 'CHECK'{condition}
+            """)
+
+        checks_by_table = {}
+        for row in conn.execute(checks_query, parameters).mappings():
+            # MariaDB column-level checks are part of the column definition, the Inspector ignores them
+            if row['TABLE_NAME'] not in catalog['tables'] or row.get('LEVEL', 'Table') == 'Column':
+                continue
+
+            checks_by_table.setdefault(row['TABLE_NAME'], []).append({
+                'name': row['CONSTRAINT_NAME'],
+                'sqltext': row['CHECK_CLAUSE']
+            })
+
+        for table_name, checks in checks_by_table.items():
+            # Same order as the Inspector
+            catalog['tables'][table_name]['checks'] = sorted(checks, key=lambda check: check['name'] or '~')
+
+        return catalog
+
+    def __parse_column_types(self, conn, database, table_name, rows, is_view):
+        """
+        Rebuild the column lines of SHOW CREATE TABLE (or DESCRIBE for views) from INFORMATION_SCHEMA.COLUMNS
+        and parse them with the dialect, to get the same column types as the Inspector. If they cannot be parsed,
+        the columns of the object are reflected by the Inspector.
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :param table_name: Name of the table
+        :param rows: INFORMATION_SCHEMA.COLUMNS rows of the table, in ordinal order
+        :param is_view: Whether the object is a view
+        :return: List of parsed columns
+        """
+        table_collation = rows[0]['TABLE_COLLATION'] or ''
+        table_charset = 'binary' if table_collation == 'binary' else table_collation.split('_')[0]
+
+        lines = []
+        for row in rows:
+            line = f"  {self.__quote_identifier(row['COLUMN_NAME'])} {row['COLUMN_TYPE']}"
+
+            if not is_view and row['CHARACTER_SET_NAME']:
+                if row['CHARACTER_SET_NAME'] != table_charset:
+                    line += f" CHARACTER SET {row['CHARACTER_SET_NAME']}"
+
+                if row['COLLATION_NAME'] != row['DEFAULT_COLLATE_NAME']:
+                    line += f" COLLATE {row['COLLATION_NAME']}"
+
+            lines.append(line)
+
+        show_create = f"CREATE TABLE {self.__quote_identifier(table_name)} (\n" + ",\n".join(lines) + "\n) "
+        columns = self.__parse_table_definition(conn.dialect, show_create)
+
+        if columns is None or len(columns) != len(rows):
+            return inspect(conn).get_columns(table_name, schema=database)
+
+        return columns
+
+    @staticmethod
+    def __parse_table_definition(dialect, show_create):
+        """
+        Parse a SHOW CREATE TABLE statement with the parser of the MySQL dialect. The parser is not part of the
+        public API of SQLAlchemy: it may be missing or behave differently in another version.
+        :param dialect: MySQL dialect of the connection
+        :param show_create: CREATE TABLE statement
+        :return: Parsed columns, None if the statement cannot be parsed
+        """
+        try:
+            return dialect._tabledef_parser.parse(show_create, dialect._connection_charset).columns
+        except Exception:
+            return None
+
+    def __column_default(self, dialect, row):
+        """
+        Format the default value of a column as SHOW CREATE TABLE prints it (and the Inspector returns it).
+        :param dialect: MySQL dialect of the connection
+        :param row: INFORMATION_SCHEMA.COLUMNS row of the column
+        :return: Default value, or None
+        """
+        default = row['COLUMN_DEFAULT']
+
+        if default is None:
+            return None
+
+        # MariaDB already stores the default as an SQL expression
+        if dialect.is_mariadb:
+            if default == 'NULL':
+                return None
+        else:
+            extra = row['EXTRA'].upper()
+
+            if 'DEFAULT_GENERATED' in extra:
+                if not default.upper().startswith('CURRENT_TIMESTAMP'):
+                    default = f"({default})"
+            elif not row['COLUMN_TYPE'].startswith('bit'):
+                default = "'%s'" % default.replace("'", "''")
+
+        on_update = row['EXTRA'].upper().find('ON UPDATE ')
+        if on_update != -1:
+            default += f" ON UPDATE {row['EXTRA'][on_update + len('ON UPDATE '):]}"
+
+        return default
+
+    def __extract_ddl_definitions(self, conn, database):
+        """
+        Rebuild the SHOW CREATE statements of the procedures, functions and views from information_schema (bulk mode).
+        Only the statements that come out identical to SHOW CREATE are rebuilt: SHOW CREATE prints the parameter list
+        as it was written and the character set of a returned string, information_schema only has their canonical
+        form, and MySQL does not expose the algorithm of a view. The other objects (and the definitions hidden from
+        the current user) are left out, they fall back to SHOW CREATE.
+        :param conn: Connection to the database
+        :param database: Name of the current database
+        :return: CREATE statements indexed by object type (Procedure, Function, View) and object name
+        """
+        definitions = {'Procedure': {}, 'Function': {}, 'View': {}}
+
+        condition, bind = self.__catalog_filter("SPECIFIC_NAME", database)
+        parameters = conn.execute(text(f"""
+            SELECT DISTINCT SPECIFIC_NAME, ROUTINE_TYPE
+            FROM information_schema.PARAMETERS
+            WHERE SPECIFIC_SCHEMA = :db AND ORDINAL_POSITION > 0{condition}
+        """), bind).mappings().fetchall()
+
+        with_parameters = {(row['ROUTINE_TYPE'], row['SPECIFIC_NAME']) for row in parameters}
+
+        condition, bind = self.__catalog_filter("ROUTINE_NAME", database)
+        routines = conn.execute(text(f"""
+            SELECT ROUTINE_NAME, ROUTINE_TYPE, DTD_IDENTIFIER, CHARACTER_SET_NAME, ROUTINE_DEFINITION, IS_DETERMINISTIC,
+                   SQL_DATA_ACCESS, SECURITY_TYPE, ROUTINE_COMMENT, DEFINER
+            FROM information_schema.ROUTINES
+            WHERE ROUTINE_SCHEMA = :db{condition}
+        """), bind).mappings().fetchall()
+
+        for row in routines:
+            if row['ROUTINE_DEFINITION'] is None or row['CHARACTER_SET_NAME']:
+                continue
+
+            if (row['ROUTINE_TYPE'], row['ROUTINE_NAME']) in with_parameters:
+                continue
+
+            object_type = row['ROUTINE_TYPE'].capitalize()
+
+            sql_content = f"CREATE {self.__definer_clause(row['DEFINER'])}{object_type.upper()} {self.__quote_identifier(row['ROUTINE_NAME'])}()"
+            if object_type == 'Function':
+                sql_content += f" RETURNS {row['DTD_IDENTIFIER']}"
+            sql_content += "\n"
+
+            if row['SQL_DATA_ACCESS'] != 'CONTAINS SQL':
+                sql_content += f"    {row['SQL_DATA_ACCESS']}\n"
+            if row['IS_DETERMINISTIC'] == 'YES':
+                sql_content += "    DETERMINISTIC\n"
+            if row['SECURITY_TYPE'] == 'INVOKER':
+                sql_content += "    SQL SECURITY INVOKER\n"
+            if row['ROUTINE_COMMENT']:
+                sql_content += f"    COMMENT {self.__quote_string(row['ROUTINE_COMMENT'])}\n"
+
+            definitions[object_type][row['ROUTINE_NAME']] = sql_content + row['ROUTINE_DEFINITION']
+
+        condition, bind = self.__catalog_filter("TABLE_NAME", database)
+        views = conn.execute(text(f"""
+            SELECT *
+            FROM information_schema.VIEWS
+            WHERE TABLE_SCHEMA = :db{condition}
+        """), bind).mappings().fetchall()
+
+        for row in views:
+            if not row['VIEW_DEFINITION'] or not row.get('ALGORITHM'):
+                continue
+
+            sql_content = (
+                f"CREATE ALGORITHM={row['ALGORITHM']} {self.__definer_clause(row['DEFINER'])}"
+                f"SQL SECURITY {row['SECURITY_TYPE']} VIEW {self.__quote_identifier(row['TABLE_NAME'])} AS {self.__unqualify(row['VIEW_DEFINITION'], database)}"
+            )
+            if row['CHECK_OPTION'] and row['CHECK_OPTION'] != 'NONE':
+                sql_content += f" WITH {row['CHECK_OPTION']} CHECK OPTION"
+
+            definitions['View'][row['TABLE_NAME']] = sql_content
+
+        return definitions
+
+    def __unqualify(self, definition, database):
+        """
+        Remove the database qualifier from the objects of a view definition, as SHOW CREATE VIEW prints the objects
+        of the view's own database. String literals, comments and the second part of a qualified name are kept.
+        """
+        qualifier = f"{self.__quote_identifier(database)}."
+
+        def replace(match):
+            token = match.group(0)
+            if token == qualifier and definition[match.start() - 1:match.start()] != '.':
+                return ""
+            return token
+
+        return self.VIEW_TOKENS.sub(replace, definition)
+
+    def __catalog_filter(self, name_column, database):
+        """
+        Condition of the include / exclude rules for a catalog query of the bulk mode, so that the excluded
+        objects are not read either.
+        :return: Condition to append to the WHERE clause ("" if no rule can be translated) and the bind parameters
+        """
+        condition, parameters = self.filter_condition(name_column, schema=database)
+        return f" AND {condition}" if condition else "", {"db": database, **parameters}
+
+    def __definer_clause(self, definer):
+        """
+        Format a user@host definer as SHOW CREATE prints it.
+        """
+        if not definer:
+            return ""
+
+        if '@' not in definer:
+            return f"DEFINER={self.__quote_identifier(definer)} "
+
+        user, host = definer.rsplit('@', 1)
+        return f"DEFINER={self.__quote_identifier(user)}@{self.__quote_identifier(host)} "
+
+    def __quote_identifier(self, name):
+        """
+        Quote an identifier as SHOW CREATE prints it.
+        """
+        return "`" + name.replace("`", "``") + "`"
+
+    def __quote_string(self, value):
+        """
+        Quote a string literal as SHOW CREATE prints it.
+        """
+        escapes = {'\0': '\\0', '\n': '\\n', '\r': '\\r', '\\': '\\\\', "'": "''"}
+        return "'" + "".join(escapes.get(char, char) for char in value) + "'"
+
+    def __extract_ddl_details(self, conn, file_exporter, object_type, object_name, definitions=None):
         """
         Extract the DDL details of a given object (procedure or function).
         :param conn: Connection to the database
         :param file_exporter: File exporter to save the SQL file
         :param object_type: Type of the object (Procedure or Function)
         :param object_name: Name of the object
+        :param definitions: CREATE statements read in bulk, SHOW CREATE is used for the objects missing from it
         :return: JSON schema with the DDL details
         """
         schema = {}
 
-        create_proc = conn.execute(text(f"SHOW CREATE {object_type.upper()} `{object_name}`")).mappings().first()
+        if definitions and object_name in definitions[object_type]:
+            create_proc = {f'Create {object_type}': definitions[object_type][object_name]}
+        else:
+            create_proc = conn.execute(text(f"SHOW CREATE {object_type.upper()} `{object_name}`")).mappings().first()
         if create_proc:
             sql_content = create_proc[f'Create {object_type}']
             if file_exporter:
@@ -294,6 +859,6 @@ class MySQLSchemaExtractor(SchemaExtractorAdapter):
         :return: List of database names
         """
 
-        with self.connection.engine.connect() as conn:
+        with self.connection.connect() as conn:
             databases = conn.execute(text("SHOW DATABASES")).fetchall()
             return [db[0] for db in databases]
\ No newline at end of file
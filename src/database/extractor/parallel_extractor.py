@@ -0,0 +1,115 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
+
+
+class ParallelSchemaExtractor:
+    """
+    Extract one database over several connections. The objects are listed on one connection, then split into shards:
+    ranges of consecutive objects of the same type, in the listing order (sorted by name). The shards are extracted
+    concurrently, each worker on its own connection of the pool, with the per-object extraction of the wrapped
+    extractor (bulk or not). The results are merged in the listing order, so the schema does not depend on the
+    scheduling.
+    """
+
+    def __init__(self, extractor, shards=4):
+        self.extractor = extractor
+        self.connection = extractor.connection
+        self.shards = shards
+
+    @property
+    def manifest(self):
+        return self.extractor.manifest
+
+    def list_databases(self):
+        return self.extractor.list_databases()
+
+    def stream_schema(self, file_exporter=None, database=None, previous=None):
+        """
+        Events of the extracted schema, see SchemaExtractorAdapter.stream_schema. The objects are extracted
+        concurrently, so the schema is extracted as a whole before the events are yielded.
+        """
+        yield from SchemaExtractorAdapter.events(self.extract_schema(file_exporter, database, previous))
+
+    def extract_schema(self, file_exporter=None, database=None, previous=None) -> dict:
+        """
+        Extract the schema of the database, see SchemaExtractorAdapter.extract_schema.
+        """
+        # List the objects, the per-object extractions are collected instead of run
+        tasks = []
+        self.extractor.deferred = tasks
+
+        try:
+            with self.connection.connect() as conn:
+                schema = self.extractor.read_schema(conn, file_exporter, database, previous)
+        finally:
+            self.extractor.deferred = None
+
+        plan = self.plan(tasks, self.shards)
+        # Each object is extracted in its own schema, merged afterwards
+        results = [{schema_type: {} for schema_type in schema} for _ in tasks]
+        pending = iter(plan)
+        lock = threading.Lock()
+
+        def worker():
+            with self.connection.connect() as worker_conn:
+                while True:
+                    with lock:
+                        shard = next(pending, None)
+
+                    if shard is None:
+                        return
+
+                    for index in shard:
+                        tasks[index][2](worker_conn, results[index])
+
+        # The phases of read_schema only list the objects, their concurrent extraction is timed as a whole
+        phases = self.extractor.phase_timer(database)
+        phases.start('objects')
+        workers = min(self.shards, len(plan))
+
+        if workers:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(worker) for _ in range(workers)]
+
+                for future in futures:
+                    future.result()
+
+        phases.stop()
+
+        # Merged in the listing order, so the keys are in the same order as with the serial extraction
+        for result in results:
+            for schema_type, entries in result.items():
+                # Sections that could not be listed stay in error
+                if not isinstance(schema[schema_type].get('error'), str):
+                    schema[schema_type].update(entries)
+
+        return schema
+
+    @staticmethod
+    def plan(tasks, shards):
+        """
+        Split the deferred extractions into shards of consecutive objects of the same type.
+        :param tasks: Deferred extractions (schema_type, name, task), in the listing order
+        :param shards: Number of connections, the objects are split into shards of at most len(tasks) / shards objects
+        :return: Lists of task indexes, in the listing order
+        """
+        size = max(math.ceil(len(tasks) / max(shards, 1)), 1)
+        plan = []
+        current = []
+        current_type = None
+
+        for index, (schema_type, _, _) in enumerate(tasks):
+            if current and (schema_type != current_type or len(current) >= size):
+                plan.append(current)
+                current = []
+
+            current.append(index)
+            current_type = schema_type
+
+        if current:
+            plan.append(current)
+
+        return plan
@@ -1,14 +1,23 @@
-from database.connection import DatabaseConnection
-from database.extractor.mssql_extractor import MSSQLSchemaExtractor
-from database.extractor.mysql_extractor import MySQLSchemaExtractor
-
 class DatabaseExtractorFactory:
     @staticmethod
-    def create_extractor(db_type, connection):
+    def create_extractor(db_type, connection, bulk=False, use_async=False, progress=None, object_filter=None, shards=1):
+        # Extractors are imported on demand, a run only loads the SQLAlchemy dialect of its database type
         if db_type == 'mysql' or db_type == 'mariadb':
-            return MySQLSchemaExtractor(connection)
+            from database.extractor.mysql_extractor import MySQLSchemaExtractor
+            extractor = MySQLSchemaExtractor(connection, bulk=bulk, progress=progress, object_filter=object_filter)
         elif db_type == 'mssql':
-            return MSSQLSchemaExtractor(connection)
+            from database.extractor.mssql_extractor import MSSQLSchemaExtractor
+            extractor = MSSQLSchemaExtractor(connection, bulk=bulk, progress=progress, object_filter=object_filter)
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
 
+        if use_async:
+            from database.extractor.async_extractor import AsyncSchemaExtractor
+            return AsyncSchemaExtractor(extractor)
+
+        if shards > 1:
+            from database.extractor.parallel_extractor import ParallelSchemaExtractor
+            return ParallelSchemaExtractor(extractor, shards)
+
+        return extractor
+
@@ -0,0 +1,340 @@
+import base64
+import datetime
+import decimal
+import gzip
+import json
+import re
+import threading
+import time
+import types
+
+from sqlalchemy import create_engine, event
+
+
+def query_key(statement, parameters=None):
+    """
+    Key of a query in a recording: the statement with normalized whitespace and its parameters.
+    """
+    key = re.sub(r"\s+", " ", statement).strip()
+
+    if parameters:
+        key += " -- " + json.dumps(parameters, sort_keys=True, default=str)
+
+    return key
+
+
+class Recording:
+    """
+    Result sets of the queries issued during a run, indexed by query.
+    A query issued several times is answered with its results in the recorded order.
+    """
+
+    def __init__(self, queries=None):
+        self.queries = queries or {}
+        self.positions = {}
+        self.lock = threading.Lock()
+
+    def add(self, statement, parameters, columns, rows):
+        with self.lock:
+            self.queries.setdefault(query_key(statement, parameters), []).append({'columns': columns, 'rows': rows})
+
+    def answer(self, statement, parameters):
+        """
+        Return the columns and the rows of a query, or None if it was not recorded.
+        """
+        key = query_key(statement, parameters)
+        results = self.queries.get(key)
+
+        if not results:
+            return None
+
+        with self.lock:
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+
+        # Once exhausted, the last result is replayed
+        result = results[min(position, len(results) - 1)]
+        return result['columns'], result['rows']
+
+    def save(self, file_path, **metadata):
+        """
+        Save the recording as JSON, compressed if the file name ends with .gz.
+        :param metadata: Extra keys saved with the queries
+        """
+        with _open(file_path, 'w') as f:
+            json.dump({**metadata, 'queries': self.queries}, f, ensure_ascii=False, separators=(',', ':'), default=_encode_value)
+
+    @staticmethod
+    def load(file_path):
+        return Recording(Recording.load_file(file_path)['queries'])
+
+    @staticmethod
+    def load_file(file_path):
+        """
+        :return: Content of a recording file, the queries with the metadata
+        """
+        with _open(file_path, 'r') as f:
+            return json.load(f, object_hook=_decode_value)
+
+
+def _open(file_path, mode):
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode + 't', encoding='utf-8')
+
+    return open(file_path, mode, encoding='utf-8')
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'$timedelta': value.total_seconds()}
+    if isinstance(value, decimal.Decimal):
+        return {'$decimal': str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'$bytes': base64.b64encode(bytes(value)).decode('ascii')}
+
+    return str(value)
+
+
+def _decode_value(value):
+    if len(value) == 1:
+        tag, content = next(iter(value.items()))
+
+        if tag == '$datetime':
+            return datetime.datetime.fromisoformat(content)
+        if tag == '$date':
+            return datetime.date.fromisoformat(content)
+        if tag == '$timedelta':
+            return datetime.timedelta(seconds=content)
+        if tag == '$decimal':
+            return decimal.Decimal(content)
+        if tag == '$bytes':
+            return base64.b64decode(content)
+
+    return value
+
+
+class QueryCounter:
+    """
+    Number of queries issued during a run, shared by every connection.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def increment(self):
+        with self.lock:
+            self.count += 1
+
+
+class ReplayCursor:
+    """
+    DBAPI cursor answering the queries from a source (recording or synthetic server).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self.arraysize = 1
+        self.rows = []
+
+    def execute(self, statement, parameters=None):
+        self.connection.counter.increment()
+
+        if self.connection.latency:
+            time.sleep(self.connection.latency)
+
+        result = self.connection.source.answer(statement, parameters)
+
+        if result is None:
+            raise self.connection.error_class(f"Query not available for replay: {query_key(statement, parameters)}")
+
+        columns, rows = result
+        self.description = [(name, None, None, None, None, None, None) for name in columns] if columns else None
+        self.rows = [tuple(row) for row in rows]
+        self.rowcount = len(self.rows)
+
+    def executemany(self, statement, seq_of_parameters):
+        for parameters in seq_of_parameters:
+            self.execute(statement, parameters)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def nextset(self):
+        return None
+
+    def setinputsizes(self, *args):
+        pass
+
+    def close(self):
+        self.rows = []
+
+
+class ReplayConnection:
+    """
+    DBAPI connection replaying the queries of a source, with a fixed latency per query.
+    """
+
+    def __init__(self, source, counter, latency=0.0, error_class=Exception):
+        self.source = source
+        self.counter = counter
+        self.latency = latency
+        self.error_class = error_class
+        self.autocommit = False
+
+    def cursor(self, *args):
+        return ReplayCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def ping(self, *args):
+        return True
+
+    def character_set_name(self):
+        # pymysql: charset of the connection
+        return 'utf8mb4'
+
+    def add_output_converter(self, *args):
+        # pyodbc: type converters of the connection
+        pass
+
+
+class RecordingCursor:
+    """
+    DBAPI cursor forwarding the queries to a real cursor and recording their result sets.
+    """
+
+    def __init__(self, cursor, recording):
+        self.cursor = cursor
+        self.recording = recording
+        self.rows = []
+
+    def execute(self, statement, parameters=None):
+        if parameters is None:
+            self.cursor.execute(statement)
+        else:
+            self.cursor.execute(statement, parameters)
+
+        columns = [column[0] for column in self.cursor.description] if self.cursor.description else []
+        self.rows = [tuple(row) for row in self.cursor.fetchall()] if self.cursor.description else []
+        self.recording.add(statement, parameters, columns, [list(row) for row in self.rows])
+
+    def executemany(self, statement, seq_of_parameters):
+        for parameters in seq_of_parameters:
+            self.execute(statement, parameters)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=None):
+        size = size or self.cursor.arraysize
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class RecordingConnection:
+    """
+    DBAPI connection wrapping a real connection and recording the queries issued on it.
+    """
+
+    def __init__(self, connection, recording):
+        self.connection = connection
+        self.recording = recording
+
+    def cursor(self, *args):
+        return RecordingCursor(self.connection.cursor(*args), self.recording)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __setattr__(self, name, value):
+        if name in ('connection', 'recording'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.connection, name, value)
+
+
+def replay_dbapi():
+    """
+    Minimal DBAPI module for the dialects whose driver is not installed (pyodbc), the connections are replayed.
+    """
+    module = types.ModuleType('replay_dbapi')
+    module.paramstyle = 'qmark'
+    module.apilevel = '2.0'
+    module.threadsafety = 1
+    module.version = '5.2.0'
+    module.Warning = type('Warning', (Exception,), {})
+    module.Error = type('Error', (Exception,), {})
+    module.InterfaceError = type('InterfaceError', (module.Error,), {})
+    module.DatabaseError = type('DatabaseError', (module.Error,), {})
+
+    for name in ['DataError', 'OperationalError', 'IntegrityError', 'InternalError', 'ProgrammingError', 'NotSupportedError']:
+        setattr(module, name, type(name, (module.DatabaseError,), {}))
+
+    return module
+
+
+def replay_engine_factory(source, counter, latency=0.0):
+    """
+    Replacement of sqlalchemy.create_engine: the engines open replayed connections instead of connecting to a server.
+    """
+    def factory(url, **kwargs):
+        if url.startswith('mssql'):
+            kwargs['module'] = replay_dbapi()
+
+        engine = create_engine(url, **kwargs)
+        error_class = engine.dialect.loaded_dbapi.ProgrammingError
+
+        @event.listens_for(engine, 'do_connect')
+        def connect(dialect, connection_record, cargs, cparams):
+            return ReplayConnection(source, counter, latency, error_class)
+
+        return engine
+
+    return factory
+
+
+def recording_engine_factory(recording):
+    """
+    Replacement of sqlalchemy.create_engine: the engines connect to the server and record every query.
+    """
+    def factory(url, **kwargs):
+        engine = create_engine(url, **kwargs)
+
+        @event.listens_for(engine, 'do_connect')
+        def connect(dialect, connection_record, cargs, cparams):
+            return RecordingConnection(dialect.connect(*cargs, **cparams), recording)
+
+        return engine
+
+    return factory
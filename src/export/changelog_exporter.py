@@ -0,0 +1,80 @@
+import json
+
+from handler.file_handler import FileHandler
+
+
+class ChangelogExporter:
+    def __init__(self, json_file, markdown_file):
+        self.json_file = json_file
+        self.markdown_file = markdown_file
+
+    def save(self, db_name, changelog):
+        """
+        Save the changelog of a database as JSON and as Markdown.
+        """
+        FileHandler(self.json_file).save(changelog)
+        FileHandler.write_if_changed(self.markdown_file, self.to_markdown(db_name, changelog))
+
+    @staticmethod
+    def to_markdown(db_name, changelog):
+        """
+        Render a changelog (see SchemaDiff.compare) as Markdown.
+        """
+        lines = [f"# Changes in {db_name}", ""]
+
+        if not changelog:
+            lines.append("No changes.")
+
+        for schema_type, changes in changelog.items():
+            lines.append(f"## {schema_type.capitalize()}")
+            lines.append("")
+
+            if changes['added']:
+                lines.append(f"- Added: {ChangelogExporter.__names(changes['added'])}")
+            if changes['dropped']:
+                lines.append(f"- Dropped: {ChangelogExporter.__names(changes['dropped'])}")
+            if changes['altered']:
+                lines.append(f"- Altered: {ChangelogExporter.__names(changes['altered'])}")
+
+            for name, details in changes['altered'].items():
+                lines.append("")
+                lines.append(f"### `{name}`")
+                lines.append("")
+
+                for key, change in details.items():
+                    label = key.replace('_', ' ')
+
+                    if key == 'definition':
+                        lines.append(f"- Definition changed (`{change['file']}`)" if 'file' in change else "- Definition changed")
+                    elif 'before' in change:
+                        lines.append(f"- {label.capitalize()}: `{ChangelogExporter.__value(change['before'])}` -> `{ChangelogExporter.__value(change['after'])}`")
+                    else:
+                        if change['added']:
+                            lines.append(f"- Added {label}: {ChangelogExporter.__names(change['added'])}")
+                        if change['dropped']:
+                            lines.append(f"- Dropped {label}: {ChangelogExporter.__names(change['dropped'])}")
+                        for item_name, item_change in change['altered'].items():
+                            lines.append(f"- Altered {label} `{item_name}`: {ChangelogExporter.__attributes(item_change['before'], item_change['after'])}")
+
+            lines.append("")
+
+        return "\n".join(lines).rstrip("\n") + "\n"
+
+    @staticmethod
+    def __names(names):
+        return ", ".join(f"`{name}`" for name in names)
+
+    @staticmethod
+    def __value(value):
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def __attributes(before, after):
+        if not isinstance(before, dict) or not isinstance(after, dict):
+            return f"`{ChangelogExporter.__value(before)}` -> `{ChangelogExporter.__value(after)}`"
+
+        return ", ".join(
+            f"{key} `{ChangelogExporter.__value(before.get(key))}` -> `{ChangelogExporter.__value(after.get(key))}`"
+            for key in list(after) + [key for key in before if key not in after]
+            if before.get(key) != after.get(key)
+        )
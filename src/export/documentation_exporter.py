@@ -5,21 +5,28 @@ from utils.schema_updater import SchemaUpdater
 class DocumentationExporter:
     def __init__(self, doc_file):
         self.file_handler = FileHandler(doc_file)
-        self.documentation = self.file_handler.load()
-        self.schema_updater = SchemaUpdater(self.documentation)
+        self.schema_updater = SchemaUpdater(self.file_handler.load())
+        self.documentation = self.schema_updater.documentation
 
     def save_documentation(self):
         """
         Save the documentation to the JSON file.
+        :return: True if the file was written
         """
-        self.file_handler.save(self.documentation)
+        return self.file_handler.save(self.documentation)
+
+    def reconcile(self, schema):
+        """
+        Add and remove the documentation entries of every object and column of the schema, in one pass.
+        :return: Added and removed objects and columns by section, see SchemaUpdater.reconcile
+        """
+        return self.schema_updater.reconcile(schema)
 
     def update_or_remove(self, schema, schema_type):
         """
         Update or remove tables, procedures, functions, or triggers in the documentation.
         """
         self.schema_updater.update_or_remove(schema, schema_type)
-        self.documentation = self.schema_updater.documentation
 
     def get_documentation(self):
         """
@@ -1,21 +1,241 @@
 import os
+import queue
+import threading
+
+from handler.file_handler import FileHandler
+from handler.object_store import SQL_REFERENCES_FILE
 
 class FileExporter:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, writers=0, queue_size=256, store=None):
+        """
+        :param base_dir: Output directory of the database
+        :param writers: Number of background threads writing the SQL files (write-behind), 0 to write them in save_sql
+        :param queue_size: Number of files waiting to be written, save_sql blocks when the queue is full
+        :param store: Object store (see ObjectStore), the SQL files identical to a stored one are only referenced
+        """
         self.base_dir = base_dir
-        os.makedirs(base_dir, exist_ok=True)
+        self.stats = {'written': 0, 'skipped': 0, 'removed': 0}
+        # Files written with a new content since the last reset (relative to base_dir)
+        self.changed_files = set()
+        # Files that could not be written in the background since the last reset: (path, error)
+        self.errors = []
+        # The objects of a database can be saved concurrently (--shards)
+        self.lock = threading.Lock()
+        # Directories already created, makedirs is a round-trip on a network share
+        self.directories = set()
+        self.writers = writers
+        self.queue_size = queue_size
+        # Contents not written yet, by file path
+        self.pending = {}
+        self.queues = []
+        self.threads = []
+        self.store = store
+        self.references = {}
+        # Files now rendered from the store, their copy is removed with the stale files
+        self.shared = set()
+        self.__make_dirs(base_dir)
+        self.__load_references()
+
+    @property
+    def database(self):
+        # The output directory of a database is named after it
+        return os.path.basename(os.path.normpath(self.base_dir))
 
     def change_base_dir(self, new_base_dir):
+        self.flush()
         self.base_dir = new_base_dir
-        os.makedirs(new_base_dir, exist_ok=True)
+        self.__make_dirs(new_base_dir)
+        self.__load_references()
 
     def save_sql(self, subdir, name, content):
-        safe_name = name.replace('`', '').replace('/', '_')
         folder_path = os.path.join(self.base_dir, subdir)
-        os.makedirs(folder_path, exist_ok=True)
-        file_path = os.path.join(folder_path, f"{safe_name}.sql")
+        file_path = os.path.join(folder_path, self.__file_name(name))
+
+        relative_path = os.path.relpath(file_path, self.base_dir)
+
+        if self.store is not None and self.__share(file_path, relative_path, content):
+            return relative_path
+
+        if not self.writers:
+            self.__write(folder_path, file_path, relative_path, content)
+            return relative_path
+
+        self.__start()
+
+        with self.lock:
+            self.pending[file_path] = content
+
+        # The writes of a file go through the same thread, so they are applied in order
+        self.queues[hash(file_path) % self.writers].put((folder_path, file_path, relative_path, content))
+
+        return relative_path
+
+    def read_sql(self, relative_path):
+        """
+        Content of a SQL file, including a content not written yet.
+        :return: Content of the file, None if it doesn't exist
+        """
+        file_path = os.path.join(self.base_dir, relative_path)
+
+        with self.lock:
+            if file_path in self.pending:
+                return self.pending[file_path]
+
+            fingerprint = self.references.get(relative_path)
+            shared = relative_path in self.shared
+
+        if fingerprint and (shared or not os.path.exists(file_path)):
+            return self.store.get(fingerprint, self.database, 'sql')
+
+        if not os.path.exists(file_path):
+            return None
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def flush(self):
+        """
+        Wait until the files queued are written.
+        """
+        for writer_queue in self.queues:
+            writer_queue.join()
+
+    def close(self):
+        """
+        Write the files queued and stop the writer threads.
+        """
+        for writer_queue in self.queues:
+            writer_queue.put(None)
+
+        for thread in self.threads:
+            thread.join()
+
+        self.queues = []
+        self.threads = []
+
+    def reset_stats(self):
+        """
+        Reset the counters, the changed files and the write errors, before the next database.
+        """
+        self.stats = {'written': 0, 'skipped': 0, 'removed': 0}
+        self.changed_files = set()
+        self.errors = []
+
+    def remove_stale_sql(self, expected):
+        """
+        Remove the SQL files of the objects that no longer exist.
+        :param expected: Names of the existing objects, indexed by subdirectory
+        """
+        self.flush()
+
+        for subdir, names in expected.items():
+            folder_path = os.path.join(self.base_dir, subdir)
+            expected_files = {self.__file_name(name) for name in names}
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            if self.store is not None:
+                for relative_path in [path for path in self.references if os.path.dirname(path) == subdir]:
+                    if os.path.basename(relative_path) not in expected_files:
+                        del self.references[relative_path]
 
-        return os.path.relpath(file_path, self.base_dir)
+                        if not os.path.exists(os.path.join(self.base_dir, relative_path)):
+                            self.stats['removed'] += 1
+
+            if not os.path.isdir(folder_path):
+                continue
+
+            for file_name in os.listdir(folder_path):
+                if file_name.endswith('.sql') and (file_name not in expected_files or os.path.join(subdir, file_name) in self.shared):
+                    os.remove(os.path.join(folder_path, file_name))
+
+                    if file_name not in expected_files:
+                        self.stats['removed'] += 1
+
+        if self.store is not None:
+            self.shared = set()
+            FileHandler(os.path.join(self.base_dir, SQL_REFERENCES_FILE)).save(self.references)
+
+    def __load_references(self):
+        if self.store is not None:
+            self.references = FileHandler(os.path.join(self.base_dir, SQL_REFERENCES_FILE)).load() or {}
+            self.shared = set()
+
+    def __share(self, file_path, relative_path, content):
+        """
+        Save the content in the store. A content rendered the same from the store is only referenced.
+        :return: True if the file is referenced, False if the database keeps its own copy
+        """
+        fingerprint, exact = self.store.put(content, self.database, 'sql')
+
+        with self.lock:
+            previous = self.references.get(relative_path)
+            self.references[relative_path] = fingerprint
+
+            if not exact:
+                self.shared.discard(relative_path)
+                return False
+
+            self.shared.add(relative_path)
+
+            # The copy of the previous run is removed with the stale files
+            if previous == fingerprint and not os.path.exists(file_path):
+                self.stats['skipped'] += 1
+            else:
+                self.stats['written'] += 1
+                self.changed_files.add(relative_path)
+
+        return True
+
+    def __start(self):
+        with self.lock:
+            if self.threads:
+                return
+
+            for _ in range(self.writers):
+                writer_queue = queue.Queue(maxsize=max(self.queue_size // self.writers, 1))
+                thread = threading.Thread(target=self.__drain, args=(writer_queue,), daemon=True)
+                self.queues.append(writer_queue)
+                self.threads.append(thread)
+                thread.start()
+
+    def __drain(self, writer_queue):
+        while True:
+            item = writer_queue.get()
+
+            try:
+                if item is None:
+                    return
+
+                folder_path, file_path, relative_path, content = item
+
+                try:
+                    self.__write(folder_path, file_path, relative_path, content)
+                except Exception as e:
+                    # Reported in the run summary, the extraction goes on
+                    with self.lock:
+                        self.errors.append((relative_path, str(e)))
+                finally:
+                    with self.lock:
+                        if self.pending.get(file_path) is content:
+                            del self.pending[file_path]
+            finally:
+                writer_queue.task_done()
+
+    def __write(self, folder_path, file_path, relative_path, content):
+        self.__make_dirs(folder_path)
+        written = FileHandler.write_if_changed(file_path, content)
+
+        with self.lock:
+            if written:
+                self.stats['written'] += 1
+                self.changed_files.add(relative_path)
+            else:
+                self.stats['skipped'] += 1
+
+    def __make_dirs(self, folder_path):
+        if folder_path not in self.directories:
+            os.makedirs(folder_path, exist_ok=True)
+            self.directories.add(folder_path)
+
+    def __file_name(self, name):
+        safe_name = name.replace('`', '').replace('/', '_')
+        return f"{safe_name}.sql"
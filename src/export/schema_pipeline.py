@@ -0,0 +1,163 @@
+from adapter.schema_extractor_adapter import SECTION
+from utils.schema_diff import SchemaDiff
+
+
+class SchemaPipeline:
+    """
+    Feed the extraction events of a database (see SchemaExtractorAdapter.stream_schema) to sinks as they arrive.
+    A sink has section(schema_type, error=None), write(schema_type, name, entry), close() and abort(): the
+    sinks are closed once every event is consumed, or aborted if the extraction fails.
+    """
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def run(self, events, before_close=None):
+        """
+        :param before_close: Called once every event is consumed, before the sinks are closed
+        :return: Result of the close() of each sink
+        """
+        try:
+            for kind, name, payload in events:
+                if kind == SECTION:
+                    for sink in self.sinks:
+                        sink.section(name, payload)
+                else:
+                    for sink in self.sinks:
+                        sink.write(kind, name, payload)
+
+            if before_close is not None:
+                before_close()
+        except BaseException:
+            for sink in self.sinks:
+                sink.abort()
+            raise
+
+        return [sink.close() for sink in self.sinks]
+
+
+class StaleFilesSink:
+    """
+    Remove the SQL files of the objects that are no longer in the schema. Sections that could not be read are
+    left untouched.
+    """
+
+    def __init__(self, file_exporter):
+        self.file_exporter = file_exporter
+        self.expected = {}
+
+    def section(self, schema_type, error=None):
+        if error is None:
+            self.expected[schema_type] = set()
+
+    def write(self, schema_type, name, entry):
+        if schema_type in self.expected:
+            self.expected[schema_type].add(name)
+
+    def close(self):
+        self.file_exporter.remove_stale_sql(self.expected)
+
+    def abort(self):
+        pass
+
+
+class ChangelogSink:
+    """
+    Compare each object with the previous snapshot as it is extracted, the changelog is saved on close.
+    The SQL files can be written in the background: unchanged objects with a definition file are checked
+    again on close, once the changed files are known.
+    """
+
+    def __init__(self, previous_schema, changed_files, changelog_exporter, db_name):
+        self.previous_schema = previous_schema
+        self.schema_diff = SchemaDiff(changed_files)
+        self.changelog_exporter = changelog_exporter
+        self.db_name = db_name
+        # Changes, names (in the order of the schema) and unchanged objects with a definition file of each section
+        self.sections = {}
+
+    def section(self, schema_type, error=None):
+        previous_items = self.previous_schema.get(schema_type) or {}
+
+        # Sections that could not be read are not compared
+        if error is None and not isinstance(previous_items.get('error'), str):
+            self.sections[schema_type] = (SchemaDiff.new_changes(), {}, [])
+
+    def write(self, schema_type, name, entry):
+        if schema_type not in self.sections:
+            return
+
+        changes, names, unchanged = self.sections[schema_type]
+        previous_items = self.previous_schema.get(schema_type) or {}
+        names[name] = None
+        self.schema_diff.compare_item(previous_items, name, entry, changes)
+
+        if name in previous_items and name not in changes['altered'] and isinstance(entry, dict) and entry.get('definition_file'):
+            unchanged.append(name)
+
+    def close(self):
+        changelog = {}
+
+        for schema_type, (changes, names, unchanged) in self.sections.items():
+            previous_items = self.previous_schema.get(schema_type) or {}
+
+            # Same entry as in the previous snapshot: compared again with the files written since
+            for name in unchanged:
+                self.schema_diff.compare_item(previous_items, name, previous_items[name], changes)
+
+            if unchanged:
+                changes['altered'] = {name: changes['altered'][name] for name in names if name in changes['altered']}
+
+            SchemaDiff.drop_missing(previous_items, names, changes)
+
+            if changes['added'] or changes['dropped'] or changes['altered']:
+                changelog[schema_type] = changes
+
+        self.changelog_exporter.save(self.db_name, changelog)
+
+        return changelog
+
+    def abort(self):
+        pass
+
+
+class DocumentationSink:
+    """
+    Add the documentation entries of each object as it is extracted, remove the entries of the dropped objects
+    and save the documentation on close.
+    """
+
+    def __init__(self, documentation_exporter):
+        self.documentation_exporter = documentation_exporter
+        self.schema_updater = documentation_exporter.schema_updater
+        self.sections = {}
+
+    def section(self, schema_type, error=None):
+        # Sections that could not be read keep their documentation
+        if error is None and schema_type in self.schema_updater.SECTIONS:
+            self.sections[schema_type] = (self.schema_updater.new_changes(), set())
+
+    def write(self, schema_type, name, entry):
+        if schema_type not in self.sections:
+            return
+
+        changes, names = self.sections[schema_type]
+        names.add(name)
+        self.schema_updater.reconcile_item(schema_type, name, entry, changes)
+
+    def close(self):
+        """
+        :return: Added and removed objects and columns by section, see SchemaUpdater.reconcile
+        """
+        report = {}
+
+        for schema_type, (changes, names) in self.sections.items():
+            self.schema_updater.remove_missing(schema_type, names, changes)
+            report[schema_type] = changes
+
+        self.documentation_exporter.save_documentation()
+
+        return report
+
+    def abort(self):
+        pass
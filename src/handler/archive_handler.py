@@ -0,0 +1,284 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import threading
+import zipfile
+
+from handler.object_store import ObjectStore, STORE_DIRECTORY, SQL_REFERENCES_FILE
+from utils.schema_diff import SchemaDiff
+
+# Archive formats and their file extension
+ARCHIVE_FORMATS = {'tar.gz': '.tar.gz', 'zip': '.zip'}
+
+
+class ArchiveWriter:
+    """
+    Single-file copy of the output (tar.gz or zip) for CI artifacts. The files of each database are streamed from
+    its output directory into the archive with the same relative layout ({database}/...). The archive is written
+    to a temporary file renamed over the target on close.
+    """
+
+    def __init__(self, path, archive_format='tar.gz'):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unsupported archive format: {archive_format} (supported: {', '.join(ARCHIVE_FORMATS)})")
+
+        self.path = path
+        self.archive_format = archive_format
+        self.temp_path = f"{path}.tmp"
+        self.count = 0
+        # The databases extracted concurrently (--jobs) are added to the same archive
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if archive_format == 'zip':
+            self.archive = zipfile.ZipFile(self.temp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(self.temp_path, 'w:gz')
+
+    def add_directory(self, directory, arcname):
+        """
+        Add the files of a directory under arcname, in name order. Temporary files are skipped.
+        :return: Number of files added
+        """
+        files = []
+
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names) if not name.endswith('.tmp'))
+
+        with self.lock:
+            for file_path in files:
+                member = f"{arcname}/" + os.path.relpath(file_path, directory).replace(os.sep, '/')
+
+                if self.archive_format == 'zip':
+                    self.archive.write(file_path, member)
+                else:
+                    self.archive.add(file_path, member, recursive=False)
+
+            self.count += len(files)
+
+        return len(files)
+
+    def close(self):
+        """
+        :return: Number of files in the archive
+        """
+        self.archive.close()
+        os.replace(self.temp_path, self.path)
+
+        return self.count
+
+    def abort(self):
+        # The archive of the previous run is left untouched
+        self.archive.close()
+
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class ArchiveReader:
+    """
+    Read an archive written with --archive without unpacking it: list, read and extract its files, load the
+    schema snapshot of a database and compare two archives.
+
+    A tar.gz can only be read sequentially: the methods reading several files read them in one pass.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_zip = zipfile.is_zipfile(path)
+        self.archive = zipfile.ZipFile(path) if self.is_zip else tarfile.open(path, 'r:*')
+
+    def close(self):
+        self.archive.close()
+
+    def names(self, patterns=None):
+        """
+        :param patterns: Globs (fnmatch) or directories ({database}/procedures), None for every file
+        :return: Files of the archive, in the archive order
+        """
+        return [name for name, _ in self.__members() if self.__matches(name, patterns)]
+
+    def databases(self):
+        return sorted({name.split('/', 1)[0] for name, _ in self.__members() if '/' in name})
+
+    def read(self, name):
+        """
+        :return: Content of a file, None if it is not in the archive. The SQL files of a deduplicated output
+        (--dedup) are rendered from the object store.
+        """
+        contents = self.read_all([name])
+
+        if name in contents:
+            return contents[name].decode('utf-8')
+
+        database, _, relative_path = name.partition('/')
+        references = self.read_all([f"{database}/{SQL_REFERENCES_FILE}"]).get(f"{database}/{SQL_REFERENCES_FILE}")
+        fingerprint = json.loads(references).get(relative_path.replace('/', os.sep)) if references else None
+
+        if not fingerprint:
+            return None
+
+        stored = self.__stored({fingerprint}, 'sql').get(fingerprint)
+        return ObjectStore.render(stored, database) if stored is not None else None
+
+    def load(self, name):
+        """
+        :return: Content of a JSON file, None if it is not in the archive
+        """
+        content = self.read(name)
+        return json.loads(content) if content is not None else None
+
+    def read_all(self, patterns=None):
+        """
+        :return: Content (bytes) of the matching files, by name
+        """
+        return {name: self.__content(member) for name, member in self.__members() if self.__matches(name, patterns)}
+
+    def extract(self, destination, patterns=None):
+        """
+        Extract the matching files under destination, with their relative path.
+        :return: Names of the files extracted
+        """
+        extracted = []
+
+        for name, member in self.__members():
+            if not self.__matches(name, patterns):
+                continue
+
+            parts = name.split('/')
+
+            # Never write outside of the destination
+            if name.startswith('/') or '..' in parts or ':' in parts[0]:
+                raise ValueError(f"Unsafe path in {self.path}: {name}")
+
+            file_path = os.path.join(destination, *parts)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            with self.__open(member) as source, open(file_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+            extracted.append(name)
+
+        return extracted
+
+    def schema(self, database):
+        """
+        Schema snapshot of a database: {database}/{database}_schema.json, the sharded snapshot
+        ({database}/schema/index.json and one file per object) or the references to the object store (--dedup).
+        :return: Schema, None if the archive has no snapshot of the database
+        """
+        sharded_dir = f"{database}/schema/"
+        references = f"{database}/{database}_schema.refs.json"
+        contents = self.read_all([f"{database}/{database}_schema.json", references, f"{sharded_dir}*"])
+
+        if f"{database}/{database}_schema.json" in contents:
+            return json.loads(contents[f"{database}/{database}_schema.json"])
+
+        if references in contents:
+            return self.__dedup_schema(database, json.loads(contents[references]))
+
+        if f"{sharded_dir}index.json" not in contents:
+            return None
+
+        schema = {}
+
+        for schema_type, section in json.loads(contents[f"{sharded_dir}index.json"]).items():
+            if 'error' in section:
+                schema[schema_type] = {'error': section['error']}
+            else:
+                schema[schema_type] = {name: json.loads(contents[sharded_dir + path]) for name, path in section['objects'].items()}
+
+        return schema
+
+    def digests(self, patterns=None):
+        """
+        :return: sha256 of the content of the matching files, by name
+        """
+        return {name: hashlib.sha256(self.__content(member)).hexdigest() for name, member in self.__members() if self.__matches(name, patterns)}
+
+    def diff_files(self, other, patterns=None):
+        """
+        Files added, removed and changed from this archive to another one.
+        """
+        before = self.digests(patterns)
+        after = other.digests(patterns)
+
+        return {
+            'added': [name for name in after if name not in before],
+            'removed': [name for name in before if name not in after],
+            'changed': [name for name, digest in after.items() if name in before and before[name] != digest]
+        }
+
+    def diff(self, other, database):
+        """
+        Changes of a database from this archive to another one, see SchemaDiff.compare. The definitions are
+        compared by the content of their SQL file.
+        """
+        prefix = f"{database}/"
+        changed_files = {name[len(prefix):] for name in self.diff_files(other, [prefix])['changed']}
+
+        # Definitions in the object store (--dedup)
+        before = self.load(f"{prefix}{SQL_REFERENCES_FILE}") or {}
+        after = other.load(f"{prefix}{SQL_REFERENCES_FILE}") or {}
+        changed_files |= {path for path, fingerprint in after.items() if path in before and before[path] != fingerprint}
+
+        return SchemaDiff(changed_files).compare(self.schema(database) or {}, other.schema(database) or {})
+
+    def __dedup_schema(self, database, index):
+        fingerprints = {
+            reference for section in index.values() for reference in section.get('objects', {}).values()
+            if not isinstance(reference, dict)
+        }
+        stored = self.__stored(fingerprints, 'json')
+        schema = {}
+
+        for schema_type, section in index.items():
+            if 'error' in section:
+                schema[schema_type] = {'error': section['error']}
+                continue
+
+            schema[schema_type] = {
+                name: reference['entry'] if isinstance(reference, dict) else json.loads(ObjectStore.render(stored[reference], database))
+                for name, reference in section['objects'].items()
+            }
+
+        return schema
+
+    def __stored(self, fingerprints, extension):
+        """
+        :return: Contents of the object store in the archive, by fingerprint
+        """
+        names = {f"{STORE_DIRECTORY}/{fingerprint[:2]}/{fingerprint}.{extension}": fingerprint for fingerprint in fingerprints}
+
+        return {names[name]: self.__content(member).decode('utf-8') for name, member in self.__members() if name in names}
+
+    def __members(self):
+        if self.is_zip:
+            return [(info.filename, info) for info in self.archive.infolist() if not info.is_dir()]
+
+        return [(member.name, member) for member in self.archive if member.isfile()]
+
+    def __open(self, member):
+        return self.archive.open(member) if self.is_zip else self.archive.extractfile(member)
+
+    def __content(self, member):
+        with self.__open(member) as f:
+            return f.read()
+
+    @staticmethod
+    def __matches(name, patterns):
+        if patterns is None:
+            return True
+
+        for pattern in patterns:
+            if any(character in pattern for character in '*?['):
+                if fnmatch.fnmatchcase(name, pattern):
+                    return True
+            elif name == pattern or name.startswith(pattern.rstrip('/') + '/'):
+                return True
+
+        return False
@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+import threading
 
 from utils.logger import Logger
 
@@ -26,8 +28,109 @@ class FileHandler:
 
     def save(self, data):
         """
-        Save data to a JSON file.
+        Save data to a JSON file. The file is left untouched if its content is the same.
+        :return: True if the file was written
         """
+        return FileHandler.write_if_changed(self.file_path, json.dumps(data, ensure_ascii=False, indent=4))
 
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+    @staticmethod
+    def write_if_changed(file_path, content):
+        """
+        Write a text file, unless it already holds the same content (compared by size, then byte by byte).
+        Unchanged files keep their modification time, so git and file watchers do not pick them up.
+        The content is written to a temporary file renamed over the target: an interrupted write never leaves
+        a truncated file.
+        :return: True if the file was written
+        """
+        # Same newline translation as a file opened in text mode
+        data = content.replace('\n', os.linesep).encode('utf-8')
+
+        if os.path.exists(file_path) and os.path.getsize(file_path) == len(data):
+            with open(file_path, 'rb') as f:
+                if f.read() == data:
+                    return False
+
+        # One temporary file per thread, the same file can be written by two threads
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return True
+
+
+class JsonStreamWriter:
+    """
+    Write a schema ({section: {name: entry}}) to a JSON file one entry at a time, with the same content as
+    FileHandler.save. The file is written next to the target and replaces it on close, unless the content is the same.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.temp_path = f"{file_path}.tmp"
+        self.file = open(self.temp_path, 'w', encoding='utf-8')
+        self.file.write("{")
+        self.sections = 0
+        # Number of entries of the open section, None if no section is open
+        self.entries = None
+
+    def section(self, schema_type, error=None):
+        self.__end_section()
+        self.file.write(("," if self.sections else "") + "\n    " + json.dumps(schema_type, ensure_ascii=False) + ": ")
+        self.sections += 1
+
+        if error is not None:
+            self.file.write(self.__dumps(error, 4))
+        else:
+            self.file.write("{")
+            self.entries = 0
+
+    def write(self, schema_type, name, entry):
+        self.file.write(("," if self.entries else "") + "\n        " + json.dumps(name, ensure_ascii=False) + ": " + self.__dumps(entry, 8))
+        self.entries += 1
+
+    def close(self):
+        """
+        :return: True if the file was written
+        """
+        self.__end_section()
+        self.file.write("\n}" if self.sections else "}")
+        self.file.close()
+
+        if os.path.exists(self.file_path) and os.path.getsize(self.file_path) == os.path.getsize(self.temp_path):
+            if self.__digest(self.file_path) == self.__digest(self.temp_path):
+                os.remove(self.temp_path)
+                return False
+
+        os.replace(self.temp_path, self.file_path)
+        return True
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.temp_path)
+
+    def __end_section(self):
+        if self.entries is not None:
+            self.file.write("\n    }" if self.entries else "}")
+            self.entries = None
+
+    @staticmethod
+    def __dumps(data, indent):
+        return json.dumps(data, ensure_ascii=False, indent=4).replace("\n", "\n" + " " * indent)
+
+    @staticmethod
+    def __digest(file_path):
+        digest = hashlib.sha256()
+
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        return digest.digest()
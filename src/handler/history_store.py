@@ -0,0 +1,328 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from utils.schema_diff import SchemaDiff
+
+SCHEMA_TYPES = ['tables', 'views', 'procedures', 'functions', 'triggers']
+
+
+class HistoryStore:
+    """
+    History of the schema snapshots in a SQLite database.
+
+    Object contents are stored once per distinct content (blobs, keyed by their sha256). Each version of an object
+    is a row of `versions` valid from the run that found it to the run that found it changed or dropped
+    (to_run, NULL while current): a run only writes the objects that changed, so the store grows with the
+    changes, not with the number of runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                host TEXT
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                content BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS versions (
+                id INTEGER PRIMARY KEY,
+                database TEXT NOT NULL,
+                type TEXT NOT NULL,
+                name TEXT NOT NULL,
+                hash TEXT NOT NULL REFERENCES blobs (hash),
+                from_run INTEGER NOT NULL REFERENCES runs (id),
+                to_run INTEGER REFERENCES runs (id)
+            );
+            CREATE INDEX IF NOT EXISTS versions_name ON versions (name, type);
+            CREATE INDEX IF NOT EXISTS versions_type ON versions (type, database);
+            CREATE INDEX IF NOT EXISTS versions_current ON versions (database, to_run);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def start_run(self, host=None):
+        """
+        :return: Identifier of the new run
+        """
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started_at, host) VALUES (?, ?)",
+                (datetime.datetime.now().isoformat(timespec='seconds'), host)
+            )
+
+        return cursor.lastrowid
+
+    def record(self, run_id, database, schema, base_dir=None):
+        """
+        Record the schema of a database extracted by a run, in one transaction.
+        Sections and objects that could not be read keep their current version.
+        :param base_dir: Output directory of the database, the SQL files (definition_file) are stored with their object
+        :return: Number of objects added, changed and dropped
+        """
+        recorder = self.recorder(run_id, database, base_dir)
+
+        for schema_type in SCHEMA_TYPES:
+            items = schema.get(schema_type) or {}
+
+            if isinstance(items.get('error'), str):
+                recorder.section(schema_type, items)
+                continue
+
+            recorder.section(schema_type)
+
+            for name, item in items.items():
+                recorder.write(schema_type, name, item)
+
+        return recorder.close()
+
+    def recorder(self, run_id, database, base_dir=None, read_file=None):
+        """
+        Recorder of the objects of a database as they are extracted, see HistoryRecorder.
+        :param read_file: Reads a definition file (path relative to base_dir), the files are read from base_dir if not given
+        """
+        return HistoryRecorder(self, run_id, database, base_dir, read_file)
+
+    def current_versions(self, database):
+        """
+        :return: Identifier and content hash of the current version of each object, by (type, name)
+        """
+        with self.lock:
+            return {
+                (schema_type, name): (version_id, content_hash)
+                for version_id, schema_type, name, content_hash in self.connection.execute(
+                    "SELECT id, type, name, hash FROM versions WHERE database = ? AND to_run IS NULL", (database,)
+                )
+            }
+
+    def content(self, item, base_dir=None, read_file=None):
+        """
+        :return: Encoded content of an object version and its hash
+        """
+        content = self.__encode(self.__with_definition(item, base_dir, read_file))
+
+        return content, hashlib.sha256(content).hexdigest()
+
+    def save_blobs(self, blobs):
+        """
+        :param blobs: (hash, content) of the object versions
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)",
+                [(content_hash, zlib.compress(content)) for content_hash, content in blobs]
+            )
+
+    def save_versions(self, run_id, database, versions, closed):
+        """
+        Save the new versions of a run in one transaction.
+        :param versions: (type, name, hash, identifier of the version replaced or None)
+        :param closed: Identifiers of the versions of the dropped objects
+        """
+        with self.lock, self.connection:
+            for schema_type, name, content_hash, replaced in versions:
+                if replaced is not None:
+                    self.connection.execute("UPDATE versions SET to_run = ? WHERE id = ?", (run_id, replaced))
+
+                self.connection.execute(
+                    "INSERT INTO versions (database, type, name, hash, from_run) VALUES (?, ?, ?, ?, ?)",
+                    (database, schema_type, name, content_hash, run_id)
+                )
+
+            for version_id in closed:
+                self.connection.execute("UPDATE versions SET to_run = ? WHERE id = ?", (run_id, version_id))
+
+    def runs(self):
+        """
+        :return: Runs, oldest first
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT id, started_at, host FROM runs ORDER BY id").fetchall()
+
+        return [{'run': run_id, 'started_at': started_at, 'host': host} for run_id, started_at, host in rows]
+
+    def history(self, name, schema_type=None, database=None, column=None):
+        """
+        Versions of an object, oldest first.
+        :param column: Only the versions where this column was added, changed or dropped
+        :return: List of versions with their validity (from_run included, to_run excluded) and content
+        """
+        query = """
+            SELECT v.database, v.type, v.name, v.from_run, r.started_at, v.to_run, b.content
+            FROM versions v
+            JOIN runs r ON r.id = v.from_run
+            JOIN blobs b ON b.hash = v.hash
+            WHERE v.name = ?
+        """
+        parameters = [name]
+
+        if schema_type:
+            query += " AND v.type = ?"
+            parameters.append(schema_type)
+
+        if database:
+            query += " AND v.database = ?"
+            parameters.append(database)
+
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY v.database, v.type, v.from_run", parameters).fetchall()
+
+        versions = [
+            {
+                'database': row[0], 'type': row[1], 'name': row[2],
+                'from_run': row[3], 'from_date': row[4], 'to_run': row[5],
+                'content': self.__decode(row[6])
+            }
+            for row in rows
+        ]
+
+        if column is None:
+            return versions
+
+        filtered = []
+        previous = {}
+
+        for version in versions:
+            key = (version['database'], version['type'])
+            content = version['content'] if isinstance(version['content'], dict) else {}
+            value = (content.get('columns') or {}).get(column)
+
+            if value != previous.get(key):
+                filtered.append(version)
+
+            previous[key] = value
+
+        return filtered
+
+    def snapshot(self, run_id, database):
+        """
+        :return: Schema of a database as of a run
+        """
+        schema = {schema_type: {} for schema_type in SCHEMA_TYPES}
+
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT v.type, v.name, b.content
+                FROM versions v
+                JOIN blobs b ON b.hash = v.hash
+                WHERE v.database = ? AND v.from_run <= ? AND (v.to_run IS NULL OR v.to_run > ?)
+                ORDER BY v.id
+            """, (database, run_id, run_id)).fetchall()
+
+        for schema_type, name, content in rows:
+            schema[schema_type][name] = self.__decode(content)
+
+        return schema
+
+    def diff(self, database, from_run, to_run):
+        """
+        :return: Changelog of a database between two runs, see SchemaDiff.compare
+        """
+        return SchemaDiff().compare(self.snapshot(from_run, database), self.snapshot(to_run, database))
+
+    @staticmethod
+    def __with_definition(item, base_dir, read_file=None):
+        # The definitions are saved in SQL files, their content is part of the object version
+        if not base_dir or not isinstance(item, dict) or not item.get('definition_file'):
+            return item
+
+        if read_file is not None:
+            definition = read_file(item['definition_file'])
+            return {**item, 'definition': definition} if definition is not None else item
+
+        file_path = os.path.join(base_dir, item['definition_file'])
+
+        if not os.path.exists(file_path):
+            return item
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return {**item, 'definition': f.read()}
+
+    @staticmethod
+    def __encode(item):
+        return json.dumps(item, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+    @staticmethod
+    def __decode(content):
+        return json.loads(zlib.decompress(content).decode('utf-8'))
+
+
+class HistoryRecorder:
+    """
+    Record the objects of a database one at a time, as they are extracted: the contents are saved as they arrive,
+    the versions in one transaction on close. Only the hashes of the changed objects are kept in the meantime.
+    """
+
+    # Contents saved per transaction
+    BATCH_SIZE = 200
+
+    def __init__(self, store, run_id, database, base_dir=None, read_file=None):
+        self.store = store
+        self.run_id = run_id
+        self.database = database
+        self.base_dir = base_dir
+        self.read_file = read_file
+        self.current = store.current_versions(database)
+        self.versions = []
+        self.blobs = []
+        # Names of the objects found in each section that could be read
+        self.seen = {}
+        self.counts = {'added': 0, 'changed': 0, 'dropped': 0}
+
+    def section(self, schema_type, error=None):
+        if error is None:
+            self.seen[schema_type] = set()
+
+    def write(self, schema_type, name, item):
+        if schema_type not in self.seen:
+            return
+
+        self.seen[schema_type].add(name)
+
+        # Objects that could not be read keep their current version
+        if isinstance(item, dict) and 'error' in item:
+            return
+
+        content, content_hash = self.store.content(item, self.base_dir, self.read_file)
+        version = self.current.get((schema_type, name))
+
+        if version is not None and version[1] == content_hash:
+            return
+
+        self.blobs.append((content_hash, content))
+        self.versions.append((schema_type, name, content_hash, version[0] if version is not None else None))
+        self.counts['changed' if version is not None else 'added'] += 1
+
+        if len(self.blobs) >= self.BATCH_SIZE:
+            self.store.save_blobs(self.blobs)
+            self.blobs = []
+
+    def close(self):
+        """
+        :return: Number of objects added, changed and dropped
+        """
+        closed = [
+            version_id for (schema_type, name), (version_id, _) in self.current.items()
+            if schema_type in self.seen and name not in self.seen[schema_type]
+        ]
+        self.counts['dropped'] = len(closed)
+        self.store.save_blobs(self.blobs)
+        self.blobs = []
+        self.store.save_versions(self.run_id, self.database, self.versions, closed)
+
+        return self.counts
+
+    def abort(self):
+        pass
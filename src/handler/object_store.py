@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+
+from handler.file_handler import FileHandler
+
+# Stands for the database name in the stored contents
+PLACEHOLDER = '{{database}}'
+# Directory of the store in the output directory
+STORE_DIRECTORY = '_objects'
+# Fingerprints of the SQL files of a database, by relative path
+SQL_REFERENCES_FILE = 'sql.refs.json'
+
+
+class ObjectStore:
+    """
+    Content-addressed store shared by the databases of an output directory (--dedup): each distinct object is
+    saved once as _objects/<2 first characters>/<fingerprint>.<sql|json>.
+
+    The name of the database is replaced by a placeholder when it is quoted (`db`, [db], "db"), so the same
+    object in two databases has the same content. The fingerprint of a SQL definition also ignores the whitespace:
+    a database whose definition only differs by its formatting gets the fingerprint of the stored one, and keeps its
+    own copy of the definition (override).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Stored contents by fingerprint, read or written during the run
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def put(self, content, database, extension):
+        """
+        Save a content, unless an equivalent one is already stored.
+        :return: Fingerprint, and True if the stored content rendered for the database is the same as content
+        """
+        template = self.template(content, database)
+        fingerprint = self.fingerprint(template, extension)
+        stored = self.__stored(fingerprint, extension)
+
+        if stored is None:
+            os.makedirs(os.path.join(self.directory, fingerprint[:2]), exist_ok=True)
+            FileHandler.write_if_changed(self.__path(fingerprint, extension), template)
+
+            with self.lock:
+                stored = self.cache.setdefault(fingerprint, template)
+
+        return fingerprint, self.render(stored, database) == content
+
+    def get(self, fingerprint, database, extension):
+        """
+        :return: Stored content rendered for the database, None if it is not in the store
+        """
+        stored = self.__stored(fingerprint, extension)
+        return self.render(stored, database) if stored is not None else None
+
+    def put_entry(self, entry, database):
+        """
+        Save a schema entry, see put. The keys keep their order (columns are in their table order).
+        """
+        return self.put(json.dumps(entry, ensure_ascii=False, separators=(',', ':')), database, 'json')
+
+    def get_entry(self, fingerprint, database):
+        content = self.get(fingerprint, database, 'json')
+        return json.loads(content) if content is not None else None
+
+    @staticmethod
+    def template(content, database):
+        if PLACEHOLDER in content:
+            # Cannot be rendered back, stored as is (the database keeps an override)
+            return content
+
+        return re.sub(r'(?<=[`\["])' + re.escape(database) + r'(?=[`\]"])', PLACEHOLDER, content)
+
+    @staticmethod
+    def render(template, database):
+        return template.replace(PLACEHOLDER, database)
+
+    @staticmethod
+    def fingerprint(template, extension):
+        if extension == 'sql':
+            template = ' '.join(template.split())
+
+        return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+    def drift(self, output_dir):
+        """
+        Objects that are not the same in every database of a deduplicated output: variants of each object,
+        by the fingerprints of its entry and of its definition.
+        :return: {schema_type: {name: {variant: [databases]}}}
+        """
+        variants = {}
+
+        for database in sorted(os.listdir(output_dir)):
+            index = FileHandler(os.path.join(output_dir, database, f"{database}_schema.refs.json")).load()
+
+            if index is None:
+                continue
+
+            files = FileHandler(os.path.join(output_dir, database, SQL_REFERENCES_FILE)).load() or {}
+
+            for schema_type, section in index.items():
+                for name, reference in section.get('objects', {}).items():
+                    fingerprint = reference['fingerprint'] if isinstance(reference, dict) else reference
+                    entry = reference['entry'] if isinstance(reference, dict) else self.get_entry(reference, database)
+                    definition = files.get(entry.get('definition_file')) if isinstance(entry, dict) else None
+                    variant = fingerprint[:12] + (f"/{definition[:12]}" if definition else "")
+                    variants.setdefault(schema_type, {}).setdefault(name, {}).setdefault(variant, []).append(database)
+
+        drift = {}
+
+        for schema_type, objects in variants.items():
+            changed = {name: found for name, found in objects.items() if len(found) > 1}
+
+            if changed:
+                drift[schema_type] = changed
+
+        return drift
+
+    def __stored(self, fingerprint, extension):
+        with self.lock:
+            if fingerprint in self.cache:
+                return self.cache[fingerprint]
+
+        file_path = self.__path(fingerprint, extension)
+
+        if not os.path.exists(file_path):
+            return None
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        with self.lock:
+            return self.cache.setdefault(fingerprint, content)
+
+    def __path(self, fingerprint, extension):
+        return os.path.join(self.directory, fingerprint[:2], f"{fingerprint}.{extension}")
+
+
+class DedupSchemaHandler:
+    """
+    Schema snapshot of a database in the object store (--dedup): {db}_schema.refs.json only holds the fingerprint
+    of each object, and the entries that cannot be rendered from the store (override).
+    """
+
+    def __init__(self, file_path, store, database):
+        self.file_path = file_path
+        self.store = store
+        self.database = database
+
+    def load(self):
+        """
+        Load the snapshot, each object is read from the store when it is accessed.
+        If the snapshot doesn't exist, return None.
+        """
+        index = FileHandler(self.file_path).load()
+
+        if index is None:
+            return None
+
+        schema = {}
+
+        for schema_type, section in index.items():
+            if 'error' in section:
+                schema[schema_type] = {'error': section['error']}
+            else:
+                schema[schema_type] = LazyStoreSection(self.store, self.database, section['objects'])
+
+        return schema
+
+    def writer(self):
+        return DedupSchemaWriter(self)
+
+    def save_index(self, index):
+        """
+        :return: True if the file was written
+        """
+        return FileHandler(self.file_path).save(index)
+
+
+class DedupSchemaWriter:
+    """
+    Save the objects of a database in the store as they are extracted, the references are saved on close.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.index = {}
+
+    def section(self, schema_type, error=None):
+        self.index[schema_type] = {'error': error['error']} if error is not None else {'objects': {}}
+
+    def write(self, schema_type, name, entry):
+        fingerprint, exact = self.handler.store.put_entry(entry, self.handler.database)
+        self.index[schema_type]['objects'][name] = fingerprint if exact else {'fingerprint': fingerprint, 'entry': entry}
+
+    def close(self):
+        """
+        :return: True if the references changed
+        """
+        return self.handler.save_index(self.index)
+
+    def abort(self):
+        # The references of the previous snapshot are kept, their objects are still in the store
+        pass
+
+
+class LazyStoreSection(Mapping):
+    """
+    Section of a deduplicated snapshot, an object is read from the store on first access.
+    """
+
+    def __init__(self, store, database, references):
+        self.store = store
+        self.database = database
+        self.references = references
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            reference = self.references[name]
+            self.cache[name] = reference['entry'] if isinstance(reference, dict) else self.store.get_entry(reference, self.database)
+
+        return self.cache[name]
+
+    def __iter__(self):
+        return iter(self.references)
+
+    def __len__(self):
+        return len(self.references)
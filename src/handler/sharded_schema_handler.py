@@ -0,0 +1,156 @@
+import os
+from collections.abc import Mapping
+
+from handler.file_handler import FileHandler
+
+
+class ShardedSchemaHandler:
+    """
+    Schema snapshot written as one JSON file per object (<type>/<name>.json) and an index.json listing them,
+    instead of one large {db}_schema.json. Unchanged objects keep their file untouched.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+
+    def load(self):
+        """
+        Load the snapshot. Only the index is read, each object is read when it is accessed.
+        If the snapshot doesn't exist, return None.
+        """
+        index = FileHandler(self.index_path).load()
+
+        if index is None:
+            return None
+
+        schema = {}
+
+        for schema_type, section in index.items():
+            if 'error' in section:
+                schema[schema_type] = {'error': section['error']}
+            else:
+                schema[schema_type] = LazySchemaSection(self.directory, section['objects'])
+
+        return schema
+
+    def save(self, schema):
+        """
+        Save one file per object, remove the files of the objects that no longer exist, then save the index.
+        :return: True if a file was written or removed
+        """
+        writer = self.writer()
+
+        for schema_type, section in schema.items():
+            if isinstance(section.get('error'), str):
+                writer.section(schema_type, section)
+                continue
+
+            writer.section(schema_type)
+
+            for name, entry in section.items():
+                writer.write(schema_type, name, entry)
+
+        return writer.close()
+
+    def writer(self):
+        """
+        Writer saving the objects one at a time, see ShardedSchemaWriter.
+        """
+        return ShardedSchemaWriter(self)
+
+    def save_object(self, schema_type, name, entry):
+        """
+        :return: Path of the object file relative to the snapshot directory, and True if the file was written
+        """
+        folder_path = os.path.join(self.directory, schema_type)
+        os.makedirs(folder_path, exist_ok=True)
+        file_name = self.__file_name(name)
+
+        return f"{schema_type}/{file_name}", FileHandler(os.path.join(folder_path, file_name)).save(entry)
+
+    def save_index(self, index):
+        """
+        Remove the files of the objects that are not in the index, then save it.
+        :return: True if a file was written or removed
+        """
+        changed = False
+
+        for schema_type, section in index.items():
+            if 'objects' in section:
+                folder_path = os.path.join(self.directory, schema_type)
+                os.makedirs(folder_path, exist_ok=True)
+                changed |= self.__remove_stale(folder_path, {os.path.basename(path) for path in section['objects'].values()})
+
+        os.makedirs(self.directory, exist_ok=True)
+        changed |= FileHandler(self.index_path).save(index)
+
+        return changed
+
+    def __remove_stale(self, folder_path, expected_files):
+        removed = False
+
+        for file_name in os.listdir(folder_path):
+            if file_name.endswith('.json') and file_name not in expected_files:
+                os.remove(os.path.join(folder_path, file_name))
+                removed = True
+
+        return removed
+
+    def __file_name(self, name):
+        safe_name = name.replace('`', '').replace('/', '_')
+        return f"{safe_name}.json"
+
+
+class ShardedSchemaWriter:
+    """
+    Save a sharded snapshot one object at a time, as the objects are extracted. The index is saved on close.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.index = {}
+        self.changed = False
+
+    def section(self, schema_type, error=None):
+        # Sections that could not be read keep their files until the next successful extraction
+        self.index[schema_type] = {'error': error['error']} if error is not None else {'objects': {}}
+
+    def write(self, schema_type, name, entry):
+        relative_path, written = self.handler.save_object(schema_type, name, entry)
+        self.index[schema_type]['objects'][name] = relative_path
+        self.changed |= written
+
+    def close(self):
+        """
+        :return: True if a file was written or removed
+        """
+        return self.handler.save_index(self.index) or self.changed
+
+    def abort(self):
+        # The index is not saved: it still lists the objects of the previous snapshot
+        pass
+
+
+class LazySchemaSection(Mapping):
+    """
+    Section of a sharded snapshot (tables, views...), the file of an object is read on first access.
+    """
+
+    def __init__(self, directory, files):
+        self.directory = directory
+        self.files = files
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            relative_path = self.files[name]
+            self.cache[name] = FileHandler(os.path.join(self.directory, *relative_path.split('/'))).load()
+
+        return self.cache[name]
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
@@ -1,6 +1,7 @@
 import logging
 import os
 import sys
+import threading
 
 class Logger:
     grey = "\x1b[38;20m"
@@ -12,46 +13,54 @@ class Logger:
     green = "\x1b[32;20m"
     reset = "\x1b[0m"
 
+    # Lines written by several threads are not interleaved
+    lock = threading.RLock()
+    # A progress line is drawn without its end of line, it is ended before the next message
+    progress_pending = False
+
     @staticmethod
     def Info(message):
-        print("") # Reason? --> sys.stdout.flush() in progress bar
-        print(Logger.cyan + "[INFO] " + Logger.reset + message)
+        Logger.__print(Logger.cyan + "[INFO] " + Logger.reset + message)
 
     @staticmethod
     def Debug(message):
-        print("") # Reason? --> sys.stdout.flush() in progress bar
-        print(Logger.purple + "[DEBUG] " + Logger.reset + message)
+        Logger.__print(Logger.purple + "[DEBUG] " + Logger.reset + message)
 
     @staticmethod
     def Warning(message):
-        print("") # Reason? --> sys.stdout.flush() in progress bar
-        print(Logger.yellow + "[WARNING] " + Logger.reset + message)
+        Logger.__print(Logger.yellow + "[WARNING] " + Logger.reset + message)
 
     @staticmethod
     def Error(message):
-        print("") # Reason? --> sys.stdout.flush() in progress bar
-        print(Logger.red + "[ERROR] " + Logger.reset + message)
+        Logger.__print(Logger.red + "[ERROR] " + Logger.reset + message)
 
     @staticmethod
     def Critical(message):
-        print("") # Reason? --> sys.stdout.flush() in progress bar
-        print(Logger.bold_red + "[CRITICAL] " + Logger.reset +  message)
+        Logger.__print(Logger.bold_red + "[CRITICAL] " + Logger.reset + message)
 
     @staticmethod
-    def ProgressBar(iteration, total, bar_length=100):
-        iteration += 1
-
-        if total < iteration:
-            print("")
-            Logger.Critical("Number of iterations is less than the total number of iterations.")
-            return
+    def __print(line):
+        with Logger.lock:
+            Logger.EndProgress()
+            print(line)
 
-        percent = float(iteration) / float(total)
-        arrow = '-' * int(round(percent * bar_length) - 1)
-        spaces = ' ' * (bar_length - len(arrow))
+    @staticmethod
+    def Progress(line):
+        """
+        Draw a progress line over the previous one (terminal output).
+        """
+        with Logger.lock:
+            sys.stdout.write(f"\r{line}\x1b[K")
+            sys.stdout.flush()
+            Logger.progress_pending = True
 
-        sys.stdout.write(f"\rProgress: \x1b[32;20m[{arrow}{spaces}]\x1b[0m {int(percent * 100)}% - {iteration}/{total}")
-        sys.stdout.flush()
+    @staticmethod
+    def EndProgress():
+        """
+        End the progress line, the next message is written below it.
+        """
+        with Logger.lock:
+            if Logger.progress_pending:
+                print("")
+                Logger.progress_pending = False
 
-        if iteration == total:
-            print("")
@@ -0,0 +1,213 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+
+class Metrics:
+    """
+    Query and phase timings of a run: every query of the instrumented engines is timed and grouped by shape
+    (statement without its literals), and the extractors time each phase of a database.
+    """
+
+    SHAPE_PATTERNS = [
+        (re.compile(r"'(?:[^']|'')*'"), "?"),
+        (re.compile(r"`(?:[^`]|``)*`"), "?"),
+        (re.compile(r"\[(?:[^\]]|\]\])*\]"), "?"),
+        (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+        (re.compile(r"\s+"), " "),
+        (re.compile(r"\(\s*(?:\?|%\(\w+\)s)(?:\s*,\s*(?:\?|%\(\w+\)s))*\s*\)"), "(...)"),
+    ]
+
+    def __init__(self):
+        self.queries = {}
+        self.phases = {}
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def attach(self, engine, server):
+        """
+        Time every query of an engine.
+        :param engine: Engine of the server
+        :param server: Label of the server in the report
+        """
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            duration = time.perf_counter() - conn.info['metrics_query_start'].pop()
+            # rowcount is -1 when the driver does not know it before the rows are fetched (pyodbc SELECT)
+            rows = cursor.rowcount if cursor.rowcount >= 0 else None
+            self.add_query(server, statement, duration, rows)
+
+    def add_query(self, server, statement, duration, rows=0):
+        """
+        :param rows: Rows returned, None if unknown: the rows of the shape are then reported as unknown
+        """
+        shape = self.shape(statement)
+
+        with self.lock:
+            entry = self.queries.setdefault(server, {}).setdefault(shape, {'durations': [], 'rows': 0})
+            entry['durations'].append(duration)
+            entry['rows'] = entry['rows'] + rows if rows is not None and entry['rows'] is not None else None
+
+    def add_phase(self, server, database, phase, duration):
+        with self.lock:
+            phases = self.phases.setdefault(database, {'server': server, 'phases': {}})['phases']
+            phases[phase] = phases.get(phase, 0.0) + duration
+
+    def phase_timer(self, server, database):
+        return PhaseTimer(self, server, database)
+
+    @staticmethod
+    def shape(statement):
+        """
+        Shape of a statement: literals and identifiers replaced by ?, whitespace normalized.
+        """
+        for pattern, replacement in Metrics.SHAPE_PATTERNS:
+            statement = pattern.sub(replacement, statement)
+
+        return statement.strip()
+
+    def report(self):
+        """
+        :return: Run duration, queries by server and shape (count, total and percentile latencies, rows or None if
+        the driver does not report them), phases by database
+        """
+        with self.lock:
+            servers = {}
+
+            for server, shapes in self.queries.items():
+                shape_reports = []
+
+                for shape, entry in shapes.items():
+                    durations = sorted(entry['durations'])
+                    shape_reports.append({
+                        'shape': shape,
+                        'count': len(durations),
+                        'total': round(sum(durations), 6),
+                        'p50': round(self.__percentile(durations, 50), 6),
+                        'p95': round(self.__percentile(durations, 95), 6),
+                        'p99': round(self.__percentile(durations, 99), 6),
+                        'rows': entry['rows']
+                    })
+
+                shape_reports.sort(key=lambda item: item['total'], reverse=True)
+                servers[server] = {
+                    'query_count': sum(item['count'] for item in shape_reports),
+                    'total': round(sum(item['total'] for item in shape_reports), 6),
+                    'rows': self.__total_rows(shape_reports),
+                    'shapes': shape_reports
+                }
+
+            databases = {
+                database: {
+                    'server': entry['server'],
+                    'total': round(sum(entry['phases'].values()), 6),
+                    'phases': {phase: round(duration, 6) for phase, duration in entry['phases'].items()}
+                }
+                for database, entry in self.phases.items()
+            }
+
+        return {
+            'duration': round(time.perf_counter() - self.started, 6),
+            'servers': servers,
+            'databases': databases
+        }
+
+    def save_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=4)
+
+    def save_prometheus(self, file_path):
+        """
+        Save the metrics in the Prometheus text format, for the node_exporter textfile collector.
+        The file is replaced atomically, so the collector never reads a partial file.
+        """
+        report = self.report()
+        lines = [
+            "# HELP db_trackchanges_run_seconds Duration of the run.",
+            "# TYPE db_trackchanges_run_seconds gauge",
+            f"db_trackchanges_run_seconds {report['duration']}",
+            "# HELP db_trackchanges_queries Number of queries by server and shape.",
+            "# TYPE db_trackchanges_queries gauge",
+            "# HELP db_trackchanges_query_seconds Latency of the queries by server and shape.",
+            "# TYPE db_trackchanges_query_seconds summary",
+            "# HELP db_trackchanges_query_rows Rows returned by server and shape.",
+            "# TYPE db_trackchanges_query_rows gauge",
+            "# HELP db_trackchanges_phase_seconds Duration of each extraction phase by database.",
+            "# TYPE db_trackchanges_phase_seconds gauge",
+        ]
+
+        for server, server_report in report['servers'].items():
+            for item in server_report['shapes']:
+                labels = f'server="{self.__label(server)}",shape="{self.__label(item["shape"][:200])}"'
+                lines.append(f"db_trackchanges_queries{{{labels}}} {item['count']}")
+
+                if item['rows'] is not None:
+                    lines.append(f"db_trackchanges_query_rows{{{labels}}} {item['rows']}")
+
+                for quantile in ['50', '95', '99']:
+                    lines.append(f'db_trackchanges_query_seconds{{{labels},quantile="0.{quantile}"}} {item["p" + quantile]}')
+
+                lines.append(f"db_trackchanges_query_seconds_sum{{{labels}}} {item['total']}")
+                lines.append(f"db_trackchanges_query_seconds_count{{{labels}}} {item['count']}")
+
+        for database, database_report in report['databases'].items():
+            for phase, duration in database_report['phases'].items():
+                labels = f'server="{self.__label(database_report["server"])}",database="{self.__label(database)}",phase="{phase}"'
+                lines.append(f"db_trackchanges_phase_seconds{{{labels}}} {duration}")
+
+        temporary_path = f"{file_path}.tmp"
+
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        os.replace(temporary_path, file_path)
+
+    @staticmethod
+    def __percentile(durations, percent):
+        # Nearest-rank percentile of sorted durations
+        if not durations:
+            return 0.0
+
+        rank = max(math.ceil(percent / 100 * len(durations)) - 1, 0)
+        return durations[rank]
+
+    @staticmethod
+    def __total_rows(shape_reports):
+        rows = [item['rows'] for item in shape_reports]
+        return sum(rows) if None not in rows else None
+
+    @staticmethod
+    def __label(value):
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PhaseTimer:
+    """
+    Time the successive phases of the extraction of a database: starting a phase ends the previous one.
+    """
+
+    def __init__(self, metrics, server, database):
+        self.metrics = metrics
+        self.server = server
+        self.database = database
+        self.phase = None
+        self.started = None
+
+    def start(self, phase):
+        self.stop()
+        self.phase = phase
+        self.started = time.perf_counter()
+
+    def stop(self):
+        if self.phase is not None:
+            self.metrics.add_phase(self.server, self.database, self.phase, time.perf_counter() - self.started)
+            self.phase = None
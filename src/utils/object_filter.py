@@ -0,0 +1,127 @@
+import fnmatch
+import re
+
+
+class ObjectFilter:
+    """
+    Include / exclude rules on names. A rule is a glob pattern (`tmp_*`, case-insensitive) or a regular expression
+    prefixed with `re:`. A rule with a dot (`audit.*`) matches `schema.name`, otherwise the name alone.
+    A name is kept if it matches one of the include rules (or there are none) and none of the exclude rules.
+    """
+
+    REGEX_PREFIX = 're:'
+
+    def __init__(self, include=None, exclude=None):
+        self.include = [self.__compile(rule) for rule in include or []]
+        self.exclude = [self.__compile(rule) for rule in exclude or []]
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def allows(self, name, schema=None):
+        """
+        :param name: Name of the database or of the object
+        :param schema: Schema of the object (the database for MySQL)
+        """
+        if self.include and not any(self.__matches(rule, name, schema) for rule in self.include):
+            return False
+
+        return not any(self.__matches(rule, name, schema) for rule in self.exclude)
+
+    def sql_condition(self, name_column, schema_column=None, schema=None, escape=None):
+        """
+        Translate the glob rules into a SQL condition, so that the excluded objects are not listed. Regular
+        expressions and character classes cannot be translated: the rows are still checked with allows().
+        The names are compared in lowercase, as allows() does, whatever the collation of the column.
+        :param name_column: Column (or expression) of the object name
+        :param schema_column: Column of the schema, None if the schema is known (MySQL: the database)
+        :param schema: Known schema, matched here against the schema part of the rules
+        :param escape: Escape clause of the LIKE patterns (SQL Server), the default escape character is \\ otherwise
+        :return: Condition and its bind parameters, None if no rule can be translated
+        """
+        conditions = []
+        parameters = {}
+
+        def like(column, pattern):
+            key = f"filter_{len(parameters)}"
+            parameters[key] = self.__like_pattern(pattern.lower())
+            return f"LOWER({column}) LIKE :{key}" + (f" ESCAPE '{escape}'" if escape else "")
+
+        def rule_condition(rule):
+            """
+            Condition of a rule, True if it always matches, False if it never does.
+            """
+            schema_pattern, name_pattern = rule['schema'], rule['name']
+
+            if schema_pattern is not None and schema_column is None:
+                if not fnmatch.fnmatch((schema or '').lower(), schema_pattern.lower()):
+                    return False
+
+                schema_pattern = None
+
+            if name_pattern == '*' and schema_pattern is None:
+                return True
+
+            parts = [] if name_pattern == '*' else [like(name_column, name_pattern)]
+
+            if schema_pattern is not None:
+                parts.insert(0, like(schema_column, schema_pattern))
+
+            return " AND ".join(parts)
+
+        # Include rules are OR-ed: they can only be translated if all of them can
+        if self.include and all(rule['regex'] is None and rule['translatable'] for rule in self.include):
+            alternatives = [rule_condition(rule) for rule in self.include]
+
+            if True in alternatives:
+                # One rule keeps every row: the patterns of the others are not bound
+                parameters.clear()
+            else:
+                alternatives = [alternative for alternative in alternatives if alternative is not False]
+                conditions.append("(" + " OR ".join(f"({alternative})" for alternative in alternatives) + ")" if alternatives else "1 = 0")
+
+        for rule in self.exclude:
+            if rule['regex'] is not None or not rule['translatable']:
+                continue
+
+            condition = rule_condition(rule)
+
+            if condition is True:
+                conditions.append("1 = 0")
+            elif condition is not False:
+                conditions.append(f"NOT ({condition})")
+
+        if not conditions:
+            return None, {}
+
+        return " AND ".join(conditions), parameters
+
+    def __compile(self, rule):
+        if rule.startswith(self.REGEX_PREFIX):
+            return {'regex': re.compile(rule[len(self.REGEX_PREFIX):]), 'schema': None, 'name': None, 'translatable': False}
+
+        schema_pattern, _, name_pattern = rule.rpartition('.')
+
+        return {
+            'regex': None,
+            'schema': schema_pattern if '.' in rule else None,
+            'name': name_pattern,
+            # LIKE has no character classes
+            'translatable': '[' not in rule
+        }
+
+    @staticmethod
+    def __matches(rule, name, schema):
+        if rule['regex'] is not None:
+            qualified = f"{schema}.{name}" if schema is not None else name
+            return bool(rule['regex'].fullmatch(name) or rule['regex'].fullmatch(qualified))
+
+        if rule['schema'] is not None:
+            return schema is not None and fnmatch.fnmatch(schema.lower(), rule['schema'].lower()) and fnmatch.fnmatch(name.lower(), rule['name'].lower())
+
+        return fnmatch.fnmatch(name.lower(), rule['name'].lower())
+
+    @staticmethod
+    def __like_pattern(pattern):
+        escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return escaped.replace('*', '%').replace('?', '_')
@@ -0,0 +1,145 @@
+import sys
+import threading
+import time
+
+from utils.logger import Logger
+
+
+class Progress:
+    """
+    Progress of a run at object granularity, shared by every worker. The objects are counted as they are listed,
+    the line is redrawn at most every `interval` seconds on a terminal, otherwise (CI logs) a structured
+    line is logged every `log_interval` seconds.
+    """
+
+    BAR_LENGTH = 40
+
+    def __init__(self, databases=0, interval=0.2, log_interval=10.0, tty=None):
+        """
+        :param databases: Number of databases of the run
+        :param interval: Minimum delay between two redraws on a terminal, in seconds
+        :param log_interval: Delay between two logged lines when the output is not a terminal, in seconds
+        :param tty: Output is a terminal, detected from stdout if not given
+        """
+        self.databases = databases
+        self.databases_started = 0
+        self.databases_done = 0
+        self.objects = 0
+        self.objects_done = 0
+        self.tty = sys.stdout.isatty() if tty is None else tty
+        self.interval = interval if self.tty else log_interval
+        self.started = time.monotonic()
+        self.last_refresh = None
+        self.last_state = None
+        self.lock = threading.Lock()
+
+    def set_databases(self, databases):
+        with self.lock:
+            self.databases = databases
+
+    def start_database(self):
+        with self.lock:
+            self.databases_started += 1
+            self.__refresh()
+
+    def finish_database(self):
+        with self.lock:
+            self.databases_done += 1
+            self.__refresh(force=self.databases_done == self.databases)
+
+    def discover(self, count=1):
+        """
+        Count objects listed in a database, to be extracted.
+        """
+        with self.lock:
+            self.objects += count
+
+    def advance(self, count=1):
+        """
+        Count extracted objects.
+        """
+        with self.lock:
+            self.objects_done += count
+            self.__refresh()
+
+    def close(self):
+        with self.lock:
+            if self.last_refresh is not None and self.last_state != self.__counters():
+                self.__refresh(force=True)
+
+        if self.tty:
+            Logger.EndProgress()
+
+    def snapshot(self):
+        """
+        :return: Counters, throughput (objects per second) and estimated remaining time (seconds, None if unknown)
+        """
+        elapsed = time.monotonic() - self.started
+        rate = self.objects_done / elapsed if elapsed > 0 else 0.0
+        total = self.__estimated_objects()
+        eta = (total - self.objects_done) / rate if rate > 0 else None
+
+        return {
+            'databases': self.databases_done,
+            'databases_total': self.databases,
+            'objects': self.objects_done,
+            'objects_total': total,
+            'rate': rate,
+            'eta': eta
+        }
+
+    def __counters(self):
+        return self.databases_started, self.databases_done, self.objects, self.objects_done
+
+    def __estimated_objects(self):
+        # The databases not listed yet are assumed to be as large as the listed ones
+        if not self.databases_started:
+            return self.objects
+
+        remaining_databases = max(self.databases - self.databases_started, 0)
+        return self.objects + round(self.objects / self.databases_started * remaining_databases)
+
+    def __refresh(self, force=False):
+        now = time.monotonic()
+
+        if not force and self.last_refresh is not None and now - self.last_refresh < self.interval:
+            return
+
+        self.last_refresh = now
+        self.last_state = self.__counters()
+        state = self.snapshot()
+        eta = self.__duration(state['eta'])
+
+        if not self.tty:
+            Logger.Info(
+                f"progress databases={state['databases']}/{state['databases_total']} objects={state['objects']}/{state['objects_total']} "
+                f"rate={state['rate']:.1f}/s eta={eta}"
+            )
+            return
+
+        if state['objects_total']:
+            percent = min(state['objects'] / state['objects_total'], 1.0)
+        else:
+            percent = state['databases'] / state['databases_total'] if state['databases_total'] else 0.0
+
+        filled = int(percent * self.BAR_LENGTH)
+        bar = '#' * filled + '-' * (self.BAR_LENGTH - filled)
+
+        Logger.Progress(
+            f"Progress: {Logger.green}[{bar}]{Logger.reset} {int(percent * 100)}% - "
+            f"{state['databases']}/{state['databases_total']} databases, {state['objects']}/{state['objects_total']} objects, "
+            f"{state['rate']:.1f} objects/s, ETA {eta}"
+        )
+
+    @staticmethod
+    def __duration(seconds):
+        if seconds is None:
+            return "?"
+
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+
+        if hours:
+            return f"{hours}h{minutes:02d}m"
+
+        return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
@@ -0,0 +1,136 @@
+class SchemaDiff:
+    """
+    Compare two schema snapshots. Unchanged objects are skipped with a plain equality test (C-level, stops at the
+    first difference), only the others are compared attribute by attribute.
+    """
+
+    def __init__(self, changed_files=None):
+        # SQL files rewritten by the run (definitions are saved in files, not in the schema)
+        # Shared with the file exporter: the files are written while the objects are compared (streaming)
+        self.changed_files = changed_files if changed_files is not None else set()
+
+    def compare(self, previous, current):
+        """
+        Compare the previous snapshot with the current schema.
+        :param previous: Previous schema
+        :param current: Freshly extracted schema
+        :return: Changelog with the added, dropped and altered objects of each schema type
+        """
+        changelog = {}
+
+        for schema_type in ['tables', 'views', 'procedures', 'functions', 'triggers']:
+            previous_items = previous.get(schema_type) or {}
+            current_items = current.get(schema_type) or {}
+
+            # Sections that could not be read are not compared
+            if isinstance(previous_items.get('error'), str) or isinstance(current_items.get('error'), str):
+                continue
+
+            changes = self.new_changes()
+
+            for name, item in current_items.items():
+                self.compare_item(previous_items, name, item, changes)
+
+            self.drop_missing(previous_items, current_items, changes)
+
+            if changes['added'] or changes['dropped'] or changes['altered']:
+                changelog[schema_type] = changes
+
+        return changelog
+
+    @staticmethod
+    def new_changes():
+        return {'added': [], 'dropped': [], 'altered': {}}
+
+    def compare_item(self, previous_items, name, item, changes):
+        """
+        Compare one object of the current schema with its previous version, objects can be compared as they
+        are extracted.
+        :param previous_items: Previous section
+        :param changes: Changes of the section, see new_changes
+        """
+        if name not in previous_items:
+            changes['added'].append(name)
+            return
+
+        previous_item = previous_items[name]
+
+        # Objects that could not be read are not compared
+        if self.__is_error(previous_item) or self.__is_error(item):
+            return
+
+        if previous_item == item and not self.__definition_changed(item):
+            return
+
+        details = self.__compare_object(previous_item, item)
+
+        if details:
+            changes['altered'][name] = details
+
+    @staticmethod
+    def drop_missing(previous_items, names, changes):
+        """
+        Add the objects of the previous section that are not in the current one.
+        :param names: Names of the current section
+        """
+        changes['dropped'] = [name for name in previous_items if name not in names]
+
+    @staticmethod
+    def __is_error(item):
+        return isinstance(item, dict) and isinstance(item.get('error'), str)
+
+    def __definition_changed(self, item):
+        return isinstance(item, dict) and item.get('definition_file') in self.changed_files
+
+    def __compare_object(self, previous_item, item):
+        """
+        Compare two versions of an object: columns, indexes, foreign keys and checks by name,
+        any other attribute as a whole.
+        """
+        if not isinstance(previous_item, dict) or not isinstance(item, dict):
+            return {'entry': {'before': previous_item, 'after': item}}
+
+        details = {}
+
+        for key in self.__keys(previous_item, item):
+            before = previous_item.get(key)
+            after = item.get(key)
+
+            if key == 'columns' and isinstance(before, dict) and isinstance(after, dict):
+                changes = self.__compare_named(before, after)
+            elif key in ('indexes', 'foreign_keys', 'checks') and isinstance(before, list) and isinstance(after, list):
+                changes = self.__compare_named(self.__by_name(before), self.__by_name(after))
+            elif before != after:
+                changes = {'before': before, 'after': after}
+            else:
+                changes = None
+
+            if changes:
+                details[key] = changes
+
+        if self.__definition_changed(item):
+            details['definition'] = {'file': item['definition_file']}
+
+        return details
+
+    @staticmethod
+    def __keys(before, after):
+        """
+        Keys of both versions, in a stable order.
+        """
+        return list(after) + [key for key in before if key not in after]
+
+    def __compare_named(self, before, after):
+        changes = {
+            'added': [name for name in after if name not in before],
+            'dropped': [name for name in before if name not in after],
+            'altered': {name: {'before': before[name], 'after': value} for name, value in after.items() if name in before and before[name] != value}
+        }
+
+        if changes['added'] or changes['dropped'] or changes['altered']:
+            return changes
+
+        return None
+
+    def __by_name(self, items):
+        return {str(item.get('name')) if isinstance(item, dict) else str(item): item for item in items}
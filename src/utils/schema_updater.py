@@ -1,36 +1,102 @@
 class SchemaUpdater:
+    SECTIONS = ['tables', 'views', 'procedures', 'functions', 'triggers']
+    # Sections whose objects have documented columns
+    COLUMN_SECTIONS = ('tables', 'views')
+
     def __init__(self, documentation):
-        self.documentation = documentation
+        self.documentation = documentation or {}
+
+        for section in self.SECTIONS:
+            self.documentation.setdefault(section, {})
+
+    def reconcile(self, schema, sections=None):
+        """
+        Merge the schema into the documentation in one pass: the entries of the new objects and columns are added,
+        the entries of the dropped ones are removed. Sections (or objects) that could not be read are left untouched.
+        :param schema: JSON schema of the database
+        :param sections: Sections to reconcile, every section if not given
+        :return: Names of the added and removed objects, and of the added and removed columns by object, for each section
+        """
+        report = {}
+
+        for section in sections or self.SECTIONS:
+            items = schema.get(section)
+
+            if not isinstance(items, dict) or isinstance(items.get('error'), str):
+                continue
+
+            report[section] = self.__reconcile_section(section, items)
+
+        return report
 
     def update_or_remove(self, schema, schema_type):
         """
         Update or remove tables, procedures, functions, or triggers in the documentation.
         """
+        self.reconcile(schema, [schema_type])
+
+    @staticmethod
+    def new_changes():
+        return {'added': [], 'removed': [], 'columns_added': {}, 'columns_removed': {}}
+
+    def reconcile_item(self, section, name, item, changes):
+        """
+        Add the entries of one object and of its new columns, remove the entries of its dropped columns.
+        Objects can be reconciled as they are extracted, see remove_missing for the dropped objects.
+        :param changes: Changes of the section, see new_changes
+        """
+        documented = self.documentation[section]
+        with_columns = section in self.COLUMN_SECTIONS
+        entry = documented.get(name)
+
+        if entry is None:
+            entry = documented[name] = {'description': '', 'remarks': ''}
+            changes['added'].append(name)
+
+            if with_columns:
+                entry['columns'] = {}
+
+        if not with_columns:
+            return
+
+        columns = item.get('columns') if isinstance(item, dict) else None
+
+        # Object that could not be read: its columns are unknown, their documentation is kept
+        if not isinstance(columns, dict):
+            return
+
+        documented_columns = entry.setdefault('columns', {})
+        removed = [column for column in documented_columns if column not in columns]
+
+        for column in removed:
+            del documented_columns[column]
+
+        added = [column for column in columns if column not in documented_columns]
+
+        for column in added:
+            documented_columns[column] = {'description': '', 'remarks': ''}
+
+        if added:
+            changes['columns_added'][name] = added
+        if removed:
+            changes['columns_removed'][name] = removed
+
+    def remove_missing(self, section, names, changes):
+        """
+        Remove the entries of the objects that are no longer in the section.
+        :param names: Names of the objects of the section
+        """
+        documented = self.documentation[section]
+
+        for name in [name for name in documented if name not in names]:
+            del documented[name]
+            changes['removed'].append(name)
+
+    def __reconcile_section(self, section, items):
+        changes = self.new_changes()
+        self.remove_missing(section, items, changes)
+
+        for name, item in items.items():
+            self.reconcile_item(section, name, item, changes)
 
-        if not self.documentation:
-            self.documentation = {
-                'tables': {},
-                'views': {},
-                'procedures': {},
-                'functions': {},
-                'triggers': {}
-            }
-
-        for key in ['tables', 'views', 'procedures', 'functions', 'triggers']:
-            if schema_type == key:
-                current_items = set(schema[key].keys())
-                doc_items = set(self.documentation[key].keys())
-
-                for item in doc_items - current_items:
-                    del self.documentation[key][item]
-
-                for item_name, item_data in schema[key].items():
-                    if item_name not in self.documentation[key]:
-                        self.documentation[key][item_name] = {'description': '', 'remarks': ''}
-                        if key == 'tables' or key == 'views':
-                            self.documentation[key][item_name]['columns'] = {}
-
-                    if key == 'tables' or key == 'views':
-                        for column_name, column_data in item_data['columns'].items():
-                            if column_name not in self.documentation[key][item_name]['columns']:
-                                self.documentation[key][item_name]['columns'][column_name] = {'description': '', 'remarks': ''}
+        return changes
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from handler.archive_handler import ArchiveReader, ArchiveWriter
+from handler.sharded_schema_handler import ShardedSchemaHandler
+
+
+def table(*columns):
+    return {'columns': {name: {'type': 'int'} for name in columns}, 'primary_key': [], 'indexes': [], 'foreign_keys': [], 'checks': []}
+
+def output(directory, schema, definition):
+    os.makedirs(directory / 'views', exist_ok=True)
+    (directory / 'views' / 'totals.sql').write_text(definition, encoding='utf-8')
+    (directory / 'shop_schema.json').write_text(json.dumps(schema), encoding='utf-8')
+    # Left by an interrupted write, never archived
+    (directory / 'shop_schema.json.tmp').write_text('{', encoding='utf-8')
+
+def archive(path, directory, archive_format):
+    writer = ArchiveWriter(str(path), archive_format)
+    writer.add_directory(str(directory), 'shop')
+    return writer.close()
+
+@pytest.mark.parametrize('archive_format', ['tar.gz', 'zip'])
+def test_archive_round_trip(tmp_path, archive_format):
+    schema = {'tables': {'orders': table('id')}, 'views': {'totals': {'definition_file': 'views/totals.sql'}}}
+    output(tmp_path / 'shop', schema, 'CREATE VIEW totals AS SELECT 1;\n')
+
+    assert archive(tmp_path / 'schemas', tmp_path / 'shop', archive_format) == 2
+
+    reader = ArchiveReader(str(tmp_path / 'schemas'))
+    assert reader.names() == ['shop/shop_schema.json', 'shop/views/totals.sql']
+    assert reader.names(['shop/views']) == ['shop/views/totals.sql']
+    assert reader.names(['*.json']) == ['shop/shop_schema.json']
+    assert reader.databases() == ['shop']
+    assert reader.read('shop/views/totals.sql') == 'CREATE VIEW totals AS SELECT 1;\n'
+    assert reader.read('shop/views/missing.sql') is None
+    assert reader.schema('shop') == schema
+
+    assert reader.extract(str(tmp_path / 'restore'), ['shop/views']) == ['shop/views/totals.sql']
+    assert (tmp_path / 'restore' / 'shop' / 'views' / 'totals.sql').read_bytes() == (tmp_path / 'shop' / 'views' / 'totals.sql').read_bytes()
+    reader.close()
+
+def test_archive_diff(tmp_path):
+    before = {'tables': {'orders': table('id'), 'legacy': table('id')}, 'views': {'totals': {'definition_file': 'views/totals.sql'}}}
+    after = {'tables': {'orders': table('id', 'total')}, 'views': {'totals': {'definition_file': 'views/totals.sql'}}}
+    output(tmp_path / 'old', before, 'SELECT 1;\n')
+    output(tmp_path / 'new', after, 'SELECT 2;\n')
+    archive(tmp_path / 'old.zip', tmp_path / 'old', 'zip')
+    archive(tmp_path / 'new.tar.gz', tmp_path / 'new', 'tar.gz')
+
+    old = ArchiveReader(str(tmp_path / 'old.zip'))
+    new = ArchiveReader(str(tmp_path / 'new.tar.gz'))
+
+    assert old.diff_files(new) == {'added': [], 'removed': [], 'changed': ['shop/shop_schema.json', 'shop/views/totals.sql']}
+
+    changelog = old.diff(new, 'shop')
+    assert changelog['tables']['dropped'] == ['legacy']
+    assert changelog['tables']['altered']['orders']['columns']['added'] == ['total']
+    assert changelog['views']['altered']['totals'] == {'definition': {'file': 'views/totals.sql'}}
+    old.close()
+    new.close()
+
+def test_archive_sharded_schema(tmp_path):
+    schema = {'tables': {'orders': table('id')}, 'views': {'error': 'Insufficient privileges'}}
+    ShardedSchemaHandler(str(tmp_path / 'shop' / 'schema')).save(schema)
+    archive(tmp_path / 'schemas.tar.gz', tmp_path / 'shop', 'tar.gz')
+
+    reader = ArchiveReader(str(tmp_path / 'schemas.tar.gz'))
+    assert reader.schema('shop') == schema
+    assert reader.schema('other') is None
+    reader.close()
+
+def test_archive_abort_keeps_previous(tmp_path):
+    output(tmp_path / 'shop', {'tables': {}}, 'SELECT 1;\n')
+    archive(tmp_path / 'schemas.tar.gz', tmp_path / 'shop', 'tar.gz')
+
+    writer = ArchiveWriter(str(tmp_path / 'schemas.tar.gz'), 'tar.gz')
+    writer.abort()
+
+    assert ArchiveReader(str(tmp_path / 'schemas.tar.gz')).names() == ['shop/shop_schema.json', 'shop/views/totals.sql']
+    assert not os.path.exists(tmp_path / 'schemas.tar.gz.tmp')
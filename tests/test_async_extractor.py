@@ -0,0 +1,70 @@
+from contextlib import asynccontextmanager
+from functools import partial
+from unittest.mock import MagicMock, AsyncMock
+
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
+from database.extractor.async_extractor import AsyncSchemaExtractor
+
+
+class FakeAsyncConnection:
+    def __init__(self, name):
+        self.name = name
+
+    async def run_sync(self, fn, *args):
+        return fn(self.name, *args)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.opened = []
+        self.engine = MagicMock()
+        self.engine.dispose = AsyncMock()
+
+    def create_async_engine(self, pool_size):
+        return self.engine
+
+    @asynccontextmanager
+    async def connect_async(self, engine):
+        conn = FakeAsyncConnection(f"conn{len(self.opened)}")
+        self.opened.append(conn.name)
+        yield conn
+
+    def connect(self):
+        return MagicMock(__enter__=MagicMock(return_value="sync"))
+
+
+class FakeExtractor(SchemaExtractorAdapter):
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None):
+        schema = {'tables': {}, 'views': {}}
+
+        for name in ['b_table', 'a_table', 'c_table']:
+            self.submit(conn, schema, partial(self.read_table, name=name))
+
+        self.submit(conn, schema, partial(self.read_table, name='orphan', schema_type='views'))
+        schema['views'] = {'error': 'Could not read views'}
+
+        return schema
+
+    def read_table(self, conn, schema, name, schema_type='tables'):
+        schema[schema_type][name] = {'columns': [name.upper()]}
+
+    def extract_manifest(self, conn, database=None):
+        return {}
+
+    def list_databases(self):
+        return []
+
+
+def test_async_schema_matches_sync():
+    connection = FakeConnection()
+
+    sync_schema = FakeExtractor(connection).extract_schema(database='testdb')
+    async_schema = AsyncSchemaExtractor(FakeExtractor(connection), concurrency=2).extract_schema(database='testdb')
+
+    assert async_schema == sync_schema
+    assert list(async_schema['tables']) == ['b_table', 'a_table', 'c_table']
+    assert async_schema['views'] == {'error': 'Could not read views'}
+
+    # One connection to list the objects, then the pool of workers
+    assert connection.opened == ['conn0', 'conn1', 'conn2']
+    connection.engine.dispose.assert_awaited_once()
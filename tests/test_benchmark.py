@@ -0,0 +1,87 @@
+import datetime
+import decimal
+import json
+
+from database.replay import Recording
+from benchmark.runner import BenchmarkRunner, compare
+from benchmark.startup import BASELINE, SCENARIOS, compare as compare_startup, measure, parse_importtime
+from benchmark.synthetic import SyntheticMySQLServer
+
+
+def test_synthetic_benchmark(tmp_path):
+    source = SyntheticMySQLServer(tables=20, columns=5, views=2, procedures=3, functions=2, triggers=1)
+
+    report = BenchmarkRunner(source).run(str(tmp_path))
+
+    assert report['files_written'] == 20 + 2 + 3 + 2 + 1
+    assert report['query_count'] > 20
+    assert report['peak_memory'] > 0
+    assert (tmp_path / 'bench' / 'tables' / 'table_000019.sql').exists()
+
+def test_skip_unchanged_database(tmp_path):
+    source = SyntheticMySQLServer(tables=20, columns=5, views=2, procedures=3, functions=2, triggers=1)
+
+    first = BenchmarkRunner(source, skip_unchanged=True).run(str(tmp_path))
+    assert (tmp_path / 'bench' / 'bench_checksum.json').exists()
+
+    # Same catalog: the checksum query and the connection setup only, the files are kept
+    second = BenchmarkRunner(source, skip_unchanged=True).run(str(tmp_path))
+    assert second['query_count'] * 5 < first['query_count']
+    assert second['files_written'] == 0
+    assert second['files'] == first['files']
+
+    # Another catalog: extracted again
+    third = BenchmarkRunner(SyntheticMySQLServer(tables=21, columns=5, views=2, procedures=3, functions=2, triggers=1), skip_unchanged=True).run(str(tmp_path))
+    assert third['files_written'] == 1
+
+    # Without the option, the checksum of the previous run is removed
+    BenchmarkRunner(source).run(str(tmp_path))
+    assert not (tmp_path / 'bench' / 'bench_checksum.json').exists()
+
+def test_recording_replays_in_order(tmp_path):
+    recording = Recording()
+    recording.add("SELECT  modify_date\nFROM sys.objects", None, ['modify_date'], [[datetime.datetime(2025, 1, 1, 12, 30)]])
+    recording.add("SELECT modify_date FROM sys.objects", None, ['modify_date'], [[datetime.datetime(2025, 1, 2)]])
+    recording.add("SELECT ? AS value", ('x',), ['value'], [[decimal.Decimal('1.50')], [b'\x00\x01']])
+    recording.save(str(tmp_path / 'recording.json'))
+
+    replay = Recording.load(str(tmp_path / 'recording.json'))
+
+    assert replay.answer("SELECT modify_date FROM sys.objects", None) == (['modify_date'], [[datetime.datetime(2025, 1, 1, 12, 30)]])
+    assert replay.answer("SELECT modify_date FROM sys.objects", None) == (['modify_date'], [[datetime.datetime(2025, 1, 2)]])
+    # Once exhausted, the last result is replayed
+    assert replay.answer("SELECT modify_date FROM sys.objects", None) == (['modify_date'], [[datetime.datetime(2025, 1, 2)]])
+    assert replay.answer("SELECT ? AS value", ('x',)) == (['value'], [[decimal.Decimal('1.50')], [b'\x00\x01']])
+    assert replay.answer("SELECT ? AS value", ('y',)) is None
+
+def test_compare_with_baseline():
+    baseline = {'wall_time': 10.0, 'query_count': 100, 'peak_memory': 1000}
+
+    assert compare({'wall_time': 11.0, 'query_count': 100, 'peak_memory': 1000}, baseline, 0.25) == []
+    assert compare({'wall_time': 13.0, 'query_count': 101, 'peak_memory': 1000}, baseline, 0.25) == [
+        "query_count: 100 -> 101",
+        "wall_time: 10.0 -> 13.0"
+    ]
+
+def test_parse_importtime():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   _io",
+        "import time:       200 |        300 | io",
+        "import time:      1500 |       1500 | argparse",
+    ])
+
+    assert parse_importtime(output) == (1.8, ['_io', 'io', 'argparse'])
+
+def test_help_does_not_load_drivers():
+    result = measure('help', repeat=1)
+
+    assert result['forbidden'] == []
+
+def test_startup_baseline():
+    with open(BASELINE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    report = {scenario: measure(scenario, repeat=3) for scenario in SCENARIOS}
+
+    assert compare_startup(report, baseline, baseline['tolerance']) == []
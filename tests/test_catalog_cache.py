@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects.mysql.pymysql import MySQLDialect_pymysql
+
+from benchmark.synthetic import SyntheticMySQLServer
+from core import Core
+from database.catalog_cache import CatalogCache
+from database.replay import QueryCounter, ReplayConnection
+
+
+def read_files(directory):
+    files = {}
+
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, directory)] = f.read()
+
+    return files
+
+def test_offline_run_rebuilds_the_output(tmp_path):
+    source = SyntheticMySQLServer(tables=5, columns=3, views=1, procedures=2, functions=1, triggers=1)
+    counter = QueryCounter()
+    cache_dir = str(tmp_path / 'cache')
+
+    # The pymysql dialect connects to the synthetic server
+    with patch.object(MySQLDialect_pymysql, 'connect', lambda self, *cargs, **cparams: ReplayConnection(source, counter)):
+        Core('mysql', 'db', 3306, 'user', 'password', output=str(tmp_path / 'online'), databases=['bench'], cache=cache_dir).run()
+
+    assert os.listdir(cache_dir) == ['bench.json.gz']
+
+    queries = counter.count
+
+    with patch.object(MySQLDialect_pymysql, 'connect', side_effect=AssertionError("offline run connected")):
+        Core('mysql', 'offline', 3306, None, None, output=str(tmp_path / 'offline'), cache=cache_dir, offline=True).run()
+
+    assert counter.count == queries
+    assert read_files(tmp_path / 'offline') == read_files(tmp_path / 'online')
+
+def test_offline_checks_the_recorded_mode(tmp_path):
+    CatalogCache(str(tmp_path), 'mysql').save('bench')
+
+    with pytest.raises(ValueError):
+        CatalogCache(str(tmp_path), 'mysql', bulk=True, offline=True).load('bench')
+
+    with pytest.raises(FileNotFoundError):
+        CatalogCache(str(tmp_path), 'mysql', offline=True).load('other')
+
+    assert CatalogCache(str(tmp_path), 'mysql', offline=True).databases() == ['bench']
@@ -1,8 +1,11 @@
+import json
 import os
 import pytest
 from unittest.mock import patch, MagicMock
 
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
 from core import Core
+from export.schema_pipeline import SchemaPipeline, StaleFilesSink
 
 @pytest.fixture
 def core_instance(tmp_path):
@@ -27,7 +30,7 @@ def test_run_success(mock_filehandler, mock_docexporter, mock_logger, mock_dbext
     # Mock database extractor behavior
     mock_extractor_instance = MagicMock()
     mock_extractor_instance.list_databases.return_value = ["testdb"]
-    mock_extractor_instance.extract_schema.return_value = {"tables": {"table1": {}}}
+    mock_extractor_instance.stream_schema.return_value = SchemaExtractorAdapter.events({"tables": {"table1": {}}})
     mock_dbextractor.return_value = mock_extractor_instance
 
     # Mock file exporter behavior
@@ -38,8 +41,9 @@ def test_run_success(mock_filehandler, mock_docexporter, mock_logger, mock_dbext
     mock_doc_exporter_instance = MagicMock()
     mock_docexporter.return_value = mock_doc_exporter_instance
 
-    # Mock file handler
+    # Mock file handler (no previous snapshot)
     mock_file_handler_instance = MagicMock()
+    mock_file_handler_instance.load.return_value = None
     mock_filehandler.return_value = mock_file_handler_instance
 
     # Execute
@@ -48,12 +52,17 @@ def test_run_success(mock_filehandler, mock_docexporter, mock_logger, mock_dbext
     # Assertions
     mock_dbextractor.assert_called_once()
     mock_extractor_instance.list_databases.assert_called_once()
-    mock_extractor_instance.extract_schema.assert_called_once_with(
+    mock_extractor_instance.stream_schema.assert_called_once_with(
         file_exporter=mock_file_exporter_instance,
         database="testdb"
     )
     mock_docexporter.assert_called_once()
-    mock_filehandler.assert_called_once()
+    # The previous snapshot is read for the changelog, then replaced
+    mock_filehandler.assert_called_with(os.path.join(core_instance.outputDir, "testdb", "testdb_schema.json"))
+    mock_file_handler_instance.load.assert_called_once()
+
+    with open(os.path.join(core_instance.outputDir, "testdb", "testdb_schema.json"), encoding='utf-8') as f:
+        assert json.load(f) == {"tables": {"table1": {}}}
 
 @patch("core.FileExporter")
 @patch("core.DatabaseExtractor")
@@ -74,48 +83,98 @@ def test_run_with_restricted_database(mock_logger, mock_dbextractor, mock_fileex
     # Mock database extractor returning a restricted database
     mock_extractor_instance = MagicMock()
     mock_extractor_instance.list_databases.return_value = ["master", "userdb"]
-    mock_extractor_instance.extract_schema.return_value = {"tables": {"table1": {}}}
+    mock_extractor_instance.stream_schema.side_effect = lambda **kwargs: SchemaExtractorAdapter.events({"tables": {"table1": {}}})
     mock_dbextractor.return_value = mock_extractor_instance
 
     mock_file_exporter_instance = MagicMock()
     mock_fileexporter.return_value = mock_file_exporter_instance
 
-    # Patch the methods __generate_documentation and __save to track calls
-    with patch.object(core_instance, "_Core__generate_documentation") as mock_doc, \
-            patch.object(core_instance, "_Core__save") as mock_save:
+    # Patch the sinks to track the processed databases
+    with patch.object(core_instance, "_Core__sinks", return_value=[]) as mock_sinks:
 
         core_instance.run()
 
         # master should be skipped, only userdb processed
-        mock_doc.assert_called_once_with(
-            {"tables": {"table1": {}}}, "userdb", os.path.join(core_instance.outputDir, "userdb")
-        )
-        mock_save.assert_called_once_with(
-            {"tables": {"table1": {}}}, "userdb", os.path.join(core_instance.outputDir, "userdb")
+        mock_extractor_instance.stream_schema.assert_called_once_with(file_exporter=mock_file_exporter_instance, database="userdb")
+        mock_sinks.assert_called_once_with(
+            mock_file_exporter_instance, "userdb", os.path.join(core_instance.outputDir, "userdb"), None
         )
 
 @patch("core.DocumentationExporter")
-def test_generate_documentation_invalid_json(mock_docexporter, core_instance, tmp_path):
+def test_documentation_sink_invalid_json(mock_docexporter, core_instance, tmp_path):
     # Force DocumentationExporter to raise ValueError
     mock_docexporter.side_effect = ValueError("Invalid JSON")
 
-    schema = {"tables": {"table1": {}}}
-    db_name = "testdb"
-    db_output_dir = tmp_path / db_name
+    db_output_dir = tmp_path / "testdb"
 
-    # Should not raise, just pass
-    core_instance._Core__generate_documentation(schema, db_name, db_output_dir)
+    # Should not raise, the documentation is skipped
+    assert core_instance._Core__documentation_sink(db_output_dir) is None
 
-@patch("core.FileHandler")
-def test_save_schema_success(mock_filehandler, core_instance, tmp_path):
-    mock_file_handler_instance = MagicMock()
-    mock_filehandler.return_value = mock_file_handler_instance
+def test_save_schema_success(core_instance, tmp_path):
+    from handler.file_handler import FileHandler
 
-    schema = {"tables": {"table1": {}}}
+    schema = {"tables": {"table1": {"columns": {"id": {"type": "int"}}}, "table2": {}}, "views": {}, "procedures": {"error": "Insufficient privileges"}}
     db_name = "testdb"
     db_output_dir = tmp_path / db_name
+    db_output_dir.mkdir()
+
+    writer = core_instance._Core__snapshot_writer(db_name, str(db_output_dir))
+    SchemaPipeline([writer]).run(SchemaExtractorAdapter.events(schema))
+
+    # Same file as a snapshot saved in one piece
+    FileHandler(str(tmp_path / "expected.json")).save(schema)
+    assert (db_output_dir / f"{db_name}_schema.json").read_bytes() == (tmp_path / "expected.json").read_bytes()
+    assert os.listdir(db_output_dir) == [f"{db_name}_schema.json"]
+
+@patch("core.FileExporter")
+@patch("core.DatabaseExtractor")
+@patch("core.Logger")
+def test_run_parallel(mock_logger, mock_dbextractor, mock_fileexporter, core_instance):
+    core_instance.jobs = 4
+
+    # Each call to DatabaseExtractor gives a new extractor, one database fails
+    def create_extractor(**kwargs):
+        extractor = MagicMock()
+        extractor.list_databases.return_value = ["master", "db1", "db2", "broken"]
+
+        def stream_schema(file_exporter, database):
+            yield from SchemaExtractorAdapter.events({"tables": {}})
+
+            if database == "broken":
+                raise RuntimeError("Connection lost")
+
+            yield "tables", "table1", {}
+
+        extractor.stream_schema.side_effect = stream_schema
+        return extractor
+
+    mock_dbextractor.side_effect = create_extractor
+
+    with patch("core.DocumentationExporter"):
+        core_instance.run()
+
+        # One extractor to list the databases, then one per extracted database (master is restricted)
+        assert mock_dbextractor.call_count == 4
+        # The snapshot of the failed database is not written
+        snapshots = [db_name for db_name in ["db1", "db2", "broken"] if os.path.exists(os.path.join(core_instance.outputDir, db_name, f"{db_name}_schema.json"))]
+        assert snapshots == ["db1", "db2"]
+        assert not os.path.exists(os.path.join(core_instance.outputDir, "broken", "broken_schema.json.tmp"))
+        mock_fileexporter.assert_any_call(os.path.join(core_instance.outputDir, "db1"), 0, store=None)
+        mock_logger.Error.assert_called_once_with("Could not extract broken: Connection lost")
+
+def test_remove_stale_files(core_instance, tmp_path):
+    from export.file_exporter import FileExporter
+
+    file_exporter = FileExporter(str(tmp_path))
+    file_exporter.save_sql('tables', 'kept', 'CREATE TABLE kept();')
+    file_exporter.save_sql('tables', 'dropped', 'CREATE TABLE dropped();')
+    file_exporter.save_sql('procedures', 'unreadable', 'CREATE PROCEDURE unreadable() SELECT 1;')
+
+    schema = {'tables': {'kept': {}}, 'procedures': {'error': 'Insufficient privileges to read procedures.'}}
 
-    core_instance._Core__save(schema, db_name, db_output_dir)
+    SchemaPipeline([StaleFilesSink(file_exporter)]).run(SchemaExtractorAdapter.events(schema))
 
-    mock_filehandler.assert_called_once_with(os.path.join(db_output_dir, f"{db_name}_schema.json"))
-    mock_file_handler_instance.save.assert_called_once_with(schema)
+    assert os.path.exists(tmp_path / 'tables' / 'kept.sql')
+    assert not os.path.exists(tmp_path / 'tables' / 'dropped.sql')
+    assert os.path.exists(tmp_path / 'procedures' / 'unreadable.sql')
+    assert file_exporter.stats == {'written': 3, 'skipped': 0, 'removed': 1}
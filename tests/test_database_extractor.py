@@ -31,4 +31,31 @@ def test_list_databases(mock_create_extractor, mock_create_engine, database_extr
     # Assert
     mock_create_engine.assert_called_once()
     mock_create_extractor.assert_called_once_with('mariadb', database_extractor.connection)
-    assert databases == ['test_db1', 'test_db2']
\ No newline at end of file
+    assert databases == ['test_db1', 'test_db2']
+
+def test_connections_share_server_engine():
+    from database.connection import DatabaseConnection
+
+    first = DatabaseConnection("mariadb", "localhost", 3306, "user", "password")
+    second = DatabaseConnection("mariadb", "localhost", 3306, "user", "password")
+
+    try:
+        # One engine per server, the database is only selected on the connections
+        assert first.create_engine("db1") is second.create_engine("db2")
+        assert (first.database, second.database) == ("db1", "db2")
+    finally:
+        DatabaseConnection.dispose_all()
+
+    assert DatabaseConnection.engines == {}
+
+def test_connect_selects_database():
+    from database.connection import DatabaseConnection
+
+    connection = DatabaseConnection("mssql", "localhost", 1433, "sa", "password", database="my]db")
+    connection.engine = MagicMock()
+    conn = connection.engine.connect.return_value.__enter__.return_value
+
+    with connection.connect() as opened:
+        assert opened is conn
+
+    conn.exec_driver_sql.assert_called_once_with("USE [my]]db]")
@@ -0,0 +1,249 @@
+import re
+
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy.dialects.mssql.base import MSDialect
+from database.extractor.mssql_extractor import MSSQLSchemaExtractor
+
+@pytest.fixture
+def fake_connection():
+    conn = MagicMock()
+    conn.connect.return_value.__enter__.return_value = conn
+    conn.dialect = MSDialect()
+    return conn
+
+def test_extract_schema_bulk(fake_connection):
+    # Arrange
+    extractor = MSSQLSchemaExtractor(fake_connection, bulk=True)
+    file_exporter = MagicMock()
+
+    catalog_rows = {
+        'sys.extended_properties': [
+            {'object_id': 1, 'object_name': 'table1', 'object_type': 'U ', 'column_name': 'id', 'data_type': 'int',
+             'is_nullable': False, 'character_maximum_length': None, 'precision': 10, 'scale': 0,
+             'collation_name': None, 'column_default': None, 'comment': None},
+            {'object_id': 1, 'object_name': 'table1', 'object_type': 'U ', 'column_name': 'label', 'data_type': 'nvarchar',
+             'is_nullable': True, 'character_maximum_length': 50, 'precision': 0, 'scale': 0,
+             'collation_name': 'Latin1_General_CI_AS', 'column_default': '(NULL)', 'comment': 'Label'},
+            {'object_id': 2, 'object_name': 'view1', 'object_type': 'V ', 'column_name': 'amount', 'data_type': 'decimal',
+             'is_nullable': True, 'character_maximum_length': None, 'precision': 10, 'scale': 2,
+             'collation_name': None, 'column_default': None, 'comment': None},
+        ],
+        'sys.index_columns': [
+            {'object_id': 1, 'index_name': 'PK_table1', 'index_type': 1, 'is_unique': True, 'is_primary_key': True,
+             'index_column_id': 1, 'is_included_column': False, 'column_name': 'id'},
+            {'object_id': 1, 'index_name': 'IX_label', 'index_type': 2, 'is_unique': False, 'is_primary_key': False,
+             'index_column_id': 2, 'is_included_column': True, 'column_name': 'id'},
+            {'object_id': 1, 'index_name': 'IX_label', 'index_type': 2, 'is_unique': False, 'is_primary_key': False,
+             'index_column_id': 1, 'is_included_column': False, 'column_name': 'label'},
+        ],
+        'sys.foreign_key_columns': [],
+        'sys.check_constraints': [
+            {'object_id': 1, 'constraint_name': 'CK_id', 'definition': '([id]>(0))'},
+        ],
+        'sys.sql_modules': [
+            {'name': 'view1', 'type': 'V ', 'definition': 'CREATE VIEW view1 AS SELECT amount FROM table1'},
+            {'name': 'proc1', 'type': 'P ', 'definition': '-- Comment\r\nCREATE PROCEDURE proc1 AS SELECT 1'},
+            {'name': 'proc1', 'type': 'P ', 'definition': 'CREATE PROCEDURE other.proc1 AS SELECT 2'},
+        ],
+        "ROUTINE_TYPE = 'PROCEDURE'": [('proc1', 'dbo')],
+        "TABLE_TYPE = 'BASE TABLE'": [('table1', 'dbo')],
+        'INFORMATION_SCHEMA.VIEWS': [('view1', 'dbo')],
+    }
+
+    def execute(query, params=None):
+        for key, rows in catalog_rows.items():
+            if key in str(query):
+                result = MagicMock()
+                result.fetchall.return_value = rows
+                result.mappings.return_value.fetchall.return_value = rows
+                return result
+        result = MagicMock()
+        result.fetchall.return_value = []
+        result.scalar.return_value = None
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    with patch('database.extractor.mssql_extractor.inspect') as mock_inspect:
+        schema = extractor.extract_schema(file_exporter=file_exporter, database='testdb')
+
+    # Assert
+    mock_inspect.assert_not_called()
+    assert schema['tables']['table1'] == {
+        'comment': '',
+        'columns': {
+            'id': {'type': 'INTEGER', 'nullable': False, 'default': None, 'comment': None, 'is_virtual': False},
+            'label': {'type': 'NVARCHAR(50) COLLATE "Latin1_General_CI_AS"', 'nullable': True, 'default': 'NULL', 'comment': 'Label', 'is_virtual': False},
+        },
+        'primary_key': ['id'],
+        'indexes': [{'name': 'IX_label', 'columns': ['label']}],
+        'foreign_keys': [],
+        'checks': [{'name': 'CK_id', 'sqltext': '([id]>(0))'}],
+    }
+    assert schema['views']['view1']['columns'] == {'amount': {'type': 'DECIMAL(10, 2)'}}
+
+    script = file_exporter.save_sql.call_args_list[0].args[2]
+    assert "CREATE INDEX [IX_label] ON [table1] (id, label);" in script
+
+    # Module definitions come from sys.sql_modules, the default schema first
+    file_exporter.save_sql.assert_any_call('views', 'view1', 'CREATE OR ALTER VIEW view1 AS SELECT amount FROM table1')
+    file_exporter.save_sql.assert_any_call('procedures', 'proc1', '-- Comment\nCREATE OR ALTER PROCEDURE proc1 AS SELECT 1')
+    assert not any('OBJECT_DEFINITION' in str(call.args[0]) for call in fake_connection.execute.call_args_list)
+
+
+def test_extract_schema_bulk_filtered(fake_connection):
+    from utils.object_filter import ObjectFilter
+
+    extractor = MSSQLSchemaExtractor(fake_connection, bulk=True, object_filter=ObjectFilter(exclude=['stg_*']))
+    fake_connection.execute.return_value.fetchall.return_value = []
+    fake_connection.execute.return_value.mappings.return_value.fetchall.return_value = []
+
+    extractor.extract_schema(database='testdb')
+
+    # Every catalog query of the bulk mode excludes the staging tables on the server
+    catalog_queries = [call for call in fake_connection.execute.call_args_list if 'sys.' in str(call.args[0]) and 'sys.triggers' not in str(call.args[0])]
+    assert len(catalog_queries) == 5
+
+    for call in catalog_queries:
+        assert "LIKE :filter_0 ESCAPE '\\')" in str(call.args[0])
+        assert call.args[1] == {'filter_0': 'stg\\_%'}
+
+
+class CatalogConnection:
+    """
+    Connection answering the reflection queries of the SQLAlchemy MSSQL dialect (INFORMATION_SCHEMA and sys
+    views), so that the per-object extraction goes through the real Inspector code.
+    """
+
+    def __init__(self, columns, indexes, index_columns, foreign_keys):
+        self.answers = {'columns': columns, 'indexes': indexes, 'index_columns': index_columns, 'foreign_keys': foreign_keys}
+
+    def execution_options(self, **kwargs):
+        return self
+
+    def execute(self, statement, parameters=None):
+        from sqlalchemy import Select
+
+        # The columns are reflected with a Select, the other queries are textual
+        query = str(statement) if not isinstance(statement, Select) else None
+
+        if query is None:
+            rows = self.answers['columns']
+        elif 'fk_info' in query:
+            rows = self.answers['foreign_keys']
+        elif 'ind_col.is_included_column' in query:
+            rows = self.answers['index_columns']
+        else:
+            rows = self.answers['indexes']
+
+        result = MagicMock()
+        result.mappings.return_value = rows
+        result.all.return_value = rows
+        return result
+
+
+def test_bulk_catalog_matches_inspector(fake_connection):
+    from sqlalchemy.dialects.mssql import information_schema as ischema
+
+    dialect = fake_connection.dialect
+    dialect.default_schema_name = 'dbo'
+    dialect.server_version_info = (15,)
+    dialect._supports_nvarchar_max = True
+
+    # orders: identity key, a default column, a computed column, two indexes (one with an included column) and a foreign key
+    # (name, data_type, nullable, length, precision, scale, collation, default, computed)
+    columns = [
+        ('id', 'int', False, None, 10, 0, None, None, None),
+        ('customer_id', 'int', False, None, 10, 0, None, None, None),
+        ('status', 'nvarchar', False, 20, 0, 0, 'Latin1_General_CI_AS', "(N'new')", None),
+        ('created_at', 'datetime', True, None, 23, 3, None, '(getdate())', None),
+        ('total', 'decimal', True, None, 12, 2, None, None, '([quantity]*[price])'),
+    ]
+    # Longer than the 30 characters of a CAST AS NVARCHAR without length
+    comment = 'Status of the order: new, paid, shipped or cancelled'
+    # (index_id, name, type, is_unique, is_primary_key, [(index_column_id, column, is_included_column)])
+    indexes = [
+        (1, 'PK_orders', 1, True, True, [(1, 'id', False)]),
+        (2, 'IX_orders_customer', 2, False, False, [(1, 'customer_id', False), (2, 'created_at', False), (3, 'status', True)]),
+        (3, 'IX_orders_created', 2, False, False, [(1, 'created_at', False)]),
+    ]
+
+    catalog_rows = {
+        'sys.extended_properties': [
+            {'object_id': 1, 'object_name': 'orders', 'object_type': 'U ', 'column_name': name, 'data_type': data_type,
+             'is_nullable': nullable, 'character_maximum_length': length, 'precision': precision, 'scale': scale,
+             'collation_name': collation, 'column_default': default, 'comment': comment if name == 'status' else None}
+            for name, data_type, nullable, length, precision, scale, collation, default, _ in columns
+        ],
+        # Not the index query of the CREATE script (__get_table_indexes_mssql)
+        'ic.is_included_column': [
+            {'object_id': 1, 'index_name': name, 'index_type': index_type, 'is_unique': is_unique, 'is_primary_key': is_primary_key,
+             'index_column_id': column_id, 'is_included_column': included, 'column_name': column}
+            for _, name, index_type, is_unique, is_primary_key, index_columns in sorted(indexes, key=lambda index: index[1])
+            for column_id, column, included in index_columns
+        ],
+        'sys.foreign_key_columns': [
+            {'object_id': 1, 'constraint_name': 'FK_orders_customers', 'column_name': 'customer_id', 'referred_table': 'customers', 'referred_column': 'id'},
+        ],
+        'sys.check_constraints': [],
+        "TABLE_TYPE = 'BASE TABLE'": [('orders', 'dbo')],
+    }
+
+    reflection = CatalogConnection(
+        columns=[
+            {ischema.columns.c.column_name: name, ischema.columns.c.data_type: data_type, ischema.columns.c.is_nullable: 'YES' if nullable else 'NO',
+             ischema.columns.c.character_maximum_length: length, ischema.columns.c.numeric_precision: precision,
+             ischema.columns.c.numeric_scale: scale, ischema.columns.c.column_default: default, ischema.columns.c.collation_name: collation,
+             ischema.computed_columns.c.definition: computed, ischema.computed_columns.c.is_persisted: False if computed else None,
+             ischema.identity_columns.c.is_identity: True if name == 'id' else None, ischema.identity_columns.c.seed_value: 1 if name == 'id' else None,
+             ischema.identity_columns.c.increment_value: 1 if name == 'id' else None,
+             ischema.extended_properties.c.value: comment if name == 'status' else None}
+            for name, data_type, nullable, length, precision, scale, collation, default, computed in columns
+        ],
+        indexes=[
+            {'index_id': index_id, 'is_unique': int(is_unique), 'name': name, 'type': index_type, 'filter_definition': None}
+            for index_id, name, index_type, is_unique, is_primary_key, _ in sorted(indexes, key=lambda index: index[1]) if not is_primary_key
+        ],
+        index_columns=[
+            {'index_id': index_id, 'name': column, 'is_included_column': int(included)}
+            for index_id, _, _, _, _, index_columns in indexes for _, column, included in index_columns
+        ],
+        foreign_keys=[
+            ('dbo', 'FK_orders_customers', 1, 'customer_id', 'dbo', 'customers', 'id', 'SIMPLE', 'NO ACTION', 'NO ACTION'),
+        ]
+    )
+
+    def execute(query, params=None):
+        for key, rows in catalog_rows.items():
+            if key in str(query):
+                # Comments are converted as SQL Server does: NVARCHAR without a length is NVARCHAR(30)
+                cast = re.search(r'CAST\(ep\.value AS NVARCHAR(?:\((\w+)\))?\)', str(query))
+                if cast and cast.group(1) != 'MAX':
+                    rows = [{**row, 'comment': row['comment'] and row['comment'][:int(cast.group(1) or 30)]} for row in rows]
+
+                result = MagicMock()
+                result.fetchall.return_value = rows
+                result.mappings.return_value = MagicMock(fetchall=MagicMock(return_value=rows), __iter__=MagicMock(return_value=iter(rows)))
+                return result
+        return MagicMock()
+
+    fake_connection.execute.side_effect = execute
+
+    inspector = MagicMock()
+    inspector.get_columns.side_effect = lambda name: dialect.get_columns(reflection, name)
+    inspector.get_indexes.side_effect = lambda name: dialect.get_indexes(reflection, name)
+    inspector.get_foreign_keys.side_effect = lambda name: dialect.get_foreign_keys(reflection, name)
+    inspector.get_pk_constraint.return_value = {'name': 'PK_orders', 'constrained_columns': ['id']}
+
+    with patch('database.extractor.mssql_extractor.inspect', return_value=inspector):
+        reflected = MSSQLSchemaExtractor(fake_connection).extract_schema(database='testdb')['tables']['orders']
+        bulk = MSSQLSchemaExtractor(fake_connection, bulk=True).extract_schema(database='testdb')['tables']['orders']
+
+    assert inspector.get_indexes.call_count == 1
+    assert bulk == reflected
+    assert reflected['columns']['status'] == {'type': 'NVARCHAR(20) COLLATE "Latin1_General_CI_AS"', 'nullable': False, 'default': "(N'new')", 'comment': comment, 'is_virtual': False}
+    assert reflected['columns']['total']['type'] == 'DECIMAL(12, 2)'
+    assert reflected['indexes'] == [{'name': 'IX_orders_created', 'columns': ['created_at']}, {'name': 'IX_orders_customer', 'columns': ['customer_id', 'created_at']}]
+    assert reflected['foreign_keys'] == [{'name': 'FK_orders_customers', 'columns': ['customer_id'], 'referred_table': 'customers', 'referred_columns': ['id']}]
@@ -5,7 +5,7 @@ from database.extractor.mysql_extractor import MySQLSchemaExtractor
 @pytest.fixture
 def fake_connection():
     conn = MagicMock()
-    conn.engine.connect.return_value.__enter__.return_value = conn
+    conn.connect.return_value.__enter__.return_value = conn
     return conn
 
 from unittest.mock import MagicMock, patch
@@ -21,7 +21,7 @@ def test_extract_schema(fake_connection):
         [('view1',)]    # Pour views
     ]
 
-    fake_connection.engine.connect.return_value.__enter__.return_value.execute.return_value = mock_execute
+    fake_connection.connect.return_value.__enter__.return_value.execute.return_value = mock_execute
 
     # Mock inspector
     with patch('database.extractor.mysql_extractor.inspect') as mock_inspect:
@@ -38,3 +38,389 @@ def test_extract_schema(fake_connection):
 
         # Assert
         assert 'tables' in schema
+
+
+def test_dialect_table_definition_parser():
+    # The bulk mode parses the column types with private members of the SQLAlchemy MySQL dialect: without them,
+    # every table silently falls back to the Inspector
+    import inspect
+    from sqlalchemy.dialects.mysql import pymysql
+    from sqlalchemy.dialects.mysql.base import MySQLDialect
+
+    assert 'self._connection_charset =' in inspect.getsource(MySQLDialect.initialize)
+
+    dialect = pymysql.dialect()
+    dialect._connection_charset = 'utf8mb4'
+    show_create = (
+        "CREATE TABLE `table1` (\n"
+        "  `id` int(11) NOT NULL AUTO_INCREMENT,\n"
+        "  `code` varchar(20) CHARACTER SET latin1 COLLATE latin1_bin DEFAULT 'abc' COMMENT 'Code',\n"
+        "  PRIMARY KEY (`id`)\n"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+
+    columns = MySQLSchemaExtractor._MySQLSchemaExtractor__parse_table_definition(dialect, show_create)
+
+    assert [(column['name'], str(column['type']), column['default'], column['comment']) for column in columns] == [
+        ('id', 'INTEGER', None, None),
+        ('code', 'VARCHAR(20) COLLATE "latin1_bin"', "'abc'", 'Code'),
+    ]
+
+
+@pytest.mark.parametrize('parser', ['dialect', 'missing', 'failing'])
+def test_extract_schema_bulk(fake_connection, parser):
+    # Arrange
+    from sqlalchemy.dialects.mysql import pymysql, INTEGER, VARCHAR
+
+    dialect = pymysql.dialect()
+    dialect.is_mariadb = True
+    dialect._connection_charset = 'utf8mb4'
+    fake_connection.dialect = dialect
+
+    # Private parser of the dialect: the columns are reflected by the Inspector without it
+    if parser == 'missing':
+        fake_connection.dialect = MagicMock(spec=['is_mariadb', 'identifier_preparer'], is_mariadb=True)
+    elif parser == 'failing':
+        dialect._tabledef_parser = MagicMock()
+        dialect._tabledef_parser.parse.side_effect = AttributeError("'MySQLTableDefinitionParser' object has no attribute '_re_column'")
+
+    extractor = MySQLSchemaExtractor(fake_connection, bulk=True)
+
+    catalog_rows = {
+        'INFORMATION_SCHEMA.COLUMNS': [
+            {'TABLE_NAME': 'table1', 'TABLE_TYPE': 'BASE TABLE', 'TABLE_COLLATION': 'utf8mb4_general_ci', 'COLUMN_NAME': 'id',
+             'COLUMN_TYPE': 'int(11)', 'IS_NULLABLE': 'NO', 'COLUMN_DEFAULT': None, 'EXTRA': 'auto_increment', 'COLUMN_COMMENT': '',
+             'CHARACTER_SET_NAME': None, 'COLLATION_NAME': None, 'DEFAULT_COLLATE_NAME': None},
+            {'TABLE_NAME': 'table1', 'TABLE_TYPE': 'BASE TABLE', 'TABLE_COLLATION': 'utf8mb4_general_ci', 'COLUMN_NAME': 'code',
+             'COLUMN_TYPE': 'varchar(20)', 'IS_NULLABLE': 'YES', 'COLUMN_DEFAULT': "'abc'", 'EXTRA': '', 'COLUMN_COMMENT': 'Code',
+             'CHARACTER_SET_NAME': 'latin1', 'COLLATION_NAME': 'latin1_bin', 'DEFAULT_COLLATE_NAME': 'latin1_swedish_ci'},
+            {'TABLE_NAME': 'view1', 'TABLE_TYPE': 'VIEW', 'TABLE_COLLATION': None, 'COLUMN_NAME': 'id',
+             'COLUMN_TYPE': 'int(11)', 'IS_NULLABLE': 'NO', 'COLUMN_DEFAULT': '0', 'EXTRA': '', 'COLUMN_COMMENT': '',
+             'CHARACTER_SET_NAME': None, 'COLLATION_NAME': None, 'DEFAULT_COLLATE_NAME': None},
+        ],
+        'INFORMATION_SCHEMA.STATISTICS': [
+            {'TABLE_NAME': 'table1', 'INDEX_NAME': 'PRIMARY', 'COLUMN_NAME': 'id', 'SEQ_IN_INDEX': 1},
+            {'TABLE_NAME': 'table1', 'INDEX_NAME': 'ix_code', 'COLUMN_NAME': 'code', 'SEQ_IN_INDEX': 1},
+        ],
+        'INFORMATION_SCHEMA.KEY_COLUMN_USAGE': [],
+        'INFORMATION_SCHEMA.CHECK_CONSTRAINTS': [
+            {'TABLE_NAME': 'table1', 'CONSTRAINT_NAME': 'ck_id', 'CHECK_CLAUSE': '`id` > 0', 'LEVEL': 'Table'},
+            {'TABLE_NAME': 'table1', 'CONSTRAINT_NAME': 'code', 'CHECK_CLAUSE': '`code` <> \'\'', 'LEVEL': 'Column'},
+        ],
+        "Table_type = 'BASE TABLE'": [('table1',)],
+        "Table_type = 'VIEW'": [('view1',)],
+    }
+
+    def execute(query, params=None):
+        for key, rows in catalog_rows.items():
+            if key in str(query):
+                result = MagicMock()
+                result.fetchall.return_value = rows
+                result.mappings.return_value.fetchall.return_value = rows
+                result.mappings.return_value.__iter__.return_value = iter(rows)
+                return result
+        return MagicMock()
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    with patch('database.extractor.mysql_extractor.inspect') as mock_inspect:
+        mock_inspect.return_value.get_columns.side_effect = lambda name, schema: {
+            'table1': [{'name': 'id', 'type': INTEGER()}, {'name': 'code', 'type': VARCHAR(20, collation='latin1_bin')}],
+            'view1': [{'name': 'id', 'type': INTEGER()}]
+        }[name]
+
+        schema = extractor.extract_schema(database='testdb')
+
+    # Assert
+    if parser == 'dialect':
+        mock_inspect.assert_not_called()
+    else:
+        assert [call.args for call in mock_inspect.return_value.get_columns.call_args_list] == [('table1',), ('view1',)]
+        # Only the column types are reflected again
+        assert not mock_inspect.return_value.get_indexes.called
+
+    assert schema['tables']['table1'] == {
+        'comment': '',
+        'columns': {
+            'id': {'type': 'INTEGER', 'nullable': False, 'default': None, 'comment': None, 'is_virtual': False},
+            'code': {'type': 'VARCHAR(20) COLLATE "latin1_bin"', 'nullable': True, 'default': "'abc'", 'comment': 'Code', 'is_virtual': False},
+        },
+        'primary_key': ['id'],
+        'indexes': [{'name': 'ix_code', 'columns': ['code']}],
+        'foreign_keys': [],
+        'checks': [{'name': 'ck_id', 'sqltext': '`id` > 0'}]
+    }
+    assert schema['views']['view1'] == {'comment': '', 'columns': {'id': {'type': 'INTEGER'}}}
+
+
+def test_extract_schema_bulk_definitions(fake_connection):
+    # Arrange
+    from sqlalchemy.dialects.mysql import pymysql
+
+    fake_connection.dialect = pymysql.dialect()
+    extractor = MySQLSchemaExtractor(fake_connection, bulk=True)
+    file_exporter = MagicMock()
+    file_exporter.save_sql.side_effect = lambda folder, name, sql: f"{folder}/{name}.sql"
+
+    catalog_rows = {
+        # The parameter list and a returned character set are printed as written by SHOW CREATE only
+        'information_schema.PARAMETERS': [
+            {'SPECIFIC_NAME': 'with_parameters', 'ROUTINE_TYPE': 'PROCEDURE'},
+        ],
+        'information_schema.ROUTINES': [
+            {'ROUTINE_NAME': 'proc1', 'ROUTINE_TYPE': 'PROCEDURE', 'DTD_IDENTIFIER': None, 'CHARACTER_SET_NAME': None, 'ROUTINE_DEFINITION': 'BEGIN\r\n  SELECT 1;\r\nEND',
+             'IS_DETERMINISTIC': 'NO', 'SQL_DATA_ACCESS': 'READS SQL DATA', 'SECURITY_TYPE': 'DEFINER', 'ROUTINE_COMMENT': "It's mine", 'DEFINER': 'root@%'},
+            {'ROUTINE_NAME': 'func1', 'ROUTINE_TYPE': 'FUNCTION', 'DTD_IDENTIFIER': 'int(11)', 'CHARACTER_SET_NAME': None, 'ROUTINE_DEFINITION': 'RETURN 1',
+             'IS_DETERMINISTIC': 'YES', 'SQL_DATA_ACCESS': 'CONTAINS SQL', 'SECURITY_TYPE': 'INVOKER', 'ROUTINE_COMMENT': '', 'DEFINER': 'root@localhost'},
+            {'ROUTINE_NAME': 'with_parameters', 'ROUTINE_TYPE': 'PROCEDURE', 'DTD_IDENTIFIER': None, 'CHARACTER_SET_NAME': None, 'ROUTINE_DEFINITION': 'SELECT p_id',
+             'IS_DETERMINISTIC': 'NO', 'SQL_DATA_ACCESS': 'CONTAINS SQL', 'SECURITY_TYPE': 'DEFINER', 'ROUTINE_COMMENT': '', 'DEFINER': 'root@%'},
+            {'ROUTINE_NAME': 'with_charset', 'ROUTINE_TYPE': 'FUNCTION', 'DTD_IDENTIFIER': 'varchar(20)', 'CHARACTER_SET_NAME': 'utf8mb4', 'ROUTINE_DEFINITION': "RETURN 'a'",
+             'IS_DETERMINISTIC': 'NO', 'SQL_DATA_ACCESS': 'CONTAINS SQL', 'SECURITY_TYPE': 'DEFINER', 'ROUTINE_COMMENT': '', 'DEFINER': 'root@%'},
+            {'ROUTINE_NAME': 'hidden', 'ROUTINE_TYPE': 'PROCEDURE', 'DTD_IDENTIFIER': None, 'CHARACTER_SET_NAME': None, 'ROUTINE_DEFINITION': None,
+             'IS_DETERMINISTIC': 'NO', 'SQL_DATA_ACCESS': 'CONTAINS SQL', 'SECURITY_TYPE': 'DEFINER', 'ROUTINE_COMMENT': '', 'DEFINER': 'admin@%'},
+        ],
+        # MariaDB exposes the algorithm of the views, MySQL does not
+        'information_schema.VIEWS': [
+            {'TABLE_NAME': 'view1', 'ALGORITHM': 'UNDEFINED', 'DEFINER': 'root@%', 'SECURITY_TYPE': 'DEFINER', 'CHECK_OPTION': 'NONE',
+             'VIEW_DEFINITION': "select `testdb`.`t1`.`id` AS `id`,'`testdb`.x' AS `label`,`other`.`testdb`.`id` AS `other_id` from (`testdb`.`t1` join `other`.`testdb`) /* `testdb`. */"},
+            {'TABLE_NAME': 'view2', 'DEFINER': 'root@%', 'SECURITY_TYPE': 'DEFINER', 'CHECK_OPTION': 'NONE', 'VIEW_DEFINITION': 'select 1 AS `1`'},
+        ],
+        'SHOW PROCEDURE STATUS': [{'Name': 'proc1'}, {'Name': 'with_parameters'}, {'Name': 'hidden'}],
+        'SHOW FUNCTION STATUS': [{'Name': 'func1'}, {'Name': 'with_charset'}],
+        'SHOW CREATE PROCEDURE `with_parameters`': [{'Create Procedure': 'CREATE PROCEDURE `with_parameters`(IN p_id INT) SELECT p_id'}],
+        'SHOW CREATE FUNCTION `with_charset`': [{'Create Function': "CREATE FUNCTION `with_charset`() RETURNS varchar(20) CHARSET utf8mb4 RETURN 'a'"}],
+        'SHOW CREATE PROCEDURE `hidden`': [{'Create Procedure': 'CREATE PROCEDURE `hidden`() SELECT 1'}],
+        'SHOW CREATE VIEW `view2`': [{'Create View': 'CREATE VIEW `view2` AS select 1 AS `1`'}],
+    }
+
+    def execute(query, params=None):
+        result = MagicMock()
+        result.fetchall.return_value = [('view1', 'VIEW'), ('view2', 'VIEW')] if "Table_type = 'VIEW'" in str(query) else []
+        result.mappings.return_value.fetchall.return_value = []
+        for key, rows in catalog_rows.items():
+            if key in str(query):
+                result.mappings.return_value.fetchall.return_value = rows
+                result.mappings.return_value.__iter__.return_value = iter(rows)
+                result.mappings.return_value.first.return_value = rows[0]
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    with patch('database.extractor.mysql_extractor.inspect'):
+        extractor.extract_schema(file_exporter=file_exporter, database='testdb')
+
+    # Assert
+    definitions = {name: sql for _, name, sql in (call.args for call in file_exporter.save_sql.call_args_list)}
+    assert definitions['proc1'] == (
+        "CREATE DEFINER=`root`@`%` PROCEDURE `proc1`()\n"
+        "    READS SQL DATA\n"
+        "    COMMENT 'It''s mine'\n"
+        "BEGIN\n  SELECT 1;\nEND"
+    )
+    assert definitions['func1'] == (
+        "CREATE DEFINER=`root`@`localhost` FUNCTION `func1`() RETURNS int(11)\n"
+        "    DETERMINISTIC\n"
+        "    SQL SECURITY INVOKER\n"
+        "RETURN 1"
+    )
+    assert definitions['with_parameters'] == 'CREATE PROCEDURE `with_parameters`(IN p_id INT) SELECT p_id'
+    assert definitions['with_charset'] == "CREATE FUNCTION `with_charset`() RETURNS varchar(20) CHARSET utf8mb4 RETURN 'a'"
+    assert definitions['hidden'] == 'CREATE PROCEDURE `hidden`() SELECT 1'
+    # Only the qualifiers of the view's own database are removed
+    assert definitions['view1'] == (
+        "CREATE ALGORITHM=UNDEFINED DEFINER=`root`@`%` SQL SECURITY DEFINER VIEW `view1` AS "
+        "select `t1`.`id` AS `id`,'`testdb`.x' AS `label`,`other`.`testdb`.`id` AS `other_id` from (`t1` join `other`.`testdb`) /* `testdb`. */"
+    )
+    assert definitions['view2'] == 'CREATE VIEW `view2` AS select 1 AS `1`'
+    assert sum('SHOW CREATE' in str(call.args[0]) for call in fake_connection.execute.call_args_list) == 4
+
+
+def test_extract_schema_incremental(fake_connection):
+    # Arrange
+    extractor = MySQLSchemaExtractor(fake_connection)
+    previous_table = {'comment': '', 'columns': {}, 'primary_key': [], 'indexes': [], 'foreign_keys': [], 'checks': []}
+    previous = {
+        'schema': {'tables': {'table1': previous_table, 'table2': previous_table, 'table3': previous_table}},
+        'manifest': {'tables': {
+            'table1': '2025-01-01 00:00:00|None|4:111',
+            'table2': '2025-01-01 00:00:00|None|4:222',
+            'table3': '2025-01-01 00:00:00|None|4:333'
+        }}
+    }
+
+    catalog_rows = {
+        'information_schema.TABLES': [
+            {'TABLE_NAME': 'table1', 'CREATE_TIME': '2025-01-01 00:00:00', 'UPDATE_TIME': None},
+            {'TABLE_NAME': 'table2', 'CREATE_TIME': '2025-02-01 00:00:00', 'UPDATE_TIME': None},
+            {'TABLE_NAME': 'table3', 'CREATE_TIME': '2025-01-01 00:00:00', 'UPDATE_TIME': None},
+        ],
+        # Column added to table3 with ALGORITHM=INSTANT: same CREATE_TIME, its catalog rows changed
+        'TABLE_CHECKSUM': [('table1', '4:111'), ('table2', '4:222'), ('table3', '5:334')],
+        "Table_type = 'BASE TABLE'": [('table1',), ('table2',), ('table3',)],
+    }
+
+    def execute(query, params=None):
+        result = MagicMock()
+        result.fetchall.return_value = []
+        result.mappings.return_value.fetchall.return_value = []
+        for key, rows in catalog_rows.items():
+            if key in str(query):
+                result.fetchall.return_value = rows
+                result.mappings.return_value.fetchall.return_value = rows
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    with patch('database.extractor.mysql_extractor.inspect') as mock_inspect:
+        mock_inspector = MagicMock()
+        mock_inspector.get_columns.return_value = [{'name': 'id', 'type': 'INT', 'nullable': False}]
+        mock_inspector.get_pk_constraint.return_value = {'constrained_columns': ['id']}
+        mock_inspector.get_indexes.return_value = []
+        mock_inspector.get_foreign_keys.return_value = []
+        mock_inspector.get_check_constraints.return_value = []
+        mock_inspect.return_value = mock_inspector
+
+        schema = extractor.extract_schema(database='testdb', previous=previous)
+
+    # Assert: table1 is carried over, table2 (created again) and table3 (altered) are reflected again
+    assert schema['tables']['table1'] is previous_table
+    assert schema['tables']['table2']['primary_key'] == ['id']
+    assert [call.args[0] for call in mock_inspector.get_columns.call_args_list] == ['table2', 'table3']
+    assert extractor.manifest['tables']['table2'] == '2025-02-01 00:00:00|None|4:222'
+    assert extractor.manifest['tables']['table3'] == '2025-01-01 00:00:00|None|5:334'
+    # The checks are counted in the checksum of their table
+    checksum_query = next(str(call.args[0]) for call in fake_connection.execute.call_args_list if 'TABLE_CHECKSUM' in str(call.args[0]))
+    assert "JOIN information_schema.TABLE_CONSTRAINTS tc ON tc.CONSTRAINT_SCHEMA = cc.CONSTRAINT_SCHEMA AND tc.CONSTRAINT_NAME = cc.CONSTRAINT_NAME" in checksum_query
+
+
+def test_extract_manifest_without_check_constraints(fake_connection):
+    # Arrange: MySQL before 8.0.16 has no CHECK_CONSTRAINTS
+    from sqlalchemy.exc import DBAPIError
+
+    extractor = MySQLSchemaExtractor(fake_connection)
+
+    def execute(query, params=None):
+        if 'CHECK_CONSTRAINTS' in str(query):
+            raise DBAPIError("SELECT", {}, Exception("Unknown table 'CHECK_CONSTRAINTS'"))
+
+        result = MagicMock()
+        result.fetchall.return_value = [('table1', '4:111')] if 'TABLE_CHECKSUM' in str(query) else []
+        result.mappings.return_value.fetchall.return_value = [{'TABLE_NAME': 'table1', 'CREATE_TIME': '2025-01-01 00:00:00', 'UPDATE_TIME': None}] if 'information_schema.TABLES' in str(query) else []
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    manifest = extractor.extract_manifest(fake_connection, 'testdb')
+
+    # Assert
+    assert manifest['tables'] == {'table1': '2025-01-01 00:00:00|None|4:111'}
+
+
+def test_extract_schema_filtered(fake_connection):
+    # Arrange
+    from utils.object_filter import ObjectFilter
+
+    extractor = MySQLSchemaExtractor(fake_connection, object_filter=ObjectFilter(exclude=['*_tmp', 're:.*_old']))
+
+    def execute(query, params=None):
+        result = MagicMock()
+        result.fetchall.return_value = []
+        if "Table_type = 'BASE TABLE'" in str(query):
+            # The server applied the LIKE condition, the regex rule is checked on the rows
+            result.fetchall.return_value = [('orders',), ('orders_old',)]
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    # Act
+    with patch('database.extractor.mysql_extractor.inspect') as mock_inspect:
+        mock_inspector = MagicMock()
+        mock_inspector.get_columns.return_value = [{'name': 'id', 'type': 'INT', 'nullable': False}]
+        mock_inspector.get_pk_constraint.return_value = {'constrained_columns': ['id']}
+        mock_inspector.get_indexes.return_value = []
+        mock_inspector.get_foreign_keys.return_value = []
+        mock_inspector.get_check_constraints.return_value = []
+        mock_inspect.return_value = mock_inspector
+
+        schema = extractor.extract_schema(database='testdb')
+
+    # Assert
+    listing = next(call for call in fake_connection.execute.call_args_list if "Table_type = 'BASE TABLE'" in str(call.args[0]))
+    assert "AND NOT (LOWER(`Tables_in_testdb`) LIKE :filter_0)" in str(listing.args[0])
+    assert listing.args[1] == {'filter_0': '%\\_tmp'}
+    assert list(schema['tables']) == ['orders']
+
+
+def test_extract_checksum(fake_connection):
+    from sqlalchemy.exc import DBAPIError
+
+    extractor = MySQLSchemaExtractor(fake_connection)
+    fake_connection.execute.return_value.fetchone.return_value = ('2:123',) * len(MySQLSchemaExtractor.CHECKSUM_SOURCES)
+    checksum = extractor.extract_checksum(fake_connection, 'testdb')
+
+    # One query for the whole database
+    assert fake_connection.execute.call_count == 1
+    assert fake_connection.execute.call_args[0][1] == {'db': 'testdb'}
+
+    fake_connection.execute.return_value.fetchone.return_value = ('3:123',) + ('2:123',) * (len(MySQLSchemaExtractor.CHECKSUM_SOURCES) - 1)
+    assert extractor.extract_checksum(fake_connection, 'testdb') != checksum
+
+    # Catalog not readable: the database is extracted
+    fake_connection.execute.side_effect = DBAPIError("SELECT", {}, Exception("Unknown table 'CHECK_CONSTRAINTS'"))
+    assert extractor.extract_checksum(fake_connection, 'testdb') is None
+
+
+def test_unreadable_table_is_not_dropped(fake_connection, tmp_path):
+    from export.file_exporter import FileExporter
+    from export.schema_pipeline import SchemaPipeline, StaleFilesSink, ChangelogSink
+
+    extractor = MySQLSchemaExtractor(fake_connection)
+    exporter = FileExporter(str(tmp_path))
+    exporter.save_sql('tables', 'table1', 'CREATE TABLE `table1` (`id` INT);')
+    previous = {'tables': {'table1': {'comment': '', 'columns': {'id': {'type': 'INT'}}, 'primary_key': [], 'indexes': [], 'foreign_keys': [], 'checks': []}}}
+
+    def execute(query, params=None):
+        result = MagicMock()
+        result.fetchall.return_value = [('table1',)] if "Table_type = 'BASE TABLE'" in str(query) else []
+        return result
+
+    fake_connection.execute.side_effect = execute
+
+    with patch('database.extractor.mysql_extractor.inspect') as mock_inspect:
+        # Not a DBAPI error: raised by the driver or while parsing the catalog
+        mock_inspect.return_value.get_columns.side_effect = TimeoutError('Read timed out')
+        changelog = MagicMock()
+
+        SchemaPipeline([StaleFilesSink(exporter), ChangelogSink(previous, exporter.changed_files, changelog, 'testdb')]).run(
+            extractor.stream_schema(exporter, 'testdb')
+        )
+        schema = extractor.extract_schema(database='testdb')
+
+    assert (tmp_path / 'tables' / 'table1.sql').exists()
+    assert exporter.stats['removed'] == 0
+    changelog.save.assert_called_once_with('testdb', {})
+    assert schema['tables'] == {'table1': {'error': 'Could not read table: Read timed out'}}
+
+
+def test_extract_schema_bulk_filtered(fake_connection):
+    from sqlalchemy.dialects.mysql import pymysql
+    from utils.object_filter import ObjectFilter
+
+    fake_connection.dialect = pymysql.dialect()
+    extractor = MySQLSchemaExtractor(fake_connection, bulk=True, object_filter=ObjectFilter(exclude=['stg_*']))
+    fake_connection.execute.return_value.fetchall.return_value = []
+    fake_connection.execute.return_value.mappings.return_value.fetchall.return_value = []
+
+    extractor.extract_schema(database='testdb')
+
+    # Every catalog query of the bulk mode excludes the staging tables on the server
+    catalog_queries = [call for call in fake_connection.execute.call_args_list if 'information_schema' in str(call.args[0]).lower()]
+    assert len(catalog_queries) == 7
+
+    for call in catalog_queries:
+        assert "AND NOT (" in str(call.args[0]) and "LIKE :filter_0)" in str(call.args[0])
+        assert call.args[1] == {'db': 'testdb', 'filter_0': 'stg\\_%'}
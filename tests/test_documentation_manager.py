@@ -45,3 +45,41 @@ def test_update_or_remove(temp_doc_file):
 
     manager.update_or_remove(fake_schema, 'tables')
     assert "new_table" in manager.documentation['tables']
+
+def test_reconcile_prunes_columns_and_keeps_error_sections(temp_doc_file):
+    manager = DocumentationExporter(doc_file=str(temp_doc_file))
+    manager.documentation['tables'] = {
+        'orders': {'description': 'Orders', 'remarks': '', 'columns': {
+            'id': {'description': 'Key', 'remarks': ''},
+            'legacy': {'description': 'Dropped', 'remarks': ''}
+        }},
+        'locked': {'description': 'Unreadable', 'remarks': '', 'columns': {'id': {'description': 'Key', 'remarks': ''}}},
+        'old_table': {'description': '', 'remarks': '', 'columns': {}}
+    }
+    manager.documentation['procedures'] = {'sp_keep': {'description': 'Kept', 'remarks': ''}}
+
+    schema = {
+        'tables': {
+            'orders': {'columns': {'id': {}, 'total': {}}},
+            'locked': {'error': 'Insufficient privileges to read table.'}
+        },
+        'views': {},
+        'procedures': {'error': 'Insufficient privileges to list procedures'},
+        'functions': {},
+        'triggers': {}
+    }
+
+    report = manager.reconcile(schema)
+
+    assert manager.documentation['tables']['orders']['description'] == 'Orders'
+    assert list(manager.documentation['tables']['orders']['columns']) == ['id', 'total']
+    assert manager.documentation['tables']['locked']['columns'] == {'id': {'description': 'Key', 'remarks': ''}}
+    assert 'old_table' not in manager.documentation['tables']
+    assert manager.documentation['procedures'] == {'sp_keep': {'description': 'Kept', 'remarks': ''}}
+    assert report['tables'] == {
+        'added': [],
+        'removed': ['old_table'],
+        'columns_added': {'orders': ['total']},
+        'columns_removed': {'orders': ['legacy']}
+    }
+    assert 'procedures' not in report
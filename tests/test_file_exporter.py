@@ -0,0 +1,55 @@
+import os
+
+from export.file_exporter import FileExporter
+
+
+def test_save_sql_skips_unchanged_file(tmp_path):
+    exporter = FileExporter(str(tmp_path))
+
+    exporter.save_sql('tables', 'users', 'CREATE TABLE users (id INT);\n')
+    file_path = tmp_path / 'tables' / 'users.sql'
+    os.utime(file_path, (0, 0))
+
+    # Same content: the file is not rewritten
+    exporter.save_sql('tables', 'users', 'CREATE TABLE users (id INT);\n')
+    assert os.path.getmtime(file_path) == 0
+
+    # Same size, different content
+    exporter.save_sql('tables', 'users', 'CREATE TABLE users (id BIT);\n')
+    assert os.path.getmtime(file_path) != 0
+    assert file_path.read_text(encoding='utf-8') == 'CREATE TABLE users (id BIT);\n'
+
+    assert exporter.stats == {'written': 2, 'skipped': 1, 'removed': 0}
+
+def test_remove_stale_sql(tmp_path):
+    exporter = FileExporter(str(tmp_path))
+    exporter.save_sql('views', 'active/users', 'CREATE VIEW ...')
+    exporter.save_sql('views', 'dropped', 'CREATE VIEW ...')
+    (tmp_path / 'views' / 'notes.txt').write_text('kept')
+
+    exporter.remove_stale_sql({'views': ['active/users'], 'triggers': []})
+
+    assert sorted(os.listdir(tmp_path / 'views')) == ['active_users.sql', 'notes.txt']
+    assert exporter.stats['removed'] == 1
+
+def test_write_behind(tmp_path):
+    exporter = FileExporter(str(tmp_path), writers=2, queue_size=4)
+    (tmp_path / 'views').mkdir()
+    (tmp_path / 'views' / 'blocked.sql').mkdir()
+
+    for index in range(20):
+        assert exporter.save_sql('tables', f"t{index}", f"CREATE TABLE t{index} (id INT);\n") == os.path.join('tables', f"t{index}.sql")
+
+    # Last content of a file, even if it is not written yet
+    exporter.save_sql('tables', 't0', 'CREATE TABLE t0 (id BIGINT);\n')
+    assert exporter.read_sql(os.path.join('tables', 't0.sql')) == 'CREATE TABLE t0 (id BIGINT);\n'
+
+    # A file that cannot be written is reported, the others are written
+    exporter.save_sql('views', 'blocked', 'CREATE VIEW blocked ...')
+    exporter.close()
+
+    assert (tmp_path / 'tables' / 't0.sql').read_text(encoding='utf-8') == 'CREATE TABLE t0 (id BIGINT);\n'
+    assert exporter.stats == {'written': 21, 'skipped': 0, 'removed': 0}
+    assert [path for path, _ in exporter.errors] == [os.path.join('views', 'blocked.sql')]
+    assert exporter.pending == {}
+    assert not [name for name in os.listdir(tmp_path / 'tables') if name.endswith('.tmp')]
@@ -0,0 +1,52 @@
+from handler.history_store import HistoryStore
+
+
+def table(*columns, column_type='int'):
+    return {'columns': {name: {'type': column_type} for name in columns}, 'primary_key': [], 'indexes': [], 'foreign_keys': [], 'checks': []}
+
+def count(store, table_name):
+    return store.connection.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+def test_record_only_changes(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    schema = {'tables': {'orders': table('id', 'total'), 'customers': table('id')}, 'views': {}, 'procedures': {}, 'functions': {}, 'triggers': {}}
+
+    first = store.start_run('db')
+    assert store.record(first, 'shop', schema) == {'added': 2, 'changed': 0, 'dropped': 0}
+
+    # Unchanged runs write nothing but the run
+    for _ in range(10):
+        assert store.record(store.start_run('db'), 'shop', schema) == {'added': 0, 'changed': 0, 'dropped': 0}
+
+    # Same content in another database: the blob is shared
+    store.record(store.start_run('db'), 'shop_copy', schema)
+
+    assert count(store, 'versions') == 4
+    assert count(store, 'blobs') == 2
+    store.close()
+
+def test_history_and_diff(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    base = {'views': {}, 'procedures': {}, 'functions': {}, 'triggers': {}}
+
+    first = store.start_run()
+    store.record(first, 'shop', {**base, 'tables': {'orders': table('id', 'total'), 'legacy': table('id')}})
+    second = store.start_run()
+    store.record(second, 'shop', {**base, 'tables': {'orders': table('id', 'total', 'status')}, 'procedures': {'error': 'Insufficient privileges'}})
+    third = store.start_run()
+    store.record(third, 'shop', {**base, 'tables': {'orders': {**table('id', 'status'), 'columns': {'id': {'type': 'int'}, 'total': {'type': 'decimal'}, 'status': {'type': 'int'}}}}})
+
+    versions = store.history('orders', 'tables', 'shop')
+    assert [(version['from_run'], version['to_run']) for version in versions] == [(first, second), (second, third), (third, None)]
+
+    # Versions where the column changed: added in the first run, type changed in the third
+    assert [version['from_run'] for version in store.history('orders', column='total')] == [first, third]
+    assert [version['from_run'] for version in store.history('orders', column='status')] == [second]
+
+    assert store.snapshot(first, 'shop')['tables'].keys() == {'orders', 'legacy'}
+
+    changelog = store.diff('shop', first, third)
+    assert changelog['tables']['dropped'] == ['legacy']
+    assert changelog['tables']['altered']['orders']['columns']['added'] == ['status']
+    assert changelog['tables']['altered']['orders']['columns']['altered']['total'] == {'before': {'type': 'int'}, 'after': {'type': 'decimal'}}
+    store.close()
@@ -0,0 +1,97 @@
+import json
+
+from database.replay import QueryCounter, replay_engine_factory
+from benchmark.synthetic import SyntheticMySQLServer
+from core import Core
+from database.connection import DatabaseConnection
+from utils.metrics import Metrics
+
+
+def test_query_shape():
+    assert Metrics.shape("SHOW CREATE TABLE `bench`.`table_000001`") == "SHOW CREATE TABLE ?.?"
+    assert Metrics.shape("USE [my db]") == "USE ?"
+    assert Metrics.shape("SELECT *\n  FROM t WHERE id = 42 AND name = 'it''s'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert Metrics.shape("SELECT c FROM t WHERE t.name IN (%(name_1)s, %(name_2)s)") == "SELECT c FROM t WHERE t.name IN (...)"
+
+def test_report_percentiles():
+    metrics = Metrics()
+
+    for i in range(1, 101):
+        metrics.add_query('db:3306', f"SHOW CREATE TABLE `t{i}`", i / 1000, rows=1)
+
+    metrics.add_query('db:3306', "SHOW DATABASES", 0.5, rows=3)
+    timer = metrics.phase_timer('db:3306', 'bench')
+    timer.start('tables')
+    timer.start('views')
+    timer.stop()
+
+    report = metrics.report()
+    server = report['servers']['db:3306']
+
+    assert server['query_count'] == 101
+    assert server['rows'] == 103
+    assert server['shapes'][0]['shape'] == "SHOW CREATE TABLE ?"
+    assert server['shapes'][0]['count'] == 100
+    assert (server['shapes'][0]['p50'], server['shapes'][0]['p95'], server['shapes'][0]['p99']) == (0.05, 0.095, 0.099)
+    assert list(report['databases']['bench']['phases']) == ['tables', 'views']
+
+def test_unknown_rowcount(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine('sqlite://')
+    metrics = Metrics()
+    metrics.attach(engine, 'local')
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INT)"))
+        conn.execute(text("INSERT INTO t VALUES (1), (2)"))
+        # The driver does not know the number of rows of a SELECT (rowcount is -1, as with pyodbc)
+        assert conn.execute(text("SELECT id FROM t")).cursor.rowcount == -1
+        assert len(conn.execute(text("SELECT id FROM t")).fetchall()) == 2
+
+    server = metrics.report()['servers']['local']
+    shapes = {item['shape']: item for item in server['shapes']}
+
+    assert shapes["INSERT INTO t VALUES (...), (...)"]['rows'] == 2
+    assert shapes["SELECT id FROM t"]['rows'] is None
+    assert server['rows'] is None
+
+    metrics.save_prometheus(str(tmp_path / 'metrics.prom'))
+    content = (tmp_path / 'metrics.prom').read_text(encoding='utf-8')
+    assert 'db_trackchanges_query_rows{server="local",shape="INSERT INTO t VALUES (...), (...)"} 2' in content
+    assert 'db_trackchanges_query_rows{server="local",shape="SELECT id FROM t"}' not in content
+
+def test_prometheus_file(tmp_path):
+    metrics = Metrics()
+    metrics.add_query('db:3306', 'SELECT "a"', 0.25)
+    metrics.phase_timer('db:3306', 'bench').start('tables')
+
+    metrics.save_prometheus(str(tmp_path / 'metrics.prom'))
+    content = (tmp_path / 'metrics.prom').read_text(encoding='utf-8')
+
+    assert 'db_trackchanges_queries{server="db:3306",shape="SELECT \\"a\\""} 1' in content
+    assert 'db_trackchanges_query_seconds{server="db:3306",shape="SELECT \\"a\\"",quantile="0.99"} 0.25' in content
+    assert not (tmp_path / 'metrics.prom.tmp').exists()
+
+def test_run_metrics(tmp_path):
+    source = SyntheticMySQLServer(tables=5, columns=3, views=1, procedures=1)
+    metrics_file = tmp_path / 'metrics.json'
+    core = Core('mysql', 'replay', 3306, 'user', 'password', output=str(tmp_path / 'output'), databases=['bench'], metrics_file=str(metrics_file))
+
+    DatabaseConnection.dispose_all()
+    DatabaseConnection.engine_factory = replay_engine_factory(source, QueryCounter())
+
+    try:
+        core.run()
+    finally:
+        DatabaseConnection.engine_factory = None
+
+    report = json.loads(metrics_file.read_text(encoding='utf-8'))
+    server = report['servers']['replay:3306']
+    shapes = {item['shape']: item for item in server['shapes']}
+
+    # Tables and views are reflected with SHOW CREATE TABLE
+    assert shapes["SHOW CREATE TABLE ?.?"]['count'] == 6
+    assert server['rows'] > 0
+    assert list(report['databases']['bench']['phases']) == ['catalog', 'tables', 'views', 'procedures', 'functions', 'triggers']
+    assert DatabaseConnection.metrics is None
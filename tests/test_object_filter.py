@@ -0,0 +1,48 @@
+import sqlite3
+
+from utils.object_filter import ObjectFilter
+
+
+def test_allows():
+    object_filter = ObjectFilter(include=['orders*', 'audit.*', 're:^cust_[0-9]+$'], exclude=['*_tmp', 'audit.log_?'])
+
+    assert object_filter.allows('Orders_2024')
+    assert not object_filter.allows('orders_tmp')
+    assert object_filter.allows('events', 'audit')
+    assert not object_filter.allows('log_1', 'audit')
+    assert object_filter.allows('cust_12')
+    assert not object_filter.allows('cust_x')
+    assert not object_filter.allows('events', 'dbo')
+    assert not ObjectFilter()
+    assert ObjectFilter().allows('anything')
+
+def test_sql_condition():
+    object_filter = ObjectFilter(include=['Orders*', 'audit.*'], exclude=['*_tmp', 're:.*_old'])
+
+    condition, parameters = object_filter.sql_condition('TABLE_NAME', 'TABLE_SCHEMA', escape='\\')
+    assert condition == "((LOWER(TABLE_NAME) LIKE :filter_0 ESCAPE '\\') OR (LOWER(TABLE_SCHEMA) LIKE :filter_1 ESCAPE '\\')) AND NOT (LOWER(TABLE_NAME) LIKE :filter_2 ESCAPE '\\')"
+    assert parameters == {'filter_0': 'orders%', 'filter_1': 'audit', 'filter_2': '%\\_tmp'}
+
+    # Known schema (MySQL): the schema part of the rules is resolved here
+    assert object_filter.sql_condition('Name', schema='audit') == ("NOT (LOWER(Name) LIKE :filter_0)", {'filter_0': '%\\_tmp'})
+
+    condition, parameters = object_filter.sql_condition('Name', schema='shop')
+    assert condition == "((LOWER(Name) LIKE :filter_0)) AND NOT (LOWER(Name) LIKE :filter_1)"
+
+    # Regular expressions cannot be translated, the include rules are then only checked with allows()
+    assert ObjectFilter(include=['re:a.*', 'b*']).sql_condition('Name') == (None, {})
+
+def test_sql_condition_case_sensitive_collation():
+    # Case-sensitive LIKE, as on a binary (MySQL) or CS (SQL Server) collation
+    connection = sqlite3.connect(':memory:')
+    connection.execute("PRAGMA case_sensitive_like = ON")
+    connection.execute("CREATE TABLE objects (name TEXT)")
+    names = ['Orders_2024', 'orders_2025', 'ORDERS_TMP', 'Customers']
+    connection.executemany("INSERT INTO objects VALUES (?)", [(name,) for name in names])
+
+    object_filter = ObjectFilter(include=['orders*', 'CUSTOMERS'], exclude=['*_Tmp'])
+    condition, parameters = object_filter.sql_condition('name', escape='\\')
+    listed = [row[0] for row in connection.execute(f"SELECT name FROM objects WHERE {condition} ORDER BY rowid", parameters)]
+
+    # The server keeps the rows allows() keeps
+    assert listed == [name for name in names if object_filter.allows(name)] == ['Orders_2024', 'orders_2025', 'Customers']
@@ -0,0 +1,99 @@
+import os
+
+from export.file_exporter import FileExporter
+from handler.object_store import ObjectStore, DedupSchemaHandler
+
+
+def test_put_shares_identical_objects(tmp_path):
+    store = ObjectStore(str(tmp_path / '_objects'))
+
+    first, exact = store.put("CREATE VIEW `shop_1`.`totals` AS SELECT 1;\n", 'shop_1', 'sql')
+    assert exact
+
+    # Same view in another database: same fingerprint, rendered with its own name
+    second, exact = store.put("CREATE VIEW `shop_2`.`totals` AS SELECT 1;\n", 'shop_2', 'sql')
+    assert (second, exact) == (first, True)
+    assert store.get(first, 'shop_2', 'sql') == "CREATE VIEW `shop_2`.`totals` AS SELECT 1;\n"
+
+    # Only the formatting differs: same fingerprint, the database keeps its own copy
+    third, exact = store.put("CREATE VIEW `shop_3`.`totals`\n    AS SELECT 1;\n", 'shop_3', 'sql')
+    assert (third, exact) == (first, False)
+
+    assert len([name for _, _, files in os.walk(tmp_path / '_objects') for name in files]) == 1
+
+def test_dedup_schema_round_trip(tmp_path):
+    store = ObjectStore(str(tmp_path / '_objects'))
+
+    def schema(database):
+        return {
+            'tables': {'orders': {'columns': {'id': {'type': 'int'}, 'customer': {'type': 'int'}}, 'foreign_keys': [{'schema': database}]}},
+            'views': {'error': 'Insufficient privileges'}
+        }
+
+    for database in ['shop_1', 'shop_2']:
+        handler = DedupSchemaHandler(str(tmp_path / f"{database}.refs.json"), store, database)
+        writer = handler.writer()
+
+        for schema_type, section in schema(database).items():
+            writer.section(schema_type, section if 'error' in section else None)
+
+            if 'error' not in section:
+                for name, entry in section.items():
+                    writer.write(schema_type, name, entry)
+
+        assert writer.close()
+
+    loaded = DedupSchemaHandler(str(tmp_path / "shop_1.refs.json"), ObjectStore(str(tmp_path / '_objects')), 'shop_1').load()
+    assert list(loaded['tables']['orders']['columns']) == ['id', 'customer']
+    assert {schema_type: dict(section) for schema_type, section in loaded.items()} == schema('shop_1')
+
+    # The other database references the same entry, rendered with its name
+    loaded = DedupSchemaHandler(str(tmp_path / "shop_2.refs.json"), store, 'shop_2').load()
+    assert loaded['tables']['orders']['foreign_keys'] == [{'schema': 'shop_2'}]
+    assert len(os.listdir(tmp_path / '_objects')) == 1
+
+def test_file_exporter_references_shared_files(tmp_path):
+    store = ObjectStore(str(tmp_path / '_objects'))
+    exporter = FileExporter(str(tmp_path / 'shop_1'), store=store)
+
+    # Formatting differs from the stored definition: written as an override
+    store.put("CREATE VIEW `x`.`totals` AS SELECT 1;", 'x', 'sql')
+    exporter.save_sql('views', 'totals', "CREATE VIEW `shop_1`.`totals`  AS SELECT 1;")
+    exporter.save_sql('views', 'dropped', "CREATE VIEW `shop_1`.`dropped` AS SELECT 2;")
+    exporter.remove_stale_sql({'views': ['totals', 'dropped']})
+
+    assert sorted(os.listdir(tmp_path / 'shop_1' / 'views')) == ['totals.sql']
+    assert exporter.read_sql(os.path.join('views', 'dropped.sql')) == "CREATE VIEW `shop_1`.`dropped` AS SELECT 2;"
+
+    # Next run: same formatting as the store, the override is removed and the dropped view is no longer referenced
+    exporter = FileExporter(str(tmp_path / 'shop_1'), store=store)
+    exporter.save_sql('views', 'totals', "CREATE VIEW `shop_1`.`totals` AS SELECT 1;")
+    assert exporter.read_sql(os.path.join('views', 'totals.sql')) == "CREATE VIEW `shop_1`.`totals` AS SELECT 1;"
+    exporter.remove_stale_sql({'views': ['totals']})
+
+    assert os.listdir(tmp_path / 'shop_1' / 'views') == []
+    assert list(exporter.references) == [os.path.join('views', 'totals.sql')]
+    assert exporter.stats == {'written': 1, 'skipped': 0, 'removed': 1}
+    assert exporter.changed_files == {os.path.join('views', 'totals.sql')}
+
+    # Unchanged since the previous run
+    exporter = FileExporter(str(tmp_path / 'shop_1'), store=store)
+    exporter.save_sql('views', 'totals', "CREATE VIEW `shop_1`.`totals` AS SELECT 1;")
+    assert exporter.stats['skipped'] == 1
+
+def test_drift(tmp_path):
+    store = ObjectStore(str(tmp_path / '_objects'))
+
+    for database, definition in [('shop_1', 'SELECT 1'), ('shop_2', 'SELECT 1'), ('shop_3', 'SELECT 2')]:
+        exporter = FileExporter(str(tmp_path / database), store=store)
+        path = exporter.save_sql('views', 'totals', definition)
+        exporter.remove_stale_sql({'views': ['totals']})
+
+        writer = DedupSchemaHandler(str(tmp_path / database / f"{database}_schema.refs.json"), store, database).writer()
+        writer.section('views')
+        writer.write('views', 'totals', {'definition_file': path})
+        writer.close()
+
+    drift = store.drift(str(tmp_path))
+    assert list(drift) == ['views']
+    assert sorted(drift['views']['totals'].values()) == [['shop_1', 'shop_2'], ['shop_3']]
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter
+from database.extractor.parallel_extractor import ParallelSchemaExtractor
+
+
+class FakeConnection:
+    def __init__(self):
+        self.opened = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connect(self):
+        with self.lock:
+            name = f"conn{len(self.opened)}"
+            self.opened.append(name)
+
+        yield name
+
+
+class FakeExtractor(SchemaExtractorAdapter):
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None):
+        schema = {'tables': {}, 'views': {}}
+
+        for index in range(10):
+            name = f"table_{index:02d}"
+            self.submit(conn, schema, partial(self.read_object, schema_type='tables', name=name), schema_type='tables', name=name)
+
+        for name in ['view_a', 'view_b']:
+            self.submit(conn, schema, partial(self.read_object, schema_type='views', name=name), schema_type='views', name=name)
+
+        return schema
+
+    def read_object(self, conn, schema, schema_type, name):
+        schema[schema_type][name] = {'columns': [name.upper()], 'connection': conn != 'conn0'}
+
+    def extract_manifest(self, conn, database=None):
+        return {}
+
+    def list_databases(self):
+        return []
+
+
+def test_plan_splits_by_type_and_name_range():
+    tasks = [('tables', f"t{index}", None) for index in range(5)] + [('views', 'v0', None)]
+
+    assert ParallelSchemaExtractor.plan(tasks, 2) == [[0, 1, 2], [3, 4], [5]]
+    assert ParallelSchemaExtractor.plan(tasks, 1) == [[0, 1, 2, 3, 4], [5]]
+    assert ParallelSchemaExtractor.plan([], 4) == []
+
+
+def test_parallel_schema_matches_serial():
+    serial_schema = FakeExtractor(FakeConnection()).extract_schema(database='testdb')
+
+    connection = FakeConnection()
+    schema = ParallelSchemaExtractor(FakeExtractor(connection), shards=3).extract_schema(database='testdb')
+
+    assert list(schema['tables']) == list(serial_schema['tables'])
+    assert list(schema['views']) == ['view_a', 'view_b']
+    # Listed on the first connection, every object extracted on a worker connection
+    assert all(entry['connection'] for section in schema.values() for entry in section.values())
+    assert len(connection.opened) == 4
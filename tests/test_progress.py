@@ -0,0 +1,53 @@
+import threading
+
+from utils.progress import Progress
+
+
+def test_progress_counts_from_several_threads():
+    progress = Progress(databases=4, tty=False, log_interval=3600)
+
+    def worker():
+        progress.start_database()
+        progress.discover(500)
+
+        for _ in range(500):
+            progress.advance()
+
+        progress.finish_database()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    state = progress.snapshot()
+
+    assert (state['databases'], state['databases_total']) == (4, 4)
+    assert (state['objects'], state['objects_total']) == (2000, 2000)
+    assert state['eta'] == 0
+
+def test_progress_is_throttled(capsys):
+    progress = Progress(databases=1, tty=False, log_interval=3600)
+    progress.start_database()
+    progress.discover(1000)
+
+    for _ in range(1000):
+        progress.advance()
+
+    progress.finish_database()
+    progress.close()
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if 'progress' in line]
+
+    # First refresh and end of the last database, close has nothing new to report
+    assert len(lines) == 2
+    assert "databases=1/1 objects=1000/1000" in lines[-1]
+
+def test_progress_estimates_databases_not_listed_yet():
+    progress = Progress(databases=3, tty=False, log_interval=3600)
+    progress.start_database()
+    progress.discover(100)
+
+    assert progress.snapshot()['objects_total'] == 300
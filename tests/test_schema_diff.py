@@ -0,0 +1,65 @@
+import os
+import time
+
+from export.changelog_exporter import ChangelogExporter
+from utils.schema_diff import SchemaDiff
+
+
+def table(columns, indexes=None):
+    return {
+        'comment': '',
+        'columns': {name: {'type': column_type, 'nullable': True} for name, column_type in columns.items()},
+        'primary_key': ['id'],
+        'indexes': indexes or [],
+        'foreign_keys': [],
+        'checks': []
+    }
+
+def test_compare_schemas():
+    previous = {
+        'tables': {
+            'users': table({'id': 'INTEGER', 'name': 'VARCHAR(20)'}),
+            'logs': table({'id': 'INTEGER'}),
+            'same': table({'id': 'INTEGER'})
+        },
+        'procedures': {'refresh': {'definition_file': os.path.join('procedures', 'refresh.sql')}, 'kept': {'definition_file': os.path.join('procedures', 'kept.sql')}},
+        'views': {'error': 'Insufficient privileges to access views'}
+    }
+    current = {
+        'tables': {
+            'users': table({'id': 'INTEGER', 'name': 'VARCHAR(50)', 'email': 'VARCHAR(100)'}, [{'name': 'ix_email', 'columns': ['email'], 'unique': True}]),
+            'same': table({'id': 'INTEGER'}),
+            'orders': table({'id': 'INTEGER'})
+        },
+        'procedures': {'refresh': {'definition_file': os.path.join('procedures', 'refresh.sql')}, 'kept': {'definition_file': os.path.join('procedures', 'kept.sql')}},
+        'views': {'v_users': {'columns': {}}}
+    }
+
+    changelog = SchemaDiff({os.path.join('procedures', 'refresh.sql')}).compare(previous, current)
+
+    assert changelog['tables']['added'] == ['orders']
+    assert changelog['tables']['dropped'] == ['logs']
+    assert list(changelog['tables']['altered']) == ['users']
+    users = changelog['tables']['altered']['users']
+    assert users['columns']['added'] == ['email']
+    assert users['columns']['altered']['name']['after'] == {'type': 'VARCHAR(50)', 'nullable': True}
+    assert users['indexes']['added'] == ['ix_email']
+    assert changelog['procedures'] == {'added': [], 'dropped': [], 'altered': {'refresh': {'definition': {'file': os.path.join('procedures', 'refresh.sql')}}}}
+    # Sections in error are not compared
+    assert 'views' not in changelog
+
+    markdown = ChangelogExporter.to_markdown('testdb', changelog)
+    assert "- Added: `orders`" in markdown
+    assert "- Added columns: `email`" in markdown
+    assert "- Altered columns `name`: type `\"VARCHAR(20)\"` -> `\"VARCHAR(50)\"`" in markdown
+
+def test_compare_identical_schemas_is_fast():
+    schema = {'tables': {f"table{i}": table({'id': 'INTEGER', 'name': 'VARCHAR(20)'}) for i in range(50000)}}
+    previous = {'tables': {name: dict(item) for name, item in schema['tables'].items()}}
+
+    start = time.perf_counter()
+    changelog = SchemaDiff().compare(previous, schema)
+
+    assert changelog == {}
+    assert time.perf_counter() - start < 1
+    assert ChangelogExporter.to_markdown('testdb', changelog) == "# Changes in testdb\n\nNo changes.\n"
@@ -0,0 +1,116 @@
+import os
+from functools import partial
+from unittest.mock import MagicMock
+
+from adapter.schema_extractor_adapter import SchemaExtractorAdapter, SECTION
+from export.documentation_exporter import DocumentationExporter
+from export.schema_pipeline import SchemaPipeline, ChangelogSink, DocumentationSink
+from utils.schema_diff import SchemaDiff
+
+
+class FakeConnection:
+    def connect(self):
+        return MagicMock(__enter__=MagicMock(return_value="conn"))
+
+
+class FakeExtractor(SchemaExtractorAdapter):
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.extracted = []
+
+    def read_schema(self, conn, file_exporter=None, database=None, previous=None):
+        schema = {'tables': {}, 'views': {}, 'triggers': {}}
+
+        for name in ['orders', 'customers']:
+            self.submit(conn, schema, partial(self.read_table, name=name), schema_type='tables', name=name)
+
+        # Read with the listing
+        schema['triggers']['audit'] = {'definition_file': 'triggers/audit.sql'}
+        schema['views'] = {'error': 'Could not read views'}
+
+        return schema
+
+    def read_table(self, conn, schema, name):
+        self.extracted.append(name)
+        schema['tables'][name] = {'columns': {'id': {'type': 'int'}}}
+
+    def extract_manifest(self, conn, database=None):
+        return {}
+
+    def list_databases(self):
+        return []
+
+
+def test_stream_schema_yields_one_object_at_a_time():
+    extractor = FakeExtractor(FakeConnection())
+    events = extractor.stream_schema(database='testdb')
+
+    assert next(events) == (SECTION, 'tables', None)
+    assert next(events) == ('tables', 'orders', {'columns': {'id': {'type': 'int'}}})
+    # The next object is only read when the previous one is consumed
+    assert extractor.extracted == ['orders']
+
+    assert list(events) == [
+        ('tables', 'customers', {'columns': {'id': {'type': 'int'}}}),
+        (SECTION, 'views', {'error': 'Could not read views'}),
+        (SECTION, 'triggers', None),
+        ('triggers', 'audit', {'definition_file': 'triggers/audit.sql'}),
+    ]
+
+    assert FakeExtractor(FakeConnection()).extract_schema(database='testdb') == {
+        'tables': {'orders': {'columns': {'id': {'type': 'int'}}}, 'customers': {'columns': {'id': {'type': 'int'}}}},
+        'views': {'error': 'Could not read views'},
+        'triggers': {'audit': {'definition_file': 'triggers/audit.sql'}}
+    }
+
+
+def test_sinks_match_the_whole_schema(tmp_path):
+    previous = {
+        'tables': {'orders': {'columns': {'id': {'type': 'int'}}}, 'legacy': {'columns': {}}},
+        'views': {'error': 'Could not read views'},
+        'procedures': {'refresh': {'definition_file': 'procedures/refresh.sql'}}
+    }
+    schema = {
+        'tables': {'orders': {'columns': {'id': {'type': 'bigint'}, 'total': {'type': 'int'}}}, 'customers': {'columns': {'id': {'type': 'int'}}}},
+        'views': {'v_orders': {'columns': {}}},
+        'procedures': {'refresh': {'definition_file': 'procedures/refresh.sql'}}
+    }
+    changed_files = {'procedures/refresh.sql'}
+
+    exporter = MagicMock()
+    expected_documentation = DocumentationExporter(str(tmp_path / 'expected.json'))
+    expected_report = expected_documentation.reconcile(schema)
+    documentation = DocumentationExporter(str(tmp_path / 'Documentation.json'))
+
+    changelog, report = SchemaPipeline([
+        ChangelogSink(previous, changed_files, exporter, 'shop'),
+        DocumentationSink(documentation)
+    ]).run(SchemaExtractorAdapter.events(schema))
+
+    assert changelog == SchemaDiff(changed_files).compare(previous, schema)
+    exporter.save.assert_called_once_with('shop', changelog)
+    assert report == expected_report
+    assert documentation.get_documentation() == expected_documentation.get_documentation()
+    assert (tmp_path / 'Documentation.json').exists()
+
+
+def test_changelog_definitions_written_in_background(tmp_path):
+    from export.file_exporter import FileExporter
+
+    FileExporter(str(tmp_path)).save_sql('procedures', 'refresh', 'CREATE PROCEDURE refresh() SELECT 1;')
+
+    entry = {'definition_file': 'procedures/refresh.sql'}
+    previous = {'procedures': {'refresh': entry, 'purge': entry}}
+    exporter = FileExporter(str(tmp_path), writers=1)
+    sink = ChangelogSink(previous, exporter.changed_files, MagicMock(), 'shop')
+
+    def events():
+        yield SECTION, 'procedures', None
+        # Queued: the file may not be written yet when the object is compared
+        yield 'procedures', 'refresh', {'definition_file': exporter.save_sql('procedures', 'refresh', 'CREATE PROCEDURE refresh() SELECT 2;')}
+
+    changelog, = SchemaPipeline([sink]).run(events(), before_close=exporter.flush)
+    exporter.close()
+
+    assert changelog['procedures']['altered'] == {'refresh': {'definition': {'file': os.path.join('procedures', 'refresh.sql')}}}
+    assert changelog['procedures']['dropped'] == ['purge']
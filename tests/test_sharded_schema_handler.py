@@ -0,0 +1,36 @@
+import os
+
+from handler.sharded_schema_handler import ShardedSchemaHandler
+
+
+def test_save_and_load_sharded_schema(tmp_path):
+    handler = ShardedSchemaHandler(str(tmp_path / 'schema'))
+    schema = {
+        'tables': {'users': {'columns': [{'name': 'id'}]}, 'logs/2024': {'columns': []}},
+        'views': {'error': 'Insufficient privileges to access views'}
+    }
+
+    assert handler.save(schema)
+    assert os.path.exists(tmp_path / 'schema' / 'tables' / 'users.json')
+    assert os.path.exists(tmp_path / 'schema' / 'tables' / 'logs_2024.json')
+
+    loaded = handler.load()
+    assert list(loaded['tables']) == ['users', 'logs/2024']
+    assert loaded['tables']['users'] == {'columns': [{'name': 'id'}]}
+    assert loaded['tables'].get('missing') is None
+    assert loaded['views'] == {'error': 'Insufficient privileges to access views'}
+
+def test_save_skips_unchanged_and_removes_dropped(tmp_path):
+    handler = ShardedSchemaHandler(str(tmp_path))
+    handler.save({'tables': {'users': {'columns': []}, 'dropped': {'columns': []}}})
+    os.utime(tmp_path / 'tables' / 'users.json', (0, 0))
+
+    assert handler.save({'tables': {'users': {'columns': []}}})
+    assert os.path.getmtime(tmp_path / 'tables' / 'users.json') == 0
+    assert sorted(os.listdir(tmp_path / 'tables')) == ['users.json']
+
+    # Nothing changed since the previous save
+    assert not handler.save({'tables': {'users': {'columns': []}}})
+
+def test_load_missing_snapshot(tmp_path):
+    assert ShardedSchemaHandler(str(tmp_path)).load() is None